@@ -1,173 +1,408 @@
-import lightkurve as lk
-from astroquery.ipac.nexsci.nasa_exoplanet_archive import NasaExoplanetArchive
-from lightkurve.periodogram import BoxLeastSquaresPeriodogram
-from lightkurve import LightCurveCollection
-import matplotlib.pyplot as plt
-from astropy import units as u
-from lightkurve import search_lightcurve
-import numpy as np
-from pathlib import Path
-import shutil
-import glob
-import pandas as pd
 import os
 import gc
-from astropy.io import fits
+import sys
 import math
+import shutil
 import argparse
+from pathlib import Path
+
+import numpy as np
+
+# transit_pipeline paketi repo kökünde
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from transit_pipeline.lazy import lazy_import, preload
+from transit_pipeline.catalog import CatalogIndex
+from transit_pipeline.fitscache import FitsCache
+from transit_pipeline.bls import fast_bls, fast_bls_many
+from transit_pipeline.streaming import LightCurveStore, stream_quarters
+from transit_pipeline.photometry import batch_photometry, best_aperture, tpf_arrays
+from transit_pipeline.render import new_figure
+from transit_pipeline.outputstore import OutputStore
+from transit_pipeline import detrend
+from transit_pipeline import ttv
+from transit_pipeline import daemon
+
+# ağır kütüphaneler ilk kullanımda: import anında argparse, klasör ya da arşiv sorgusu yok
+lk = lazy_import("lightkurve")
+pd = lazy_import("pandas")
+fits = lazy_import("astropy.io.fits")
 
-fits.Conf.use_memmap = False
+WORKER_SOCKET = "./kepler_worker.sock"
+# Ağ kancaları (benchmark/testler yerel sahte MAST verir):
+# TPF_SEARCH_HOOK(planet) -> lightkurve SearchResult   (None: lk.search_targetpixelfile, Kepler long cadence)
+# FETCH_HOOK(uri, dosya_nesnesi): --cache-dir FitsCache'inin indiricisi   (None: fitscache.http_fetcher())
+TPF_SEARCH_HOOK = None
+FETCH_HOOK = None
 
-# Argument parser
-parser = argparse.ArgumentParser(description="Exoplanet processing script")
-parser.add_argument("--planetname", type=str, required=True, help="Name of the planet (e.g. 'Kepler-10 b')")
-args = parser.parse_args()
 
-# Use the argument instead of input()
-# Quotes " " are needed if the planet name contains spaces.
-# python kepler-exoplanet-analysis_EOA_v1.py --planetname "Kepler-10 b"
-planet = args.planetname
+def build_parser():
+    parser = argparse.ArgumentParser(description="Exoplanet processing script")
+    parser.add_argument("--planetname", type=str, default=None, help="Name of the planet (e.g. 'Kepler-10 b')")
+    parser.add_argument("--catalog-db", type=str, default="./pscomppars.sqlite", help="Local pscomppars snapshot (SQLite)")
+    parser.add_argument("--catalog-max-age", type=float, default=7.0, help="Refetch the snapshot if older than this many days")
+    parser.add_argument("--offline", action="store_true", help="Never query the archive, use the existing snapshot")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Shared FITS cache; TPFs are kept there instead of being deleted")
+    parser.add_argument("--bls-engine", choices=["fast", "lightkurve"], default="lightkurve",
+                        help="fast: coarse-to-fine BLS on the same period grid, lightkurve: to_periodogram")
+    parser.add_argument("--bls-prior", action="store_true", help="Restrict the BLS grid to P_catalog ± 0.1 d")
+    parser.add_argument("--cache-max-gb", type=float, default=None, help="LRU size budget for --cache-dir")
+    parser.add_argument("--stream", action="store_true",
+                        help="Process one quarter at a time (memory-mapped TPF, bounded memory)")
+    parser.add_argument("--aperture", choices=["auto", "pipeline", "pipeline+1", "threshold", "optimal"],
+                        default="pipeline",
+                        help="auto: per quarter, the lowest-CDPP candidate among those without neighbour-star "
+                             "contamination (photometry.MAX_CONTAMINATION); otherwise force that aperture")
+    parser.add_argument("--no-plots", action="store_true", help="Skip all figures (CSV outputs are still written)")
+    parser.add_argument("--plot-dpi", type=int, default=300, help="Resolution of the saved figures")
+    parser.add_argument("--output-format", choices=["csv", "binary", "both"], default="csv",
+                        help="csv: binned_lightcurve.csv + planet_summary.csv; binary: float32 .npy under arrays/ "
+                             "and one row in outputs.sqlite (transit_pipeline.outputstore)")
+    parser.add_argument("--detrend", choices=["biweight", "median", "spline", "savgol"], default="biweight",
+                        help="Per-quarter detrending with all known transits of the host masked "
+                             "(savgol: lightkurve flatten(window_length=101) with the same mask)")
+    parser.add_argument("--ttv", action="store_true",
+                        help="Measure every transit's mid-time with a shared template and write oc_table.csv "
+                             "(O-C against the refitted linear ephemeris) plus oc_diagram.png")
+    parser.add_argument("--serve", action="store_true",
+                        help="Stay resident: imports, catalog and FITS cache are set up once and planet names "
+                             "arrive over --socket (or --spool); every planet uses the options given here")
+    parser.add_argument("--submit", nargs="+", metavar="NAME", default=None,
+                        help="Send planet names to a running --serve worker and print the results")
+    parser.add_argument("--socket", type=str, default=WORKER_SOCKET, help="Worker socket path")
+    parser.add_argument("--spool", type=str, default=None,
+                        help="Queue directory: --serve also watches it, --submit drops names there instead of the socket")
+    parser.add_argument("--stop", action="store_true", help="Stop a running --serve worker")
+    return parser
+
 
 def sanitize_name(name: str) -> str:
     import re
     s = re.sub(r"[^\w\-_\. ]", "_", name).strip()
     return s.replace(" ", "_")
 
-planet_sanitized = sanitize_name(planet)
-outdir = Path(f"./{planet_sanitized}")
-outdir.mkdir(parents=True, exist_ok=True)
-print(f"Çıktılar {outdir} içine kaydedilecek.")
-
-# NASA Exoplanet Archive'den gezegen bilgisi çekme
-tbl = NasaExoplanetArchive.query_criteria(
-    table="pscomppars",
-    select="pl_name,hostname,pl_orbper,st_teff,st_rad,st_mass,sy_dist,sy_vmag,sy_gaiamag",
-    where=f"pl_name='{planet}'"
-)
-if len(tbl) == 0:
-    raise RuntimeError(f"{planet} bulunamadı. İsim formatını kontrol et!")
-
-P_catalog = tbl["pl_orbper"][0].to_value("d")  # birimi 'd' (gün) olarak çıkar
-host = str(tbl["hostname"][0])
-print(f"{planet} için katalog periyodu: {P_catalog} gün, host: {host}")
-
-tpf = lk.search_targetpixelfile(planet, author="Kepler", cadence="long").download_all(download_dir=str(outdir))
-print("TPF kaydedildi:")
-print("İndirilen TPF sayısı:", len(tpf))
-
-N = len(tpf)        # number of elements
-ncols = 5           # fixed number of columns
-nrows = math.ceil(N / ncols)  # number of rows needed
-
-fig, axes = plt.subplots(nrows, ncols, figsize=(3*ncols, 3*nrows))
-axes = axes.flatten()
-
-for i, ax in enumerate(axes):
-    if i < N:
-        cadence = tpf[i]
-        cadence.plot(aperture_mask=cadence.pipeline_mask, ax=ax, show_colorbar=False)
+
+_CATALOGS = {}
+
+
+def open_catalog(args):
+    # sıcak worker'da snapshot bir kez açılır
+    key = (os.path.abspath(args.catalog_db), args.catalog_max_age, args.offline)
+    if key not in _CATALOGS:
+        _CATALOGS[key] = CatalogIndex(args.catalog_db, max_age_days=args.catalog_max_age, offline=args.offline)
+    return _CATALOGS[key]
+
+
+def analyze(args):
+    """Tek gezegenin tüm analizi; çıktı klasörünü döndürür."""
+    # --stream'de çeyrekler tek tek açılıp kapatıldığı için memmap güvenli
+    fits.Conf.use_memmap = bool(args.stream)
+
+    # Use the argument instead of input()
+    # Quotes " " are needed if the planet name contains spaces.
+    # python kepler-exoplanet-analysis_EOA_v1.py --planetname "Kepler-10 b"
+    planet = args.planetname
+
+    planet_sanitized = sanitize_name(planet)
+    outdir = Path(f"./{planet_sanitized}")
+    outdir.mkdir(parents=True, exist_ok=True)
+    print(f"Çıktılar {outdir} içine kaydedilecek.")
+
+    # Gezegen bilgisi yerel katalog snapshot'ından (eskiyse NASA Exoplanet Archive'den tek seferde yenilenir)
+    catalog = open_catalog(args)
+    rec = catalog.get(planet)
+    if rec is None or rec.get("pl_orbper") is None:
+        raise RuntimeError(f"{planet} bulunamadı. İsim formatını kontrol et!")
+
+    P_catalog = float(rec["pl_orbper"])  # gün
+    host = str(rec["hostname"])
+    print(f"{planet} için katalog periyodu: {P_catalog} gün, host: {host}")
+
+    # host'un bilinen tüm gezegenlerinin transitleri detrend'de maskelenir (BKJD; süre bilinmiyorsa tahmin)
+    host_ephemerides = [(float(r["pl_orbper"]), float(r["pl_tranmid"]) - 2454833.0,
+                         float(r["pl_trandur"]) / 24.0 if r.get("pl_trandur") else None)
+                        for r in (catalog.by_host(host) or [rec])
+                        if r.get("pl_orbper") is not None and r.get("pl_tranmid") is not None]
+
+    if TPF_SEARCH_HOOK is not None:
+        tpf_search = TPF_SEARCH_HOOK(planet)
+    else:
+        tpf_search = lk.search_targetpixelfile(planet, author="Kepler", cadence="long")
+    fits_cache = None
+    if args.cache_dir:
+        fits_cache = FitsCache(args.cache_dir, max_bytes=int(args.cache_max_gb * 1024 ** 3) if args.cache_max_gb else None,
+                               fetcher=FETCH_HOOK)
+
+    def plot_tpf_cell(ax, i, cadence, mask=None):
+        if ax is None:     # --no-plots
+            return
+        cadence.plot(aperture_mask=cadence.pipeline_mask if mask is None else mask, ax=ax, show_colorbar=False)
         ax.set_title(f"Cadence {i}", fontsize=8)
+
+    aperture_prefer = None if args.aperture == "auto" else args.aperture
+
+    def detrend_lightcurve(lc):
+        # flatten(window_length=101) karşılığı, transitler maskeli (trend transit içinde komşulardan gelir)
+        lc = lc.remove_nans()
+        tt = lc.time.value
+        mask = detrend.transit_mask(tt, host_ephemerides)
+        if args.detrend == "savgol":
+            return lc.flatten(window_length=101, mask=mask)
+        window = detrend.window_for(tt, 101, host_ephemerides)
+        flux, flux_err, _ = detrend.detrend(tt, lc.flux.value, lc.flux_err.value, window, args.detrend, mask)
+        return lk.LightCurve(time=lc.time, flux=flux, flux_err=flux_err, meta=lc.meta)
+
+    def photometry_lightcurve(t, phot):
+        # seçilen açıklığın toplamı -> eskisiyle aynı detrend/remove_nans/remove_outliers zinciri
+        lc = lk.LightCurve(time=t.time, flux=phot["flux"] * t.flux.unit, flux_err=phot["flux_err"] * t.flux.unit)
+        lc.meta.update({"QUARTER": getattr(t, "quarter", None), "APERTURE": phot["aperture"],
+                        "APERTURE_CDPP": phot["cdpp"], "APERTURE_CONTAMINATION": phot["contamination"]})
+        print(f"Quarter {lc.meta['QUARTER']}: aperture={phot['aperture']} "
+              + ", ".join(f"{k}={v:.0f}ppm/{phot['contamination'][k]:.0%}" for k, v in phot["cdpp"].items()))
+        return detrend_lightcurve(lc).remove_nans().remove_outliers()
+
+    def tpf_grid(N):
+        if args.no_plots:
+            return None, [None] * N
+        ncols = 5           # fixed number of columns
+        nrows = math.ceil(N / ncols)  # number of rows needed
+        fig, axes = new_figure((3*ncols, 3*nrows), nrows, ncols)
+        axes = np.atleast_1d(axes).flatten()
+        for ax in axes[N:]:
+            ax.axis("off")  # hide unused plots
+        return fig, axes
+
+    def save_figure(fig, name, **kw):
+        # pyplot yok: Figure nesnesi doğrudan kaydedilir (global durum/thread sorunu yok)
+        if fig is None:
+            return
+        fig.savefig(os.path.join(outdir, name), dpi=args.plot_dpi, **kw)
+
+    def save_tpf_grid(fig):
+        if fig is not None:
+            fig.tight_layout()
+        save_figure(fig, "tpf_grid.pdf", bbox_inches="tight")
+
+    if args.stream:
+        def open_tpf(i):
+            if fits_cache is not None:
+                return fits_cache.fetch_read(str(tpf_search.table["dataURI"][i]), lk.read)
+            return tpf_search[i].download(download_dir=str(outdir))
+
+        current = {}
+
+        def on_open(i, t):
+            # aday açıklıklar tek geçişte toplanır; ızgarada seçilen açıklık gösterilir
+            current["phot"] = best_aperture(tpf_arrays(t), prefer=aperture_prefer)
+            plot_tpf_cell(axes[i], i, t, current["phot"]["mask"])
+
+        def quarter_photometry(t):
+            lc = photometry_lightcurve(t, current.pop("phot")).normalize()  # stitch() her parçayı normalize eder
+            print(f"Quarter {getattr(t, 'quarter', '?')} işlendi ({len(lc)} nokta).")
+            return lc.time.value, lc.flux.value, lc.flux_err.value, getattr(t, "quarter", None)
+
+        N = len(tpf_search)
+        print("İşlenecek TPF sayısı:", N)
+        fig, axes = tpf_grid(N)
+        # Kepler long cadence: çeyrek başına ~4400 nokta
+        store = stream_quarters(N, open_tpf, quarter_photometry, LightCurveStore(capacity=N * 4500),
+                                on_open=on_open)
+        save_tpf_grid(fig)
+        lc_stitched = store.to_lightcurve("bkjd")
+
+        def iter_quarter_lcs():
+            for i, (_, _, quarter) in enumerate(store.segments):
+                lc = store.to_lightcurve("bkjd", segment=i)
+                lc.meta["QUARTER"] = quarter
+                yield lc
     else:
-        ax.axis("off")  # hide unused plots
-
-plt.tight_layout()
-plot_path = os.path.join(outdir, "tpf_grid.pdf")
-plt.savefig(plot_path, dpi=300, bbox_inches="tight")
-
-lc_collection = []
-
-for i, t in enumerate(tpf):
-    lc = t.to_lightcurve(aperture_mask=t.pipeline_mask).flatten(window_length=101).remove_nans().remove_outliers()
-    globals()[f"lc_{i}"] = lc
-    lc_collection.append(lc)
-    print(f"lc_{i} oluşturuldu ve lc_collection'a eklendi.")
-    
-lc_collection = LightCurveCollection(lc_collection)
-lc_stitched   = lc_collection.stitch()
-
-lc_stitched.plot()
-plot_path = os.path.join(outdir, "stitched_lightcurve.png")
-plt.savefig(plot_path, dpi=300)
-
-fig, ax = plt.subplots(figsize=(20,5))
-for lc in lc_collection:
-  lc.plot(ax=ax, label=f'Quarter {lc.quarter}');
-  
-plot_path = os.path.join(outdir, "collection_plot.png")
-plt.savefig(plot_path, dpi=300)
-  
-  
-min_period, max_period = 0.5, ((lc_stitched.time[-1].value - lc_stitched.time[0].value) / 3)
-print(min_period, max_period)
-
-periods = [] 
-for i, lc in enumerate(lc_collection):
-    try:
-        lc_clean = lc.remove_nans().remove_outliers()
-        bls = lc_clean.to_periodogram(method="bls",minimum_period=min_period, maximum_period=max_period)
-        bls_period = bls.period_at_max_power.value
-        periods.append(bls_period)
-        print(f"lc_{i} için bulunan periyot: {bls_period:.5f} d")
-
-    except Exception as e:
-        print(f"lc_{i} için hata oluştu: {e}")
-        
-# ortalama periyot
-if periods:
-    expected = P_catalog   
-    tol = 0.1      
-
-    # filtreleme
-    filtered_periods = [p for p in periods if abs(p - expected) < tol]
-
-    if filtered_periods:
-        avg_period = np.mean(filtered_periods)
-        print("\nBulunan periyotlar:", [f"{p:.5f}" for p in periods])
-        print("Filtrelenmiş periyotlar:", [f"{p:.5f}" for p in filtered_periods])
-        print(f"Ortalama periyot (filtreli): {avg_period:.5f} d")
+        if fits_cache is not None:
+            tpf = lk.TargetPixelFileCollection(fits_cache.download_search(tpf_search, lk.read))
+        else:
+            tpf = tpf_search.download_all(download_dir=str(outdir))
+        print("TPF kaydedildi:")
+        print("İndirilen TPF sayısı:", len(tpf))
+
+        # tüm çeyreklerin piksel küpleri birlikte: aday açıklıklar tek matris çarpımıyla toplanır
+        phot = batch_photometry([tpf_arrays(t) for t in tpf], prefer=aperture_prefer)
+
+        N = len(tpf)        # number of elements
+        fig, axes = tpf_grid(N)
+        for i in range(N):
+            plot_tpf_cell(axes[i], i, tpf[i], phot[i]["mask"])
+        save_tpf_grid(fig)
+
+        lc_collection = []
+
+        for i, t in enumerate(tpf):
+            lc = photometry_lightcurve(t, phot[i])
+            lc_collection.append(lc)
+            print(f"lc_{i} oluşturuldu ve lc_collection'a eklendi.")
+
+        lc_collection = lk.LightCurveCollection(lc_collection)
+        lc_stitched   = lc_collection.stitch()
+
+        def iter_quarter_lcs():
+            yield from lc_collection
+
+    if not args.no_plots:
+        fig, ax = new_figure((8.5, 4))
+        lc_stitched.plot(ax=ax)
+        save_figure(fig, "stitched_lightcurve.png")
+
+        fig, ax = new_figure((20, 5))
+        for lc in iter_quarter_lcs():
+          lc.plot(ax=ax, label=f'Quarter {lc.quarter}');
+
+        save_figure(fig, "collection_plot.png")
+
+    min_period, max_period = 0.5, ((lc_stitched.time[-1].value - lc_stitched.time[0].value) / 3)
+    print(min_period, max_period)
+
+    bls_prior = P_catalog if args.bls_prior else None
+
+    periods = [] 
+    if args.bls_engine == "fast":
+        # çeyrek başına aramalar paralel süreçlerde
+        labels, series = [], []
+        for i, lc in enumerate(iter_quarter_lcs()):
+            try:
+                lc_clean = lc.remove_nans().remove_outliers()
+                series.append((lc_clean.time.value, lc_clean.flux.value, lc_clean.flux_err.value))
+                labels.append(i)
+            except Exception as e:
+                print(f"lc_{i} için hata oluştu: {e}")
+        results = fast_bls_many(series, minimum_period=min_period, maximum_period=max_period, prior_period=bls_prior)
+        for i, res in zip(labels, results):
+            if isinstance(res, Exception):
+                print(f"lc_{i} için hata oluştu: {res}")
+                continue
+            periods.append(res.period_at_max_power)
+            print(f"lc_{i} için bulunan periyot: {res.period_at_max_power:.5f} d")
+    else:
+        for i, lc in enumerate(iter_quarter_lcs()):
+            try:
+                lc_clean = lc.remove_nans().remove_outliers()
+                bls = lc_clean.to_periodogram(method="bls",minimum_period=min_period, maximum_period=max_period)
+                bls_period = bls.period_at_max_power.value
+                periods.append(bls_period)
+                print(f"lc_{i} için bulunan periyot: {bls_period:.5f} d")
+
+            except Exception as e:
+                print(f"lc_{i} için hata oluştu: {e}")
+
+    # ortalama periyot
+    if periods:
+        expected = P_catalog   
+        tol = 0.1      
+
+        # filtreleme
+        filtered_periods = [p for p in periods if abs(p - expected) < tol]
+
+        if filtered_periods:
+            avg_period = np.mean(filtered_periods)
+            print("\nBulunan periyotlar:", [f"{p:.5f}" for p in periods])
+            print("Filtrelenmiş periyotlar:", [f"{p:.5f}" for p in filtered_periods])
+            print(f"Ortalama periyot (filtreli): {avg_period:.5f} d")
+        else:
+            print("Filtreye uyan periyot bulunamadı.")
+    else:
+        print("Hiç periyot bulunamadı.")
+
+    if args.bls_engine == "fast":
+        # frequency_factor=10000 ızgarası zaten seyrek: fast_bls burada kaba aşamayı atlayıp tam ızgarayı değerlendirir
+        bls = fast_bls(lc_stitched.time.value, lc_stitched.flux.value, lc_stitched.flux_err.value,
+                       minimum_period=min_period, maximum_period=max_period, frequency_factor=10000,
+                       prior_period=bls_prior)
+        bls_period = bls.period_at_max_power
     else:
-        print("Filtreye uyan periyot bulunamadı.")
-else:
-    print("Hiç periyot bulunamadı.")
-    
-bls = lc_stitched.to_periodogram(method="bls", minimum_period=min_period, maximum_period=max_period, frequency_factor=10000)
-bls.plot()
-plt.semilogx()
-bls_period = bls.period_at_max_power.value
-print(f"BLS ile bulunan periyot: {bls_period:.5f} d")
-plt.axvline(bls_period, color='r', linestyle='dotted', label=f"Period = {bls_period:.4f} d", alpha=0.6)
-plt.legend()
-plot_path = os.path.join(outdir, "bls_period.png")
-plt.savefig(plot_path, dpi=300)
-
-folded_lc = lc_stitched.fold(period=bls_period).bin(time_bin_size=0.001)
-folded_lc.plot()
-plot_path = os.path.join(outdir, "folded_lightcurve.png")
-plt.savefig(plot_path, dpi=300)
-write_path = os.path.join(outdir, "binned_lightcurve.csv")
-folded_lc.to_table().write(write_path, format='csv', overwrite=True)
-
-print(f"Görseller ve CSV '{outdir}' klasörüne kaydedildi.")
-
-# Özet CSV (periyotlar ve yıldız bilgileri)
-summary_data = {
-    "pl_name": [planet],
-    "hostname": [host],
-    "P_catalog_days": [P_catalog],
-    "P_bls_days": [bls_period],
-    "st_teff_K": [tbl["st_teff"][0] if "st_teff" in tbl.colnames else None],
-    "st_rad_Rsun": [tbl["st_rad"][0] if "st_rad" in tbl.colnames else None],
-    "st_mass_Msun": [tbl["st_mass"][0] if "st_mass" in tbl.colnames else None],
-    "sy_dist_pc": [tbl["sy_dist"][0] if "sy_dist" in tbl.colnames else None],
-    "sy_vmag": [tbl["sy_vmag"][0] if "sy_vmag" in tbl.colnames else None],
-    "sy_gaiamag": [tbl["sy_gaiamag"][0] if "sy_gaiamag" in tbl.colnames else None],
-}
-
-summary_df = pd.DataFrame(summary_data)
-summary_path = os.path.join(outdir, "planet_summary.csv")
-summary_df.to_csv(summary_path, index=False)
-
-print(f"Özet CSV kaydedildi: {summary_path}")
+        bls = lc_stitched.to_periodogram(method="bls", minimum_period=min_period, maximum_period=max_period, frequency_factor=10000)
+        bls_period = bls.period_at_max_power.value
+    print(f"BLS ile bulunan periyot: {bls_period:.5f} d")
+    if not args.no_plots:
+        fig, ax = new_figure((6.4, 4.8))
+        if args.bls_engine == "fast":
+            ax.plot(bls.period, bls.power, lw=0.5)
+            ax.set_xlabel("Period [d]")
+            ax.set_ylabel("BLS Power")
+        else:
+            bls.plot(ax=ax)
+        ax.set_xscale("log")
+        ax.axvline(bls_period, color='r', linestyle='dotted', label=f"Period = {bls_period:.4f} d", alpha=0.6)
+        ax.legend()
+        save_figure(fig, "bls_period.png")
+
+    folded_lc = lc_stitched.fold(period=bls_period).bin(time_bin_size=0.001)
+    if not args.no_plots:
+        fig, ax = new_figure((8.5, 4))
+        folded_lc.plot(ax=ax)
+        save_figure(fig, "folded_lightcurve.png")
+    write_csv = args.output_format in ("csv", "both")
+    write_binary = args.output_format in ("binary", "both")
+    if write_csv:
+        write_path = os.path.join(outdir, "binned_lightcurve.csv")
+        folded_lc.to_table().write(write_path, format='csv', overwrite=True)
+
+    print(f"Görseller ve veriler '{outdir}' klasörüne kaydedildi.")
+
+    # Transit başına zamanlama (O−C): katalog efemerisinden başlayarak tüm transitler toplu uydurulur
+    ttv_summary = {}
+    if args.ttv and rec.get("pl_tranmid") is not None:
+        dur_days = float(rec["pl_trandur"]) / 24.0 if rec.get("pl_trandur") else detrend.default_duration(P_catalog)
+        ttv_res = ttv.measure_ttv(lc_stitched.time.value, lc_stitched.flux.value, lc_stitched.flux_err.value,
+                                  P_catalog, float(rec["pl_tranmid"]) - 2454833.0, dur_days)
+        if ttv_res is None or not ttv_res["ok"].any():
+            print("TTV: uygun transit penceresi bulunamadı.")
+        else:
+            oc = ttv.oc_table(ttv_res, time_offset=2454833.0)
+            oc.to_csv(os.path.join(outdir, "oc_table.csv"), index=False)
+            ttv_summary = ttv.summary(ttv_res, time_offset=2454833.0)
+            print(f"TTV: {ttv_summary['ttv_n_transits']} transit, P = {ttv_summary['ttv_period_day']:.7f} d, "
+                  f"O−C rms = {ttv_summary['ttv_oc_rms_min']:.2f} dk")
+            if not args.no_plots:
+                good = oc[oc["ok"]]
+                fig, ax = new_figure((8.5, 4))
+                ax.errorbar(good["epoch"], good["oc_min"], yerr=good["oc_err_min"], fmt=".", alpha=0.6)
+                ax.axhline(0.0, color="k", lw=0.5)
+                ax.set_xlabel("Epoch")
+                ax.set_ylabel("O − C [min]")
+                save_figure(fig, "oc_diagram.png")
+
+    # Özet CSV (periyotlar ve yıldız bilgileri)
+    summary_data = {
+        "pl_name": [planet],
+        "hostname": [host],
+        "P_catalog_days": [P_catalog],
+        "P_bls_days": [bls_period],
+        "st_teff_K": [rec.get("st_teff")],
+        "st_rad_Rsun": [rec.get("st_rad")],
+        "st_mass_Msun": [rec.get("st_mass")],
+        "sy_dist_pc": [rec.get("sy_dist")],
+        "sy_vmag": [rec.get("sy_vmag")],
+        "sy_gaiamag": [rec.get("sy_gaiamag")],
+    }
+    summary_data.update({k: [v] for k, v in ttv_summary.items()})
+
+    if write_csv:
+        summary_df = pd.DataFrame(summary_data)
+        summary_path = os.path.join(outdir, "planet_summary.csv")
+        summary_df.to_csv(summary_path, index=False)
+        print(f"Özet CSV kaydedildi: {summary_path}")
+
+    if write_binary:
+        # binlenmiş katlanmış eğri float32 .npy, özet outputs.sqlite'ta tek satır
+        store = OutputStore(outdir)
+        arrays = store.write_arrays(planet_sanitized + "_binned",
+                                    np.asarray(folded_lc.time.value, dtype=np.float64),
+                                    np.asarray(folded_lc.flux.value, dtype=np.float64),
+                                    np.asarray(folded_lc.flux_err.value, dtype=np.float64))
+        store.put(planet, {**{k: v[0] for k, v in summary_data.items() if k != "pl_name"}, "arrays": arrays})
+        print(f"İkili çıktı kaydedildi: {store.db_path}")
+
+    # ortak önbellek kullanılıyorsa dosyalar sonraki koşular için saklanır
+    if not args.cache_dir:
+        cleanup_mast(outdir)
+
+    return outdir
 
 
 #mastdowload silmek için
@@ -184,5 +419,52 @@ def cleanup_mast(outdir: Path):
     else:
         print("mastDownload klasörü bulunamadı")
 
-cleanup_mast(outdir)
 
+def serve(args):
+    """--serve: gezegenler sırayla (çıktı/astropy ayarları süreç genelinde), aynı süreçte."""
+    def handle(name):
+        outdir = analyze(argparse.Namespace(**{**vars(args), "planetname": str(name).strip()}))
+        return {"planet": name, "status": "ok", "outdir": str(outdir)}
+
+    preload(lk, pd, fits, "matplotlib.figure", "matplotlib.backends.backend_agg")
+    open_catalog(args)
+    worker = daemon.WarmWorker(handle, socket_path=args.socket, spool_dir=args.spool, workers=1)
+    print(f"Worker hazır | soket: {args.socket} | kuyruk: {args.spool or '-'}", flush=True)
+    worker.serve_forever()
+
+
+def submit(args):
+    if args.spool:
+        job = daemon.spool_submit(args.spool, args.submit)
+        results = daemon.spool_results(args.spool, job)
+    else:
+        results = daemon.submit(args.socket, args.submit)
+    failed = 0
+    for res in results:
+        if res.get("done"):
+            continue
+        failed += res.get("status") == "error"
+        print(f"{res.get('planet') or res.get('target')}: {res.get('status')} [{res.get('seconds', 0):.1f} s] "
+              f"{res.get('outdir') or res.get('error') or ''}", flush=True)
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.submit:
+        return submit(args)
+    if args.stop:
+        print(daemon.stop(args.socket))
+        return 0
+    if args.serve:
+        serve(args)
+        return 0
+    if not args.planetname:
+        parser.error("--planetname is required (or --serve / --submit)")
+    analyze(args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,31 +6,66 @@ import math
 import time
 import warnings
 import csv
+import asyncio
+import argparse
+import contextlib
 import threading  # ### FIX: thread-safe log için
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
 import numpy as np
-import pandas as pd
 
-# ### FIX: Başsız ortamlar için backend'i pyplot'tan önce ayarla
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+# ### FIX: Başsız ortamlar için backend (matplotlib ilk import edildiğinde okunur)
+os.environ.setdefault("MPLBACKEND", "Agg")
 
-from astropy import units as u
-try:
-    from astroquery.ipac.nexsci.nasa_exoplanet_archive import NasaExoplanetArchive
-except Exception:
-    from astroquery.nasa_exoplanet_archive import NasaExoplanetArchive
-import lightkurve as lk
+from transit_pipeline.lazy import lazy_import, preload
+
+# ağır kütüphaneler ilk kullanımda yüklenir: --queue-status/--merge/--submit ve atlanan hedefler ödemez
+pd = lazy_import("pandas")
+lk = lazy_import("lightkurve", setup=lambda m: m.log.setLevel("ERROR"))
+
+from transit_pipeline import engine
+from transit_pipeline.catalog import CatalogIndex
+from transit_pipeline.fetcher import FetchScheduler
+from transit_pipeline.fitscache import FitsCache, http_fetcher
+from transit_pipeline.foldkernel import fold_bin_metrics, METRIC_COLUMNS
+from transit_pipeline.transitfit import fit_folded, FIT_COLUMNS
+from transit_pipeline.outputstore import OutputStore
+from transit_pipeline.lccache import HostLightCurveCache, NO_DATA as LC_NO_DATA
+from transit_pipeline.lcarrays import LightCurveArrays
+from transit_pipeline.resultstore import ResultStore, input_hash, NO_DATA
+from transit_pipeline import render
+from transit_pipeline import detrend
+from transit_pipeline.epoch import search_epoch
+from transit_pipeline import ttv
+from transit_pipeline import workqueue
+from transit_pipeline import scheduler
+from transit_pipeline import daemon
+from transit_pipeline.profiling import (TargetTimer, stage, add_bytes, should_profile,
+                                        load_records, summarize, format_report)
 
 ### ayarlar
-OUTPUT_DIR = "/arf/scratch/egitim112/exoplanet_output2"
+OUTPUT_DIR = os.environ.get("TRANSIT_OUTPUT_DIR", "/arf/scratch/egitim112/exoplanet_output2")
 CACHE_DIR = os.path.join(OUTPUT_DIR, "lk_cache")
 PNG_DIR = os.path.join(OUTPUT_DIR, "png")
 CSV_DIR = os.path.join(OUTPUT_DIR, "csv")
+LC_CACHE_DIR = os.path.join(OUTPUT_DIR, "lc_cache")   # host başına stitch+flatten edilmiş LC (.npz)
+RESULTS_DB = os.path.join(OUTPUT_DIR, "results.sqlite")  # hedef başına girdi özeti
 MANIFEST = os.path.join(OUTPUT_DIR, "manifest.jsonl")
+METRICS_CSV = os.path.join(OUTPUT_DIR, "metrics.csv")
 LOGFILE = os.path.join(OUTPUT_DIR, "run_log.jsonl")
+# metrics.csv sütunları sabit: FIT_TRANSIT/MEASURE_TTV kapalıysa ilgili sütunlar boş kalır
+METRICS_COLUMNS = (["planet", "host", "period_day", "duration_hr"] + METRIC_COLUMNS
+                   + FIT_COLUMNS + ttv.SUMMARY_COLUMNS)
+TTV_DIR = os.path.join(OUTPUT_DIR, "ttv")            # MEASURE_TTV: <hedef>.csv O−C tabloları
+PROFILE_DIR = os.path.join(OUTPUT_DIR, "profiles")   # <hedef>.<faz>.prof (pstats/snakeviz)
+# pscomppars yerel snapshot'ı (python -m transit_pipeline.catalog --db ... ile önceden hazırlanabilir)
+CATALOG_DB = os.path.join(OUTPUT_DIR, "pscomppars.sqlite")
+CATALOG_MAX_AGE_DAYS = 7.0
+CATALOG_OFFLINE = False   # True: internet yok, snapshot yaşına bakma
+# host ürün listeleri results.sqlite'ta saklanır; bundan yeni liste için arşive yeniden sorulmaz
+# (yeni sektör/çeyrek en geç bu kadar gecikmeyle fark edilir). 0: her koşuda canlı arama
+PRODUCTS_MAX_AGE_DAYS = 1.0
 
 # Yerel CSV yolu (senin yüklediğin dosya)
 INPUT_FILE = "/arf/scratch/egitim112/transit_data.csv"
@@ -38,22 +73,137 @@ INPUT_FILE = "/arf/scratch/egitim112/transit_data.csv"
 MAX_WORKERS = max(4, os.cpu_count() or 4)
 START_INDEX = 40   # kaçıncı satırdan başlayacağını burada ayarlarsın
 MAX_TARGETS = 20
+# Çok düğümlü parçalı çalıştırma (--shards N --shard-id K ya da SLURM dizi işi ortam değişkenleri):
+# tüm hedefler host gruplarıyla WORK_QUEUE'ya yazılır, düğümler oradan iş alır/çalar;
+# START_INDEX/MAX_TARGETS dilimlemesi kullanılmaz. Yeni bir tarama için kuyruk dosyasını sil.
+WORK_QUEUE = os.path.join(OUTPUT_DIR, "workqueue.sqlite")
+SHARD_LEASE_S = 3600.0   # heartbeat gelmeyen (ölen düğümün) birimleri bu süre sonra başka düğüme geçer
+# Zamanlama: "cost" host gruplarını tahmini süreye göre pahalıdan ucuza çalıştırır (önceki koşuların
+# süreleri, sonuç deposundaki ürün listeleri; bkz. transit_pipeline/scheduler.py), "input" dosya sırası
+SCHEDULE = "cost"
+# True (ya da --checkpoint): kuyruk CHECKPOINT_DB'de tutulur; yarıda kalan çalıştırma aynı komutla
+# kaldığı yerden sürer (bitmiş host'lar için arama bile yapılmaz). Tüm kuyruk bitince dosya silinir.
+CHECKPOINT = False
+CHECKPOINT_DB = os.path.join(OUTPUT_DIR, "checkpoint.sqlite")
 MISSION_PRIORITY = ["TESS", "Kepler", "K2"]
 AUTHOR_PRIORITY = ["SPOC", "QLP", "Kepler", "K2"]
 FLATTEN_WINDOW = 301
+# Detrend host başına bir kez, host'un bilinen tüm gezegenlerinin transitleri maskelenerek:
+# "biweight" | "median" | "spline" (transit_pipeline.detrend) | "savgol" (lightkurve flatten, maskeli)
+DETREND_METHOD = "biweight"
+DETREND_WINDOW_DAYS = None   # None: FLATTEN_WINDOW kadans; her durumda en az 3× en uzun transit süresi
+TRANSIT_MASK_PAD = 1.5       # maske genişliği = pad × transit süresi
+# pl_tranmid yoksa t0, bilinen periyotta katlanmış seride eşleşmiş filtre (yamuk şablon) ile aranır;
+# SNR bunun altındaysa hedef skip_missing_params olur
+T0_MIN_SNR = 7.0
 TIME_BIN = 0.001
 RETRY = 3
 RETRY_BASE_SLEEP = 2.0
+USE_FITS_CACHE = True        # False: lightkurve download_all doğrudan CACHE_DIR'e yazar
+FITS_CACHE_MAX_GB = 200      # CACHE_DIR bu boyutu aşarsa en eski kullanılan ürünler silinir
+# Ağ kancaları (thread/process/async yolları aynı kancaları kullanır; testler/benchmark yerel sahte MAST verir):
+# SEARCH_HOOK(hostname, mission) -> lightkurve SearchResult   (None: lk.search_lightcurve)
+# FETCH_HOOK(uri, dosya_nesnesi): ürünü dosyaya yazar, FitsCache üzerinden   (None: fitscache.http_fetcher())
+SEARCH_HOOK = None
+FETCH_HOOK = None
+# True: yalnızca girdileri (katalog parametreleri, veri ürünleri, ayarlar) değişen hedefler yeniden hesaplanır
+# False: eski davranış, png+csv varsa atla
+INCREMENTAL = True
+PIPELINE_VERSION = 1         # fold/metrik hesabı değişirse artır → tüm hedefler yeniden hesaplanır
+# "thread": eski ThreadPoolExecutor yolu | "process": indirme thread'lerde, hesap süreç havuzunda
+# "async": indirme asyncio zamanlayıcısında (arşiv başına limit + hız sınırı), hesap süreç havuzunda
+EXEC_MODE = "thread"
+COMPUTE_WORKERS = os.cpu_count() or 4
+IO_WORKERS = 8
+MAX_INFLIGHT = 2 * COMPUTE_WORKERS  # indirilmiş ama işlenmemiş en fazla hedef
+MISSION_CONCURRENCY = {"TESS": 8, "Kepler": 4, "K2": 4}  # async: görev başına eşzamanlı bağlantı
+ARCHIVE_RATE = 10.0    # async: saniyede en fazla istek (token bucket)
+ARCHIVE_BURST = 20
+# True: katlanmış eğriye batman+iminuit transit modeli uydurulur, Rp/Rs, a/Rs, inc metrics.csv'ye yazılır
+# (batman-package ve iminuit gerekir)
+FIT_TRANSIT = False
+FIT_LIMB_DARK = (0.3, 0.1)   # kuadratik limb darkening katsayıları (sabit)
+# True: her transitin orta zamanı ayrı ölçülür (ortak yamuk şablon, tüm transitler toplu), O−C tablosu
+# TTV_DIR/<hedef>.csv'ye, özet (ttv_period_day, ttv_oc_rms_min, ...) metrics.csv'ye yazılır
+MEASURE_TTV = False
+# Hedef başına aşama süreleri run_log.jsonl'a ("status": "timing") yazılır, sonda rapor basılır.
+# cProfile: PROFILE_TARGETS her zaman, PROFILE_EVERY > 0 ise isim özetine göre her N hedeften biri
+PROFILE_EVERY = 0
+PROFILE_TARGETS = []
+# "csv": csv/<hedef>.csv + manifest.jsonl + metrics.csv | "binary": arrays/<hedef>.npy (float32, mmap ile
+# okunur) + outputs.sqlite (manifest ve metrikler tek tabloda, transit_pipeline.outputstore) | "both"
+OUTPUT_FORMAT = "csv"
+OUTPUT_STORE_DIR = None   # ikili çıktı tablosu klasörü; None: OUTPUT_DIR (parçalı koşuda parça klasörü)
+# "inline": PNG hesapla aynı adımda | "deferred": PNG'ler ayrı süreç havuzunda (RENDER_WORKERS), kaydedilmiş
+# CSV'lerden | "off" (--no-plots): PNG yok, sonradan --render-only ya da python -m transit_pipeline.render
+PLOT_MODE = "inline"
+RENDER_WORKERS = 2
+PLOT_DPI = 150
+# Sıcak worker (--serve): importlar, katalog ve önbellekler bir kez kurulur, hedef adları yerel soketten
+# (--submit) ya da kuyruk klasöründen gelir; hedefler MAX_WORKERS iş parçacığında process_one ile işlenir
+WORKER_SOCKET = os.path.join(OUTPUT_DIR, "worker.sock")
+WORKER_SPOOL = os.path.join(OUTPUT_DIR, "spool")   # <spool>/new/*.json -> <spool>/done/*.jsonl
 ###
 
-warnings.filterwarnings("ignore")
-try:
-    lk.log.setLevel("ERROR")
-except Exception:
-    pass
+_LC_CACHE = None       # host LC önbelleği, sonuç deposu, ikili çıktı deposu, FITS önbelleği:
+_RESULTS = None        # ilk kullanımda (_lc_cache() ...) o anki ayarlarla kurulur
+_OUTPUTS = None
+_FITS_CACHE = None
+_STATE_LOCK = threading.Lock()
+_RECOMPUTE_REASONS = Counter()
+_SEARCH_MEMO = OrderedDict()
+_SEARCH_LOCK = threading.Lock()
 
-for d in [OUTPUT_DIR, CACHE_DIR, PNG_DIR, CSV_DIR]:
-    os.makedirs(d, exist_ok=True)
+def setup():
+    """Çalıştırma öncesi ortam: uyarılar ve çıktı klasörleri (import anında yapılmaz)."""
+    warnings.filterwarnings("ignore")
+    for d in [OUTPUT_DIR, CACHE_DIR, PNG_DIR, CSV_DIR, LC_CACHE_DIR, TTV_DIR]:
+        os.makedirs(d, exist_ok=True)
+
+def _lc_cache():
+    global _LC_CACHE
+    with _STATE_LOCK:
+        if _LC_CACHE is None:
+            _LC_CACHE = HostLightCurveCache(LC_CACHE_DIR)
+        return _LC_CACHE
+
+def _results():
+    global _RESULTS
+    with _STATE_LOCK:
+        if _RESULTS is None:
+            _RESULTS = ResultStore(RESULTS_DB)
+        return _RESULTS
+
+def _outputs():
+    # OUTPUT_FORMAT "binary"/"both"; csv modunda outputs.sqlite hiç oluşmaz
+    global _OUTPUTS
+    with _STATE_LOCK:
+        if _OUTPUTS is None:
+            if OUTPUT_STORE_DIR:
+                # tablo parçaya özel, diziler ortak arrays/ klasöründe
+                _OUTPUTS = OutputStore(OUTPUT_STORE_DIR, arrays_dir=os.path.join(OUTPUT_DIR, "arrays"))
+            else:
+                _OUTPUTS = OutputStore(OUTPUT_DIR)
+        return _OUTPUTS
+
+def _fits_cache():
+    global _FITS_CACHE
+    with _STATE_LOCK:
+        if _FITS_CACHE is None:
+            _FITS_CACHE = FitsCache(CACHE_DIR, max_bytes=int(FITS_CACHE_MAX_GB * 1024 ** 3) if FITS_CACHE_MAX_GB else None,
+                                    fetcher=FETCH_HOOK or http_fetcher())
+        return _FITS_CACHE
+
+def _arrays_dir():
+    # depo kurulmadan da bilinir (csv modunda already_done/render için outputs.sqlite açılmasın)
+    return _OUTPUTS.arrays_dir if _OUTPUTS is not None else os.path.join(OUTPUT_DIR, "arrays")
+
+def _archive():
+    try:
+        from astroquery.ipac.nexsci.nasa_exoplanet_archive import NasaExoplanetArchive
+    except Exception:
+        from astroquery.nasa_exoplanet_archive import NasaExoplanetArchive
+    return NasaExoplanetArchive
 
 # ### FIX: log yazımı için kilit
 _LOG_LOCK = threading.Lock()
@@ -63,11 +213,39 @@ def sanitize(name: str) -> str:
     return re.sub(r"_+", "_", name).strip("_")
 
 def save_line(path, rec: dict):
+    # process modunda tek yazıcı sürece gider
+    if engine.put_record("jsonl", path, rec):
+        return
     # ### FIX: thread-safe append
     with _LOG_LOCK:
         with open(path, "a", encoding="utf-8") as f:
             f.write(json.dumps(rec, ensure_ascii=False) + "\n")
 
+def save_row(path, rec: dict, columns=None):
+    # başlık: dosya varsa kendi başlığı, yoksa columns (verilmezse kaydın anahtarları); fazla anahtarlar atılır
+    if columns is not None:
+        rec = {k: rec.get(k) for k in columns}
+    if engine.put_record("csv", path, rec):
+        return
+    with _LOG_LOCK:
+        fieldnames = engine.csv_header(path, rec.keys())
+        newfile = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, "a", newline='', encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            if newfile:
+                writer.writeheader()
+            writer.writerow({k: rec.get(k) for k in fieldnames})
+
+def target_timer(planet, phase):
+    prof = PROFILE_DIR if should_profile(planet, PROFILE_EVERY, PROFILE_TARGETS) else None
+    return TargetTimer(planet, phase, sink=lambda rec: save_line(LOGFILE, rec), profile_dir=prof)
+
+def _files_size(paths):
+    try:
+        return sum(os.path.getsize(p) for p in paths or [] if p and os.path.exists(p))
+    except Exception:
+        return 0
+
 def safe_value(x, unit=None):
     if x is None:
         return None
@@ -93,6 +271,8 @@ def safe_value(x, unit=None):
         return None
 
 def get_time_offset(lc) -> float:
+    if isinstance(lc, LightCurveArrays):
+        return lc.time_offset
     # ### FIX: daha güvenli biçimde format yakala
     fmt = None
     try:
@@ -131,6 +311,39 @@ def detect_delimiter(path, comment_char='#'):
     except Exception:
         return ','
 
+_CATALOG = None
+_CATALOG_LOCK = threading.Lock()
+
+def get_catalog():
+    # snapshot açılamazsa None → eski satır bazlı sorguya düşülür
+    global _CATALOG
+    with _CATALOG_LOCK:
+        if _CATALOG is None:
+            idx = CatalogIndex(CATALOG_DB, max_age_days=CATALOG_MAX_AGE_DAYS, offline=CATALOG_OFFLINE)
+            try:
+                len(idx)
+                _CATALOG = idx
+            except Exception as e:
+                save_line(LOGFILE, {"status": "catalog_unavailable", "db": CATALOG_DB, "error": repr(e)})
+                _CATALOG = False
+        return _CATALOG or None
+
+def lookup_params(name: str):
+    """Katalog satırını döndürür (bulunamazsa None); hata durumunda exception fırlatır."""
+    idx = get_catalog()
+    if idx is not None:
+        return idx.get(name)
+    esc = name.replace("'", "''")
+    tbl = _archive().query_criteria(
+        table="pscomppars",
+        select="pl_name,hostname,pl_orbper,pl_tranmid,pl_trandur",
+        where=f"pl_name = '{esc}'"
+    )
+    if len(tbl) == 0:
+        return None
+    r = tbl[0]
+    return {k: r[k] for k in tbl.colnames}
+
 def _read_csv_robust(path, sep, header=True):
     # ### FIX: bazı pandas sürümlerinde engine='c' + comment sorun çıkarabilir → python'a düş
     try:
@@ -138,7 +351,12 @@ def _read_csv_robust(path, sep, header=True):
     except Exception:
         return pd.read_csv(path, sep=sep, header=0 if header else None, engine='python', comment='#', low_memory=False)
 
-def rows_from_local_file(path, name_col=0, header=True, max_targets=None):
+def _slice_rows(seq, start, max_targets):
+    # liste ya da DataFrame.iloc
+    return seq[start:start + max_targets if max_targets else None]
+
+def rows_from_local_file(path, name_col=0, header=True, max_targets=None, start=None):
+    start = START_INDEX if start is None else start
     sep = detect_delimiter(path)
     df = _read_csv_robust(path, sep, header=header)
 
@@ -146,55 +364,140 @@ def rows_from_local_file(path, name_col=0, header=True, max_targets=None):
     dfcols = set([str(c) for c in df.columns])
     rows = []
     if needed_cols.issubset(dfcols):
-        if max_targets:
-            df = df.iloc[START_INDEX:START_INDEX + max_targets]
+        df = _slice_rows(df.iloc, start, max_targets)
         for _, r in df.iterrows():
             rows.append({k: r[k] for k in ["pl_name", "hostname", "pl_orbper", "pl_tranmid", "pl_trandur"]})
         return rows
     # Eğer tam parametre yoksa isim sütunundan al ve eksik parametreleri NASA'dan sorgula
-    names = df.iloc[:, name_col].astype(str).tolist()
-    if max_targets:
-        names = names[:max_targets]
+    # START_INDEX eskiden yalnızca tam sütunlu dalda uygulanıyordu
+    names = _slice_rows(df.iloc[:, name_col].astype(str).tolist(), start, max_targets)
     for name in names:
         name_clean = str(name).strip()
         if not name_clean:
             continue
-        esc = name_clean.replace("'", "''")
-        try:
-            tbl = NasaExoplanetArchive.query_criteria(
-                table="pscomppars",
-                select="pl_name,hostname,pl_orbper,pl_tranmid,pl_trandur",
-                where=f"pl_name = '{esc}'"
-            )
-            if len(tbl) > 0:
-                r = tbl[0]
-                rows.append({k: r[k] for k in tbl.colnames})
-            else:
-                rows.append({"pl_name": name_clean, "hostname": None, "pl_orbper": None, "pl_tranmid": None, "pl_trandur": None})
-        except Exception as e:
-            save_line(LOGFILE, {"planet": name_clean, "status": "fetch_params_error", "error": repr(e)})
-            rows.append({"pl_name": name_clean, "hostname": None, "pl_orbper": None, "pl_tranmid": None, "pl_trandur": None})
+        rows.append(row_from_name(name_clean))
     return rows
 
-def _flatten_or_normalize(lc):
-    # ### FIX: kısa seri/NaN durumları için daha yumuşak yaklaşım
-    lc2 = lc.remove_nans()
+def row_from_name(name: str):
+    """Gezegen adından girdi satırı (katalogda yoksa yalnızca ad; parametreler sonra yine aranır)."""
     try:
+        r = lookup_params(name)
+        if r is not None:
+            return {k: r.get(k) for k in ["pl_name", "hostname", "pl_orbper", "pl_tranmid", "pl_trandur"]}
+    except Exception as e:
+        save_line(LOGFILE, {"planet": name, "status": "fetch_params_error", "error": repr(e)})
+    return {"pl_name": name, "hostname": None, "pl_orbper": None, "pl_tranmid": None, "pl_trandur": None}
+
+def host_ephemerides(host, P_day=None, t0_bjd=None, dur_hr=None):
+    """Host'un bilinen gezegenleri (katalog + verilen hedef): [(P_gün, t0_bjd, süre_gün), ...] sıralı."""
+    eph = set()
+    idx = get_catalog()
+    if idx is not None and host:
+        for r in idx.by_host(host):
+            e = _ephemeris(r.get("pl_orbper"), r.get("pl_tranmid"), r.get("pl_trandur"))
+            if e is not None:
+                eph.add(e)
+    own = _ephemeris(P_day, t0_bjd, dur_hr)
+    if own is not None:
+        eph.add(own)
+    return sorted(eph)
+
+def _ephemeris(P_day, t0_bjd, dur_hr):
+    # yuvarlanmış: aynı host'un gezegenleri aynı maskeyi (ve lc_cache anahtarını) bulsun
+    P_day, t0_bjd, dur_hr = safe_value(P_day), safe_value(t0_bjd), safe_value(dur_hr)
+    if P_day is None or t0_bjd is None or not (np.isfinite(P_day) and np.isfinite(t0_bjd)) or P_day <= 0:
+        return None
+    dur = round(dur_hr / 24.0, 5) if dur_hr is not None and np.isfinite(dur_hr) and dur_hr > 0 else None
+    return (round(P_day, 7), round(t0_bjd, 5), dur)
+
+def _detrend(lc, ephemerides):
+    offset = get_time_offset(lc)
+    t, f, fe = _lc_arrays(lc)
+    eph = [(P, t0 - offset, dur) for P, t0, dur in ephemerides]
+    mask = detrend.transit_mask(t, eph, TRANSIT_MASK_PAD)
+    if DETREND_METHOD == "savgol":
         wl = int(FLATTEN_WINDOW)
         if wl % 2 == 0:
             wl += 1
-        return lc2.flatten(window_length=wl)
+        flat = lc.to_lightcurve().flatten(window_length=wl, mask=mask)
+        return lc.with_flux(flat.flux.value, flat.flux_err.value)
+    window = DETREND_WINDOW_DAYS or detrend.window_for(t, FLATTEN_WINDOW, eph)
+    flux, flux_err, _ = detrend.detrend(t, f, fe, window, DETREND_METHOD, mask)
+    return lc.with_flux(flux, flux_err)
+
+def _flatten_or_normalize(lc, ephemerides=()):
+    # ### FIX: kısa seri/NaN durumları için daha yumuşak yaklaşım
+    lc2 = lc.remove_nans()
+    try:
+        return _detrend(lc2, ephemerides).remove_nans()
     except Exception:
         try:
             return lc2.normalize()
         except Exception:
             return lc2
 
-def search_download_lightcurve(hostname: str):
-    # ### FIX: daha çok log ve retry üst katmanda
+def _download_all(search_result):
+    # atomik yazım + bütünlük kontrolü olan önbellek üzerinden indir
+    with stage("download"):
+        if USE_FITS_CACHE and "dataURI" in search_result.table.colnames:
+            lcs = _fits_cache().download_search(search_result, lk.read)
+            # compute aşaması aynı ürünü önbellekten (fetch_read) yeniden okuyabilsin diye uri saklanır
+            for lc, uri in zip(lcs, search_result.table["dataURI"]):
+                lc.meta["DATAURI"] = str(uri)
+            lcc = lk.LightCurveCollection(lcs)
+        else:
+            lcc = search_result.download_all(download_dir=CACHE_DIR)
+        add_bytes(_files_size(product_paths(lcc)) if lcc else 0)
+        return lcc
+
+def _search_lightcurve(hostname: str, mission: str):
+    # aynı host'un gezegenleri (ve ürün listesi + indirme) aynı arama sonucunu paylaşır
+    key = (hostname, mission)
+    with _SEARCH_LOCK:
+        if key in _SEARCH_MEMO:
+            _SEARCH_MEMO.move_to_end(key)
+            return _SEARCH_MEMO[key]
+    with stage("search"):
+        if SEARCH_HOOK is not None:
+            search = SEARCH_HOOK(hostname, mission)
+        else:
+            search = lk.search_lightcurve(hostname, mission=mission)
+    with _SEARCH_LOCK:
+        _SEARCH_MEMO[key] = search
+        while len(_SEARCH_MEMO) > 512:
+            _SEARCH_MEMO.popitem(last=False)
+    return search
+
+def cached_products(hostname: str):
+    # PRODUCTS_MAX_AGE_DAYS'ten yeni kayıtlı liste ya da None
+    if not PRODUCTS_MAX_AGE_DAYS:
+        return None
+    return _results().products(hostname, max_age=PRODUCTS_MAX_AGE_DAYS * 86400.0)
+
+def list_products(hostname: str):
+    # önce kayıtlı liste; yoksa/eskiyse canlı arama (yalnızca başarılı aramalar saklanır)
+    data = cached_products(hostname)
+    if data is None:
+        data = search_products(hostname)
+        _results().put_products(hostname, data)
+    return data
+
+def search_products(hostname: str):
+    # indirilecek veri ürünlerinin listesi: öncelik sırasında sonucu olan ilk görev
+    for mission in MISSION_PRIORITY:
+        search = _search_lightcurve(hostname, mission)
+        if len(search) == 0:
+            continue
+        cols = search.table.colnames
+        col = "productFilename" if "productFilename" in cols else ("dataURI" if "dataURI" in cols else "obs_id")
+        return {"mission": mission, "products": sorted(str(x) for x in search.table[col])}
+    return {"mission": None, "products": []}
+
+def _iter_downloads(hostname: str):
+    # görev/yazar önceliğine göre indirilebilen ürün koleksiyonlarını sırayla verir
     for mission in MISSION_PRIORITY:
         try:
-            search = lk.search_lightcurve(hostname, mission=mission)
+            search = _search_lightcurve(hostname, mission)
         except Exception as e:
             save_line(LOGFILE, {"host": hostname, "mission": mission, "status": "search_error", "error": repr(e)})
             continue
@@ -205,28 +508,110 @@ def search_download_lightcurve(hostname: str):
             if len(sub) == 0:
                 continue
             try:
-                lcc = sub.download_all(download_dir=CACHE_DIR)
-                if not lcc or len(lcc) == 0:
-                    continue
-                lc = lcc.stitch()
-                lc = _flatten_or_normalize(lc)
-                return lc, mission, author
+                lcc = _download_all(sub)
             except Exception as e:
                 save_line(LOGFILE, {"host": hostname, "mission": mission, "author": author, "status": "download_error", "error": repr(e)})
                 continue
+            if lcc and len(lcc) > 0:
+                yield lcc, mission, author
         # yazar filtrelemeden dene
         try:
-            lcc = search.download_all(download_dir=CACHE_DIR)
-            if lcc and len(lcc) > 0:
-                lc = lcc.stitch()
-                lc = _flatten_or_normalize(lc)
-                return lc, mission, "auto"
+            lcc = _download_all(search)
         except Exception as e:
             save_line(LOGFILE, {"host": hostname, "mission": mission, "status": "download_error_auto", "error": repr(e)})
-            pass
+            continue
+        if lcc and len(lcc) > 0:
+            yield lcc, mission, "auto"
+
+def build_lightcurve(lcc, ephemerides=()):
+    # stitch karşılığı doğrudan dizilere (LightCurveArrays); sonraki aşamalar LightCurve kurmaz
+    with stage("stitch"):
+        lc = LightCurveArrays.from_collection(lcc)
+    with stage("flatten"):
+        return _flatten_or_normalize(lc, ephemerides)
+
+def search_download_lightcurve(hostname: str, ephemerides=()):
+    # ### FIX: daha çok log ve retry üst katmanda
+    for lcc, mission, author in _iter_downloads(hostname):
+        try:
+            return build_lightcurve(lcc, ephemerides), mission, author
+        except Exception as e:
+            if author == "auto":
+                save_line(LOGFILE, {"host": hostname, "mission": mission, "status": "download_error_auto", "error": repr(e)})
+            else:
+                save_line(LOGFILE, {"host": hostname, "mission": mission, "author": author, "status": "download_error", "error": repr(e)})
     return None, None, None
 
-def fold_plot_save(planet, host, P_day, t0_bjd, dur_hr, lc, mission, author):
+def host_cache_key(hostname: str, products=None, ephemerides=()):
+    key = (hostname, tuple(MISSION_PRIORITY), tuple(AUTHOR_PRIORITY), int(FLATTEN_WINDOW),
+           DETREND_METHOD, DETREND_WINDOW_DAYS, TRANSIT_MASK_PAD, input_hash(list(ephemerides))[:16])
+    # ürün listesi biliniyorsa anahtara girer: yeni sektör gelince önbellek eskimez
+    if products is not None:
+        key += (input_hash(products)[:16],)
+    return key
+
+def get_host_lightcurve(hostname: str, lcc_loader=None, products=None, ephemerides=()):
+    # aynı host'un gezegenleri arama/indirme/stitch/detrend'i paylaşır (maske tüm gezegenleri kapsar)
+    def compute():
+        if lcc_loader is not None:
+            lcc, mission, author = lcc_loader()
+            lc = build_lightcurve(lcc, ephemerides) if lcc is not None else None
+        else:
+            lc, mission, author = search_download_lightcurve(hostname, ephemerides)
+        if lc is None:
+            # ürün listesi kesin boşsa bellekte tutulur; aksi halde (indirme hatası olabilir) sonraki istek yeniden dener
+            return LC_NO_DATA if products is not None and not products.get("products") else None
+        return lc.to_entry({"host": hostname, "mission": mission, "author": author})
+
+    # lc_cache: önbellek okuma + aynı host'u hesaplayan başka iş parçacığını bekleme
+    with stage("lc_cache"):
+        entry = _lc_cache().get_or_compute(host_cache_key(hostname, products, ephemerides), compute)
+        if entry is None:
+            return None, None, None
+        return LightCurveArrays.from_entry(entry), entry["meta"]["mission"], entry["meta"]["author"]
+
+def download_products(hostname: str):
+    # sadece indirme (I/O aşaması); stitch/flatten compute aşamasında yapılır
+    return next(_iter_downloads(hostname), (None, None, None))
+
+def product_paths(lcc):
+    # indirilen dosyaların yolları; süreçler arası koleksiyon yerine bunlar taşınır
+    try:
+        paths = [lc.meta.get("FILENAME") for lc in lcc]
+    except Exception:
+        return None
+    if paths and all(p and os.path.exists(p) for p in paths):
+        return paths
+    return None
+
+def product_uris(lcc):
+    # FITS önbelleğinden gelen ürünlerin uri'leri (_download_all); hepsi yoksa None
+    uris = [lc.meta.get("DATAURI") for lc in lcc]
+    return uris if uris and all(uris) else None
+
+def read_products(paths, uris=None):
+    # önbellekteki ürünler fetch_read ile okunur: okuma boyunca LOCK_SH tutulur, fetch aşamasından sonra
+    # (kuyrukta beklerken) evict silmişse yeniden çekilir
+    with stage("read"):
+        if uris and USE_FITS_CACHE:
+            return lk.LightCurveCollection([_fits_cache().fetch_read(u, lk.read) for u in uris])
+        return lk.LightCurveCollection([lk.read(p) for p in paths])
+
+def _lc_arrays(lc):
+    if isinstance(lc, LightCurveArrays):
+        return lc.time, lc.flux, lc.flux_err     # kopyasız; kernel'ler float64'e kendileri çevirir
+    t = np.asarray(getattr(lc.time, "value", lc.time), dtype=np.float64)
+    f = np.asarray(getattr(lc.flux, "value", lc.flux), dtype=np.float64)
+    # ### FIX: flux_err güvenli çıkarım
+    try:
+        fe = getattr(lc, "flux_err", None)
+        fe = np.asarray(getattr(fe, "value", fe), dtype=np.float64) if fe is not None else None
+    except Exception:
+        fe = None
+    return t, f, fe
+
+def fold_plot_save(planet, host, P_day, t0_bjd, dur_hr, lc, mission, author, R_star=np.nan, M_star=np.nan,
+                   t0_info=None):
     base = sanitize(planet)
     png_path = os.path.join(PNG_DIR, f"{base}.png")
     csv_path = os.path.join(CSV_DIR, f"{base}.csv")
@@ -234,11 +619,10 @@ def fold_plot_save(planet, host, P_day, t0_bjd, dur_hr, lc, mission, author):
     offset = get_time_offset(lc)
     epoch_time = t0_bjd - offset
 
-    folded = lc.fold(period=P_day, epoch_time=epoch_time)
-    try:
-        folded_binned = folded.bin(time_bin_size=TIME_BIN)
-    except Exception:
-        folded_binned = folded
+    # fold + bin + metrikler tek geçişte, doğrudan dizilerle (lightkurve fold/bin ile aynı tanım)
+    with stage("fold_bin"):
+        t, f, fe = _lc_arrays(lc)
+        res = fold_bin_metrics(t, f, fe, P_day, epoch_time, bin_size=TIME_BIN, R_star=R_star, M_star=M_star)
 
     if dur_hr is not None and not (isinstance(dur_hr, float) and math.isnan(dur_hr)):
         dur_days = dur_hr / 24.0
@@ -246,45 +630,8 @@ def fold_plot_save(planet, host, P_day, t0_bjd, dur_hr, lc, mission, author):
     else:
         half_win = 0.15
 
-    plt.figure(figsize=(9, 4))
-    ax = plt.gca()
-    try:
-        folded.plot(ax=ax, marker=".", linestyle="none", alpha=0.3, label="Folded")
-    except Exception:
-        pass
-    try:
-        folded_binned.plot(ax=ax, marker=".", linestyle="none", label="Binned")
-    except Exception:
-        pass
-    plt.xlim(-half_win, half_win)
-    ttl = f"{planet} — Transit (mission={mission}, author={author})"
-    plt.title(ttl)
-    plt.xlabel("Faz (gün)")
-    plt.ylabel("Normalize Akı")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(png_path, dpi=150)
-    plt.close()
-
-    # ### FIX: flux_err güvenli çıkarım
-    try:
-        flux_err = getattr(folded, "flux_err", None)
-        if flux_err is not None:
-            try:
-                flux_err = flux_err.value
-            except Exception:
-                flux_err = np.asarray(flux_err)
-    except Exception:
-        flux_err = None
-
-    df = pd.DataFrame({
-        "phase_day": np.asarray(getattr(folded.time, "value", folded.time)),
-        "flux": np.asarray(getattr(folded.flux, "value", folded.flux)),
-        "flux_err": flux_err
-    })
-    df.to_csv(csv_path, index=False)
-
-    save_line(MANIFEST, {
+    title = f"{planet} — Transit (mission={mission}, author={author})"
+    manifest = {
         "planet": planet,
         "host": host,
         "period_day": P_day,
@@ -293,123 +640,225 @@ def fold_plot_save(planet, host, P_day, t0_bjd, dur_hr, lc, mission, author):
         "mission": mission,
         "author": author,
         "png": os.path.basename(png_path),
-        "csv": os.path.basename(csv_path)
-    })
-    # === Transit metrikleri hesapla ===
+        # ertelenmiş çizim için (render.spec_from_manifest)
+        "half_win": half_win,
+        "bin_size": TIME_BIN,
+        "title": title,
+    }
+    if t0_info:
+        # t0 ışık eğrisinden arandı (search_epoch): belirsizlik ve SNR
+        manifest.update(t0_info)
+    if OUTPUT_FORMAT in ("binary", "both"):
+        with stage("arrays"):
+            manifest["arrays"] = _outputs().write_arrays(base, res["phase"], res["flux"], res["flux_err"])
+    if OUTPUT_FORMAT in ("csv", "both"):
+        with stage("csv"):
+            df = pd.DataFrame({
+                "phase_day": res["phase"],
+                "flux": res["flux"],
+                "flux_err": res["flux_err"]
+            })
+            df.to_csv(csv_path, index=False)
+            manifest["csv"] = os.path.basename(csv_path)
+            save_line(MANIFEST, manifest)
+
+    # veri dosyalarından sonra: PNG'nin veriden yeni olması render.is_stale için "güncel" demek
+    if PLOT_MODE == "inline":
+        with stage("plot"):
+            render.fold_template().render(png_path, res["phase"], res["flux"], res["bin_phase"], res["bin_flux"],
+                                          half_win, title, dpi=PLOT_DPI)
+    # === Transit metrikleri ===
+    metrics = {}
     try:
-        flux_vals = np.asarray(getattr(folded.flux, "value", folded.flux))
-        err_vals = np.asarray(flux_err) if flux_err is not None else None
-
-        depth = 1.0 - np.nanmin(flux_vals)     # Transit derinliği
-        avg_flux = np.nanmean(flux_vals)       # Ortalama flux
-        flux_var = np.nanvar(flux_vals)        # Varyans
-        snr = depth / np.nanmedian(err_vals) if err_vals is not None else None
-
-        # --- Yeni Hesaplamalar ---
-        R_sun = 6.957e8        # m
-        R_earth = 6.371e6      # m
-        M_sun = 1.989e30       # kg
-        AU = 1.496e11          # m
-        G = 6.67430e-11        # SI
-
-        # Yıldız parametrelerini CSV'den oku (NaN olabilir)
-        R_star = df.loc[df["pl_name"] == planet, "st_rad"].values[0] if "st_rad" in df.columns else np.nan
-        M_star = df.loc[df["pl_name"] == planet, "st_mass"].values[0] if "st_mass" in df.columns else np.nan
-
-        Rp_Rearth = None
-        a_AU = None
-        if not np.isnan(R_star):
-            Rp_Rearth = (R_star * R_sun / R_earth) * np.sqrt(depth)
-        if not np.isnan(M_star) and P_day is not None:
-            P_sec = P_day * 86400
-            a_m = (G * M_star * M_sun * (P_sec**2) / (4 * np.pi**2))**(1/3)
-            a_AU = a_m / AU
-
-        # --- Metrics sözlüğü ---
-        metrics = {
-            "planet": planet,
-            "host": host,
-            "period_day": P_day,
-            "duration_hr": dur_hr,
-            "depth": depth,
-            "snr": snr,
-            "avg_flux": avg_flux,
-            "flux_var": flux_var,
-            "Rp_Rearth": Rp_Rearth,
-            "a_AU": a_AU
-        }
-
-        # Metrics CSV'sine ekle
-        metrics_file = os.path.join(OUTPUT_DIR, "metrics.csv")
-        newfile = not os.path.exists(metrics_file)
-        with _LOG_LOCK:
-            with open(metrics_file, "a", newline='', encoding="utf-8") as mf:
-                writer = csv.DictWriter(mf, fieldnames=list(metrics.keys()))
-                if newfile:
-                    writer.writeheader()
-                writer.writerow(metrics)
+        with stage("metrics"):
+            metrics = {
+                "planet": planet,
+                "host": host,
+                "period_day": P_day,
+                "duration_hr": dur_hr,
+            }
+            metrics.update(res["metrics"])
+            if FIT_TRANSIT:
+                win = 3.0 * dur_hr / 24.0 if dur_hr is not None and np.isfinite(dur_hr) else None
+                with stage("transit_fit"):
+                    metrics.update(fit_folded(res["phase"], res["flux"], res["flux_err"], P_day,
+                                              res["bin_phase"], res["bin_flux"], res["bin_err"],
+                                              depth=res["metrics"]["depth"], dur_hr=dur_hr, window=win,
+                                              u=FIT_LIMB_DARK))
+            if MEASURE_TTV:
+                with stage("ttv"):
+                    metrics.update(_measure_ttv(base, t, f, fe, P_day, epoch_time, dur_hr, offset))
+
+            # Metrics CSV'sine ekle
+            if OUTPUT_FORMAT in ("csv", "both"):
+                save_row(METRICS_CSV, metrics, METRICS_COLUMNS)
 
     except Exception as e:
         save_line(LOGFILE, {"planet": planet, "status": "metrics_error", "error": repr(e)})
+
+    # ikili çıktı: manifest + metrikler hedef başına tek satır
+    if OUTPUT_FORMAT in ("binary", "both"):
+        with stage("arrays"):
+            _outputs().put(planet, {**manifest, **metrics})
+
+def _measure_ttv(base, t, f, fe, P_day, epoch_time, dur_hr, offset):
+    dur = dur_hr / 24.0 if dur_hr is not None and np.isfinite(dur_hr) and dur_hr > 0 else detrend.default_duration(P_day)
+    res = ttv.measure_ttv(t, f, fe, P_day, epoch_time, dur)
+    if res is None:
+        return dict.fromkeys(ttv.SUMMARY_COLUMNS, None) | {"ttv_n_transits": 0}
+    path = os.path.join(TTV_DIR, f"{base}.csv")
+    tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    ttv.oc_table(res, time_offset=offset).to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return ttv.summary(res, time_offset=offset)
+
+def _output_files(base):
+    out = {"png": f"{base}.png"}
+    if OUTPUT_FORMAT in ("csv", "both"):
+        out["csv"] = f"{base}.csv"
+    if OUTPUT_FORMAT in ("binary", "both"):
+        out["arrays"] = f"{base}.npy"
+    if MEASURE_TTV:
+        out["ttv"] = f"{base}.csv"
+    return out
+
 def already_done(planet: str) -> bool:
-    base = sanitize(planet)
-    return (os.path.exists(os.path.join(PNG_DIR, f"{base}.png")) and
-            os.path.exists(os.path.join(CSV_DIR, f"{base}.csv")))
+    # PNG yalnızca inline modda hesabın çıktısı; diğer modlarda eksik PNG render aşamasının işi
+    files = _output_files(sanitize(planet))
+    dirs = {"png": PNG_DIR, "csv": CSV_DIR, "arrays": _arrays_dir(), "ttv": TTV_DIR}
+    return all(os.path.exists(os.path.join(dirs[k], name)) for k, name in files.items()
+               if k != "png" or PLOT_MODE == "inline")
 
-def process_one(row_dict):
+def _target_names(row_dict):
     planet = str(row_dict.get("pl_name", "")).strip()
     host = row_dict.get("hostname") if row_dict.get("hostname") is not None else planet
     if host is None:
         host = planet
-    host = str(host).strip()
-
-    if already_done(planet):
-        save_line(LOGFILE, {"planet": planet, "status": "skip_exists"})
-        return planet, "skip_exists"
+    return planet, str(host).strip()
 
-    P_day = safe_value(row_dict.get("pl_orbper"), u.day)
-    t0_bjd = safe_value(row_dict.get("pl_tranmid"), u.day)
-    dur_hr = safe_value(row_dict.get("pl_trandur"), u.hour)
+def _resolve_params(planet, row_dict):
+    P_day = safe_value(row_dict.get("pl_orbper"), "day")
+    t0_bjd = safe_value(row_dict.get("pl_tranmid"), "day")
+    dur_hr = safe_value(row_dict.get("pl_trandur"), "hour")
 
-    # 1) Eğer eksik parametre varsa önce NASA'dan tekrar dene (satır bazlı sorgu)
+    # 1) Eğer eksik parametre varsa yerel katalogdan (yoksa NASA'dan) tamamla
     if P_day is None or t0_bjd is None:
         try:
-            esc = planet.replace("'", "''")
-            tbl = NasaExoplanetArchive.query_criteria(
-                table="pscomppars",
-                select="pl_name,hostname,pl_orbper,pl_tranmid,pl_trandur",
-                where=f"pl_name = '{esc}'"
-            )
-            if len(tbl) > 0:
-                r = tbl[0]
+            with stage("catalog"):
+                r = lookup_params(planet)
+            if r is not None:
                 if P_day is None:
-                    P_day = safe_value(r.get("pl_orbper"), u.day)
+                    P_day = safe_value(r.get("pl_orbper"), "day")
                 if t0_bjd is None:
-                    t0_bjd = safe_value(r.get("pl_tranmid"), u.day)
+                    t0_bjd = safe_value(r.get("pl_tranmid"), "day")
                 if dur_hr is None:
-                    dur_hr = safe_value(r.get("pl_trandur"), u.hour)
+                    dur_hr = safe_value(r.get("pl_trandur"), "hour")
         except Exception as e:
             save_line(LOGFILE, {"planet": planet, "status": "fetch_params_error", "error": repr(e)})
+    return P_day, t0_bjd, dur_hr
+
+def pipeline_settings():
+    return {"PIPELINE_VERSION": PIPELINE_VERSION, "FLATTEN_WINDOW": FLATTEN_WINDOW, "TIME_BIN": TIME_BIN,
+            "DETREND_METHOD": DETREND_METHOD, "DETREND_WINDOW_DAYS": DETREND_WINDOW_DAYS,
+            "TRANSIT_MASK_PAD": TRANSIT_MASK_PAD, "T0_MIN_SNR": T0_MIN_SNR,
+            "MEASURE_TTV": MEASURE_TTV,
+            "MISSION_PRIORITY": list(MISSION_PRIORITY), "AUTHOR_PRIORITY": list(AUTHOR_PRIORITY),
+            "FIT_TRANSIT": FIT_TRANSIT, "FIT_LIMB_DARK": list(FIT_LIMB_DARK)}
 
-    # 2) Eğer hâlâ pl_tranmid yok ama periyot varsa: lightkurve'den LC indirip kaba bir t0 tahmini dene
+def target_inputs(planet, host, P_day, t0_bjd, dur_hr, ephemerides=()):
+    try:
+        products = list_products(host)
+    except Exception as e:
+        save_line(LOGFILE, {"planet": planet, "host": host, "status": "list_products_error", "error": repr(e)})
+        products = None
+    return {"catalog": {"pl_orbper": P_day, "pl_tranmid": t0_bjd, "pl_trandur": dur_hr},
+            "data": products,
+            # komşu gezegenin efemerisi değişirse maske (ve detrend) değişir
+            "mask": [list(e) for e in ephemerides],
+            "settings": pipeline_settings()}
+
+def _incremental_gate(planet, host, P_day, t0_bjd, dur_hr, ephemerides=()):
+    """(inputs, skip_sonucu) döndürür; skip_sonucu None değilse hedef güncel."""
+    with stage("incremental"):
+        inputs = target_inputs(planet, host, P_day, t0_bjd, dur_hr, ephemerides)
+        run, reason, changed = _results().check(planet, inputs, outputs_exist=already_done(planet))
+    with _LOG_LOCK:
+        _RECOMPUTE_REASONS[reason] += 1
+    if not run:
+        # reason "no_data": önceki koşuda ürün yoktu, liste hâlâ aynı
+        save_line(LOGFILE, {"planet": planet, "status": "skip_unchanged", "reason": reason})
+        return inputs, (planet, "skip_unchanged")
+    save_line(LOGFILE, {"planet": planet, "status": "recompute", "reason": reason, "changed": changed})
+    return inputs, None
+
+def _record_result(planet, inputs):
+    if inputs is None:
+        return
+    _results().commit(planet, inputs, _output_files(sanitize(planet)))
+
+def _no_data(planet, inputs):
+    # ürün listesi kesin boşsa sonuç girdi özetiyle kaydedilir: liste değişene kadar yeniden denenmez.
+    # Ürün varken indirme/okuma başarısızsa (geçici olabilir) kaydedilmez.
+    save_line(LOGFILE, {"planet": planet, "status": "no_data"})
+    data = (inputs or {}).get("data")
+    if data is not None and not data.get("products"):
+        _results().commit(planet, inputs, NO_DATA)
+    return planet, "no_data"
+
+def _estimate_t0(planet, lc, mission, author, P_day, dur_hr=None):
+    """(t0_bjd, t0_info) ya da bulunamazsa (None, None)."""
+    with stage("t0_estimate"):
+        return _estimate_t0_from_lc(planet, lc, mission, author, P_day, dur_hr)
+
+def _estimate_t0_from_lc(planet, lc, mission, author, P_day, dur_hr=None):
+    try:
+        # host LC'si zaten detrend edilmiş; katlanıp eşleşmiş filtre tüm epoklarda tek seferde
+        t, f, fe = _lc_arrays(lc)
+        dur = dur_hr / 24.0 if dur_hr is not None and np.isfinite(dur_hr) and dur_hr > 0 else None
+        res = search_epoch(t, f, fe, P_day, dur)
+        if res is None or res["snr"] < T0_MIN_SNR:
+            save_line(LOGFILE, {"planet": planet, "status": "estimate_t0_low_snr",
+                                "snr": res["snr"] if res else None, "mission": mission, "author": author})
+            return None, None
+        t0_bjd = res["t0"] + float(get_time_offset(lc))
+        info = {"t0_source": "lc_search", "t0_err_day": res["t0_err"], "t0_snr": res["snr"],
+                "t0_search_duration_hr": res["duration"] * 24.0, "t0_n_transits": res["n_transits"]}
+        save_line(LOGFILE, {"planet": planet, "status": "estimated_t0_from_lc", "t0_bjd": t0_bjd, **info,
+                            "mission": mission, "author": author})
+        return t0_bjd, info
+    except Exception as e:
+        save_line(LOGFILE, {"planet": planet, "status": "estimate_t0_failed", "error": repr(e)})
+        return None, None
+
+def process_one(row_dict):
+    with target_timer(_target_names(row_dict)[0], "target") as tt:
+        planet, tt.status = _process_one(row_dict)
+        return planet, tt.status
+
+def _process_one(row_dict):
+    planet, host = _target_names(row_dict)
+
+    if not INCREMENTAL and already_done(planet):
+        save_line(LOGFILE, {"planet": planet, "status": "skip_exists"})
+        return planet, "skip_exists"
+
+    P_day, t0_bjd, dur_hr = _resolve_params(planet, row_dict)
+    eph = host_ephemerides(host, P_day, t0_bjd, dur_hr)
+
+    inputs = products = None
+    if INCREMENTAL:
+        inputs, skipped = _incremental_gate(planet, host, P_day, t0_bjd, dur_hr, eph)
+        if skipped is not None:
+            return skipped
+        products = inputs["data"]
+
+    # 2) Eğer hâlâ pl_tranmid yok ama periyot varsa: host LC'sinde t0 ara (LC aşağıda yeniden kullanılır)
+    lc = mission = author = t0_info = None
     if P_day is not None and t0_bjd is None:
         try:
-            lc_try, mission_try, author_try = search_download_lightcurve(host)
-            if lc_try is not None:
-                try:
-                    lc_proc = _flatten_or_normalize(lc_try)
-                    t_arr = np.asarray(getattr(lc_proc.time, "value", lc_proc.time))
-                    f_arr = np.asarray(getattr(lc_proc.flux, "value", lc_proc.flux))
-                    import pandas as _pd
-                    s = _pd.Series(f_arr)
-                    win = max(3, int(len(s) * 0.01))
-                    sm = s.rolling(window=win, center=True, min_periods=1).median().values
-                    idx = int(np.argmin(sm))
-                    offset = get_time_offset(lc_proc)
-                    t0_bjd = float(t_arr[idx]) + float(offset)
-                    save_line(LOGFILE, {"planet": planet, "status": "estimated_t0_from_lc", "t0_bjd": t0_bjd, "mission": mission_try, "author": author_try})
-                except Exception as e:
-                    save_line(LOGFILE, {"planet": planet, "status": "estimate_t0_failed", "error": repr(e)})
+            lc, mission, author = get_host_lightcurve(host, products=products, ephemerides=eph)
+            if lc is not None:
+                t0_bjd, t0_info = _estimate_t0(planet, lc, mission, author, P_day, dur_hr)
         except Exception as e:
             save_line(LOGFILE, {"planet": planet, "status": "lc_fetch_failed_for_t0", "error": repr(e)})
 
@@ -420,50 +869,624 @@ def process_one(row_dict):
     last_err = None
     for attempt in range(RETRY):
         try:
-            lc, mission, author = search_download_lightcurve(host)
             if lc is None:
-                save_line(LOGFILE, {"planet": planet, "status": "no_data"})
-                return planet, "no_data"
+                lc, mission, author = get_host_lightcurve(host, products=products, ephemerides=eph)
+            if lc is None:
+                return _no_data(planet, inputs)
 
-            fold_plot_save(planet, host, P_day, t0_bjd, dur_hr, lc, mission, author)
+            fold_plot_save(planet, host, P_day, t0_bjd, dur_hr, lc, mission, author, t0_info=t0_info)
+            _record_result(planet, inputs)
             save_line(LOGFILE, {"planet": planet, "status": "ok", "mission": mission, "author": author})
             return planet, "ok"
         except Exception as e:
             last_err = repr(e)
-            time.sleep(RETRY_BASE_SLEEP * (2 ** attempt))
+            with stage("retry_sleep"):
+                time.sleep(RETRY_BASE_SLEEP * (2 ** attempt))
 
     save_line(LOGFILE, {"planet": planet, "status": "error", "error": last_err})
     return planet, "error"
 
+# === process modu: fetch (ana süreç, I/O thread'leri) + compute (süreç havuzu) ===
+def _prepare_job(row_dict):
+    # indirme dışındaki fetch adımları: atlama kontrolleri, parametreler, artımlı kontrol
+    planet, host = _target_names(row_dict)
+    try:
+        if not INCREMENTAL and already_done(planet):
+            save_line(LOGFILE, {"planet": planet, "status": "skip_exists"})
+            return None, (planet, "skip_exists")
+
+        P_day, t0_bjd, dur_hr = _resolve_params(planet, row_dict)
+        if P_day is None:
+            save_line(LOGFILE, {"planet": planet, "status": "skip_missing_params"})
+            return None, (planet, "skip_missing_params")
+
+        eph = host_ephemerides(host, P_day, t0_bjd, dur_hr)
+        inputs = None
+        if INCREMENTAL:
+            inputs, skipped = _incremental_gate(planet, host, P_day, t0_bjd, dur_hr, eph)
+            if skipped is not None:
+                return None, skipped
+
+        job = {"planet": planet, "host": host, "P_day": P_day, "t0_bjd": t0_bjd, "dur_hr": dur_hr,
+               "paths": None, "uris": None, "lcc": None, "inputs": inputs, "ephemerides": eph,
+               "products": inputs["data"] if inputs else None}
+        # host önbellekte varsa indirme atlanır
+        job["cached"] = _lc_cache().has(host_cache_key(host, job["products"], eph))
+        return job, None
+    except Exception as e:
+        save_line(LOGFILE, {"planet": planet, "status": "error", "error": repr(e)})
+        return None, (planet, "error")
+
+def fetch_stage(row_dict):
+    with target_timer(_target_names(row_dict)[0], "fetch") as tt:
+        job, result = _fetch_stage(row_dict)
+        tt.status = result[1] if result else "fetched"
+        return job, result
+
+def _fetch_stage(row_dict):
+    job, result = _prepare_job(row_dict)
+    if job is None or job["cached"]:
+        return job, result
+    planet, host = job["planet"], job["host"]
+    try:
+        lcc, mission, author = download_products(host)
+        if lcc is None:
+            return None, _no_data(planet, job["inputs"])
 
-def fetch_table():
+        paths = product_paths(lcc)
+        job.update({"mission": mission, "author": author, "paths": paths,
+                    "uris": product_uris(lcc) if paths else None, "lcc": None if paths else lcc})
+        return job, None
+    except Exception as e:
+        save_line(LOGFILE, {"planet": planet, "status": "error", "error": repr(e)})
+        return None, (planet, "error")
+
+def compute_stage(job):
+    with target_timer(job["planet"], "compute") as tt:
+        planet, tt.status = _compute_stage(job)
+        return planet, tt.status
+
+def _compute_stage(job):
+    planet = job["planet"]
+    try:
+        def loader():
+            if job["lcc"] is not None:
+                return job["lcc"], job.get("mission"), job.get("author")
+            if job["paths"]:
+                return read_products(job["paths"], job.get("uris")), job.get("mission"), job.get("author")
+            return download_products(job["host"])
+
+        lc, mission, author = get_host_lightcurve(job["host"], lcc_loader=loader, products=job["products"],
+                                                  ephemerides=job["ephemerides"])
+        if lc is None:
+            return _no_data(planet, job["inputs"])
+        t0_bjd, t0_info = job["t0_bjd"], None
+        if t0_bjd is None:
+            t0_bjd, t0_info = _estimate_t0(planet, lc, mission, author, job["P_day"], job["dur_hr"])
+        if t0_bjd is None:
+            save_line(LOGFILE, {"planet": planet, "status": "skip_missing_params"})
+            return planet, "skip_missing_params"
+
+        fold_plot_save(planet, job["host"], job["P_day"], t0_bjd, job["dur_hr"], lc, mission, author,
+                       t0_info=t0_info)
+        _record_result(planet, job["inputs"])
+        save_line(LOGFILE, {"planet": planet, "status": "ok", "mission": mission, "author": author})
+        return planet, "ok"
+    except Exception as e:
+        save_line(LOGFILE, {"planet": planet, "status": "error", "error": repr(e)})
+        return planet, "error"
+
+# === async modu: arama/indirme FetchScheduler üzerinden, job'lar kuyrukla süreç havuzuna ===
+async def download_products_async(sched, hostname: str):
+    # _iter_downloads ile aynı öncelik; yeniden denemeler istek bazında, hedef bazında değil
+    for mission in MISSION_PRIORITY:
+        try:
+            search = await sched.call(("search", hostname, mission), mission, _search_lightcurve, hostname, mission)
+        except Exception as e:
+            save_line(LOGFILE, {"host": hostname, "mission": mission, "status": "search_error", "error": repr(e)})
+            continue
+        if len(search) == 0:
+            continue
+        candidates = [(a, search[search.author == a]) for a in AUTHOR_PRIORITY] + [("auto", search)]
+        for author, sub in candidates:
+            if len(sub) == 0:
+                continue
+            status = "download_error_auto" if author == "auto" else "download_error"
+            try:
+                if USE_FITS_CACHE and "dataURI" in sub.table.colnames:
+                    uris = [str(uri) for uri in sub.table["dataURI"]]
+                    paths = await asyncio.gather(*[
+                        sched.call(("product", uri), mission, _fits_cache().fetch, uri) for uri in uris])
+                    # compute aşaması uri'lerden okur (read_products -> fetch_read)
+                    return list(paths), uris, None, mission, author
+                lcc = await sched.call(("download_all", hostname, mission, author), mission, _download_all, sub)
+                if lcc and len(lcc) > 0:
+                    paths = product_paths(lcc)
+                    return paths, product_uris(lcc) if paths else None, None if paths else lcc, mission, author
+            except Exception as e:
+                save_line(LOGFILE, {"host": hostname, "mission": mission, "author": author, "status": status, "error": repr(e)})
+    return None, None, None, None, None
+
+async def fetch_stage_async(sched, row_dict):
+    # zamanlayıcı görev (task) bağlamında; executor'da çalışan çağrılar ayrı aşama olarak ölçülür
+    with target_timer(_target_names(row_dict)[0], "fetch") as tt:
+        job, result = await _fetch_stage_async(sched, row_dict)
+        tt.status = result[1] if result else "fetched"
+        return job, result
+
+async def _fetch_stage_async(sched, row_dict):
+    loop = asyncio.get_running_loop()
+    planet, host = _target_names(row_dict)
+    # ürün listesi/artımlı kontrol aramayı bellekten okusun diye arama önce zamanlayıcıdan geçer
+    # (liste kayıtlı ve güncelse arama yok: güncel hedef arşive hiç gitmez)
+    cached = INCREMENTAL and await loop.run_in_executor(sched.executor, cached_products, host) is not None
+    for mission in () if cached else MISSION_PRIORITY:
+        try:
+            with stage("search"):
+                search = await sched.call(("search", host, mission), mission, _search_lightcurve, host, mission)
+        except Exception:
+            break
+        if len(search) > 0:
+            break
+    with stage("prepare"):
+        job, result = await loop.run_in_executor(sched.executor, _prepare_job, row_dict)
+    if job is None or job["cached"]:
+        return job, result
+    with stage("download"):
+        paths, uris, lcc, mission, author = await download_products_async(sched, host)
+    add_bytes(_files_size(paths) if paths else _files_size(product_paths(lcc)) if lcc else 0)
+    if paths is None and lcc is None:
+        return None, _no_data(planet, job["inputs"])
+    job.update({"mission": mission, "author": author, "paths": paths, "uris": uris, "lcc": lcc})
+    return job, None
+
+def _log_retry(key, mission, attempt, delay, err):
+    save_line(LOGFILE, {"status": "fetch_retry", "request": list(key), "mission": mission,
+                        "attempt": attempt + 1, "sleep": round(delay, 2), "error": repr(err)})
+
+def _worker_state():
+    # compute worker'ları (forkserver/spawn) bu modülü yeniden yükler; main()/çağıranın değiştirdiği
+    # ayarlar (büyük harfli, pickle edilebilir düz değerler) taşınır, depolar worker'da yeniden kurulur
+    plain = (str, int, float, bool, tuple, list, dict, type(None))
+    settings = {k: v for k, v in globals().items() if k.isupper() and isinstance(v, plain)}
+    return __name__, os.path.abspath(__file__), settings
+
+def run_rows(rows):
+    if EXEC_MODE == "async":
+        sched = FetchScheduler(limits=MISSION_CONCURRENCY, default_limit=IO_WORKERS,
+                               rate=ARCHIVE_RATE, burst=ARCHIVE_BURST, retries=RETRY,
+                               base_sleep=RETRY_BASE_SLEEP, on_retry=_log_retry)
+        try:
+            yield from engine.run_async_staged(rows, lambda r: fetch_stage_async(sched, r), compute_stage,
+                                               compute_workers=COMPUTE_WORKERS,
+                                               max_inflight=MAX_INFLIGHT,
+                                               worker_state=_worker_state())
+        finally:
+            sched.close()
+        return
+    if EXEC_MODE == "process":
+        yield from engine.run_staged(rows, fetch_stage, compute_stage,
+                                     io_workers=IO_WORKERS,
+                                     compute_workers=COMPUTE_WORKERS,
+                                     max_inflight=MAX_INFLIGHT,
+                                     worker_state=_worker_state())
+        return
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        futures = [ex.submit(process_one, r) for r in rows]
+        for f in as_completed(futures):
+            yield f.result()
+
+
+def fetch_table(max_targets=MAX_TARGETS):
+    idx = get_catalog()
+    if idx is not None:
+        rows = [{k: r.get(k) for k in ["pl_name", "hostname", "pl_orbper", "pl_tranmid", "pl_trandur"]}
+                for r in idx.records()
+                if r.get("pl_tranmid") is not None and r.get("pl_orbper") is not None]
+        return rows[:max_targets] if max_targets else rows
     # ### NOT: TRUBA compute node'unda internet yoksa bu çağrı time-out verir
-    tbl = NasaExoplanetArchive.query_criteria(
+    tbl = _archive().query_criteria(
         table="pscomppars",
         select="pl_name,hostname,pl_orbper,pl_tranmid,pl_trandur",
         where="pl_tranmid IS NOT NULL AND pl_orbper IS NOT NULL"
     )
-    if MAX_TARGETS:
-        tbl = tbl[:MAX_TARGETS]
+    if max_targets:
+        tbl = tbl[:max_targets]
     rows = []
     for r in tbl:
         rows.append({k: r[k] for k in tbl.colnames})
     return rows
 
-def main():
+def _manifest_records():
+    # ikili çıktıda manifest tabloda, CSV modunda manifest.jsonl'da
+    return _outputs().records() if OUTPUT_FORMAT != "csv" else MANIFEST
+
+def _render_pending_specs():
+    return render.pending(_manifest_records(), CSV_DIR, PNG_DIR, PLOT_DPI, arrays_dir=_arrays_dir())
+
+def render_pending(workers=None):
+    """Manifest'teki eksik ya da verisinden eski PNG'leri üretir -> (üretilen, hata)."""
+    results = render.render_all(_render_pending_specs(), workers=workers)
+    failed = 0
+    for planet, png, err in results:
+        if err is not None:
+            failed += 1
+            save_line(LOGFILE, {"planet": planet, "status": "render_error", "error": err})
+    return len(results) - failed, failed
+
+def _on_rendered(planet, png, err):
+    if err is not None:
+        save_line(LOGFILE, {"planet": planet, "status": "render_error", "error": err})
+
+def _submit_new_plots(pool, tail):
+    # manifest'e son bakıştan beri eklenen hedefler render havuzuna
+    for rec in tail.read():
+        spec = render.spec_from_manifest(rec, CSV_DIR, PNG_DIR, PLOT_DPI, _arrays_dir())
+        if spec is not None:
+            pool.submit(spec)
+
+def load_rows(sharded=False):
+    # parçalı çalıştırmada tüm tablo kuyruğa gider (dilimleme yok)
     print(" Exoplanet Archive sorgulanıyor...")
     if INPUT_FILE and os.path.exists(INPUT_FILE):
         print(f" Local input file kullanılıyor: {INPUT_FILE}")
-        rows = rows_from_local_file(INPUT_FILE, name_col=0, header=True, max_targets=MAX_TARGETS)
+        if sharded:
+            return rows_from_local_file(INPUT_FILE, name_col=0, header=True, max_targets=None, start=0)
+        return rows_from_local_file(INPUT_FILE, name_col=0, header=True, max_targets=MAX_TARGETS)
+    return fetch_table(max_targets=None if sharded else MAX_TARGETS)
+
+def use_shard_outputs(shard):
+    """Manifest, log ve metrikler parçaya özel klasöre (ortak dosyaya çok düğüm yazmasın)."""
+    global MANIFEST, LOGFILE, METRICS_CSV, OUTPUT_STORE_DIR, _OUTPUTS
+    d = workqueue.shard_dir(OUTPUT_DIR, shard)
+    os.makedirs(d, exist_ok=True)
+    MANIFEST = os.path.join(d, "manifest.jsonl")
+    LOGFILE = os.path.join(d, "run_log.jsonl")
+    METRICS_CSV = os.path.join(d, "metrics.csv")
+    OUTPUT_STORE_DIR = d
+    _OUTPUTS = None
+
+def _claimed_units(queue, shard, owner):
+    # worker boşaldıkça bir birim: kendi parçası pahalıdan ucuza, bitince başka parçadan çalma
+    while True:
+        units = queue.claim(shard, owner, max_rows=1)
+        if not units:
+            return
+        yield from units
+
+def run_queue(queue, shard, owner):
+    """Kuyruktan host gruplarını worker boşaldıkça alıp işler; run_rows gibi (planet, status) üretir."""
+    yield from run_units(_claimed_units(queue, shard, owner),
+                         on_unit_done=lambda unit, counts: queue.finish([unit], owner, dict(counts)))
+
+# === zamanlama: host grupları tahmini maliyetle pahalıdan ucuza ===
+def _n_workers():
+    return MAX_WORKERS if EXEC_MODE == "thread" else COMPUTE_WORKERS
+
+def _history_costs():
+    """Önceki koşularda gezegen başına ölçülmüş süre (en son ölçüm; atlanan hedefler sayılmaz)."""
+    last = {}
+    for path in dict.fromkeys([os.path.join(OUTPUT_DIR, "run_log.jsonl"), LOGFILE]):
+        for rec in load_records(path):
+            if str(rec.get("target_status") or "").startswith("skip"):
+                continue
+            phases = last.setdefault(rec["planet"], {})
+            prev = phases.get(rec.get("phase"))
+            if prev is None or rec.get("t_start", 0) >= prev[0]:
+                phases[rec.get("phase")] = (rec.get("t_start", 0), float(rec.get("wall_s") or 0.0))
+    out = {}
+    for planet, phases in last.items():
+        # thread modu tek "target" kaydı, process/async fetch + compute; hangisi yeniyse
+        staged = [phases[k] for k in ("fetch", "compute") if k in phases]
+        target = phases.get("target")
+        if target is not None and (not staged or target[0] >= max(t for t, _ in staged)):
+            out[planet] = target[1]
+        elif staged:
+            out[planet] = sum(w for _, w in staged)
+    return out
+
+def _cost_model(groups):
+    """Önceki ölçümler + sonuç deposundaki ürün listeleri + lc_cache -> scheduler.CostModel (ağ yok)."""
+    planets = {host: [_target_names(r)[0] for r in rs] for host, rs in groups}
+    prev = _results().inputs_many([p for ps in planets.values() for p in ps])
+    products, cached = {}, set()
+    for host, names in planets.items():
+        inputs = next((prev[p] for p in names if p in prev and prev[p].get("data")), None)
+        if inputs is None:
+            continue
+        products[host] = inputs["data"]
+        eph = [tuple(e) for e in inputs.get("mask") or []]
+        if _lc_cache().has(host_cache_key(host, inputs["data"], eph)):
+            cached.add(host)
+    return scheduler.CostModel(_history_costs(), products, cached)
+
+def plan_rows(rows):
+    """[(host, tahmini_s, [satır, ...]), ...] pahalıdan ucuza; plan kaydı log'a yazılır."""
+    model = None
+    try:
+        model = _cost_model(workqueue.group_by_host(rows))
+    except Exception as e:
+        save_line(LOGFILE, {"status": "schedule_error", "error": repr(e)})
+    units = scheduler.plan(rows, model)
+    costs = [c for _, c, _ in units]
+    workers = _n_workers()
+    rec = {"status": "schedule", "units": len(units), "targets": len(rows), "workers": workers,
+           "est_work_s": round(sum(costs), 1), "est_makespan_s": round(scheduler.makespan(costs, workers), 1),
+           "lower_bound_s": round(scheduler.lower_bound(costs, workers), 1)}
+    if model is not None:
+        rec.update(history=len(model.history), products=len(model.products), cached=len(model.cached),
+                   scale=round(model.scale, 3))
+    save_line(LOGFILE, rec)
+    print(f" Zamanlama: {rec['units']} host | tahmini iş {rec['est_work_s']:.1f} s | "
+          f"{workers} worker ile ~{rec['est_makespan_s']:.1f} s (alt sınır {rec['lower_bound_s']:.1f} s)")
+    return units
+
+def _run_unit(rows):
+    # aynı host'un gezegenleri sırayla: arama/indirme/detrend ilkinde, sonrakiler lc_cache'ten
+    return [process_one(r) for r in rows]
+
+def run_units(units, on_unit_done=None):
+    """
+    units: (birim, [satır, ...]) yineleyicisi; verilen sırada (plan: pahalıdan ucuza) ve tembel okunur,
+    aynı anda sınırlı sayıda birim alınır (bellek; kuyrukta diğer düğümlere iş kalsın). Birimin tüm
+    hedefleri bitince on_unit_done(birim, Counter(durum)). run_rows gibi (planet, status) üretir.
+    """
+    units = iter(units)
+    if EXEC_MODE == "thread":
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+            inflight = {}
+
+            def admit():
+                # havuz boşalınca sıradaki birim hazır beklesin; fazlası alınmaz
+                while len(inflight) < 2 * MAX_WORKERS:
+                    item = next(units, None)
+                    if item is None:
+                        return
+                    inflight[ex.submit(_run_unit, item[1])] = item[0]
+
+            admit()
+            while inflight:
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                for f in done:
+                    unit = inflight.pop(f)
+                    results = f.result()
+                    if on_unit_done is not None:
+                        on_unit_done(unit, Counter(status for _, status in results))
+                    yield from results
+                admit()
+        return
+
+    # process/async: motor satırları sırayla ve sınırlı sayıda çeker; sonuç gezegen adıyla birimine bağlanır
+    left, counts, unit_of = {}, {}, {}
+
+    def feed():
+        for unit, rs in units:
+            left[unit] = len(rs)
+            counts[unit] = Counter()
+            for r in rs:
+                unit_of.setdefault(_target_names(r)[0], deque()).append(unit)
+                yield r
+
+    for planet, status in run_rows(feed()):
+        pending = unit_of.get(planet)
+        unit = pending.popleft() if pending else None
+        if unit is not None:
+            counts[unit][status] += 1
+            left[unit] -= 1
+            if left[unit] == 0:
+                del left[unit]
+                c = counts.pop(unit)
+                if on_unit_done is not None:
+                    on_unit_done(unit, c)
+        yield planet, status
+
+def open_checkpoint(rows, units=None):
+    """
+    CHECKPOINT_DB kuyruğu (tek parça). Aynı hedef listesiyle önceki koşu yarıda kaldıysa bitmiş
+    birimler atlanır, yarıda kalanlar yeniden sıraya girer; liste değiştiyse kuyruk yeniden kurulur.
+    units: plan_rows çıktısı; None ise (SCHEDULE="input") host boyutuna göre, parçalı kuyruktaki gibi.
+    """
+    if units is None:
+        units = [(host, float(len(rs)), rs) for host, rs in workqueue.group_by_host(rows)]
+    key = input_hash(sorted(_target_names(r)[0] for r in rows))[:16]
+    queue = workqueue.WorkQueue(CHECKPOINT_DB, lease_s=SHARD_LEASE_S)
+    if queue.get_meta("input") not in (None, key):
+        remove_checkpoint()
+        queue = workqueue.WorkQueue(CHECKPOINT_DB, lease_s=SHARD_LEASE_S)
+    queue.set_meta("input", key)
+    requeued = queue.release_claimed()
+    queue.populate([(host, 0, rs) for host, _, rs in units], {host: c for host, c, _ in units})
+    done_units, done_targets = queue.progress().get("done", (0, 0))
+    if done_units:
+        print(f" Checkpoint: {done_units} host ({done_targets} hedef) bitmiş, {queue.remaining()} host kaldı")
+        save_line(LOGFILE, {"status": "checkpoint_resume", "done_units": done_units, "done_targets": done_targets,
+                            "requeued": requeued, "remaining": queue.remaining()})
+    return queue
+
+def remove_checkpoint():
+    for path in (CHECKPOINT_DB, CHECKPOINT_DB + "-journal"):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+# === sıcak worker: --serve (uzun ömürlü süreç) / --submit (hafif istemci) ===
+def warm_up():
+    """Ağır importlar, katalog ve depolar şimdi kurulur; ilk hedef bunları beklemez."""
+    preload(pd, lk, "astropy.units")
+    if PLOT_MODE == "inline":
+        preload("matplotlib.figure", "matplotlib.backends.backend_agg")
+    get_catalog()
+    _lc_cache()
+    _results()
+    if OUTPUT_FORMAT != "csv":
+        _outputs()
+    if USE_FITS_CACHE:
+        _fits_cache()
+
+def serve_target(target):
+    # ad ya da tam satır; süreç içi önbellekler (arama, katalog, lc_cache) istekler arasında korunur
+    row = dict(target) if isinstance(target, dict) else row_from_name(str(target).strip())
+    planet, status = process_one(row)
+    return {"planet": planet, "status": status}
+
+def serve(socket_path=None, spool_dir=None, workers=None):
+    """Hedefler MAX_WORKERS iş parçacığında process_one ile (EXEC_MODE kullanılmaz); SIGTERM ile durur."""
+    setup()
+    start = time.time()
+    warm_up()
+    save_line(LOGFILE, {"status": "worker_warm", "seconds": round(time.time() - start, 3)})
+    worker = daemon.WarmWorker(serve_target, socket_path=socket_path, spool_dir=spool_dir,
+                               workers=workers or MAX_WORKERS, on_event=lambda rec: save_line(LOGFILE, rec))
+    print(f" Worker hazır ({time.time() - start:.1f} s) | soket: {socket_path or '-'} | kuyruk: {spool_dir or '-'}",
+          flush=True)
+    if PLOT_MODE == "deferred":
+        print(" PLOT_MODE=deferred: PNG'ler --render-only ile üretilir", flush=True)
+    worker.serve_forever()
+
+def _print_result(res):
+    extra = f" ({res['error']})" if res.get("error") else ""
+    print(f" {res.get('planet') or res.get('target')}: {res.get('status')} [{res.get('seconds', 0):.3f} s]{extra}",
+          flush=True)
+
+def submit(targets, socket_path=None, spool_dir=None, wait=True):
+    """Hedefleri çalışan worker'a gönderir, sonuçları yazar; döner: hata olmayan hedef sayısı."""
+    ok = 0
+    if spool_dir:
+        job = daemon.spool_submit(spool_dir, targets)
+        print(f" Kuyruğa bırakıldı: {job}", flush=True)
+        results = daemon.spool_results(spool_dir, job, wait_s=None if wait else 0) or []
     else:
-        rows = fetch_table()
-    total = len(rows)
-    print(f" Hedef sayısı: {total}")
+        results = daemon.submit(socket_path, targets)
+    for res in results:
+        if res.get("done"):
+            print(f" Bitti: {res['n']} hedef, {res['seconds']:.3f} s", flush=True)
+            continue
+        _print_result(res)
+        ok += res.get("status") != "error"
+    return ok
+
+def _submit_targets(names):
+    # "-": satır başına bir ad stdin'den
+    if names == ["-"]:
+        import sys
+        return [line.strip() for line in sys.stdin if line.strip()]
+    return names
+
+def main(argv=None):
+    global PLOT_MODE, OUTPUT_FORMAT, SCHEDULE, CHECKPOINT
+    ap = argparse.ArgumentParser(description="Transit ışık eğrisi pipeline'ı")
+    ap.add_argument("--plot-mode", choices=["inline", "deferred", "off"], default=None,
+                    help=f"PNG üretimi (varsayılan: {PLOT_MODE})")
+    ap.add_argument("--no-plots", action="store_true", help="PNG üretme; --plot-mode off ile aynı")
+    ap.add_argument("--output-format", choices=["csv", "binary", "both"], default=None,
+                    help=f"hedef başına çıktı biçimi (varsayılan: {OUTPUT_FORMAT})")
+    ap.add_argument("--render-only", action="store_true",
+                    help="hesap yapmadan manifest'teki eksik/eski PNG'leri üret ve çık")
+    ap.add_argument("--shards", type=int, default=None,
+                    help="parça sayısı (verilmezse SLURM dizi işi değişkenlerinden; yoksa parçasız)")
+    ap.add_argument("--shard-id", type=int, default=0)
+    ap.add_argument("--merge", action="store_true", help="parça çıktılarını ana dosyalara birleştir ve çık")
+    ap.add_argument("--queue-status", action="store_true", help="iş kuyruğunun durumunu yaz ve çık")
+    ap.add_argument("--schedule", choices=["cost", "input"], default=None,
+                    help=f"hedef sırası: tahmini maliyet (pahalı host önce) ya da girdi sırası "
+                         f"(varsayılan: {SCHEDULE})")
+    ap.add_argument("--checkpoint", action="store_true",
+                    help=f"kuyruğu {CHECKPOINT_DB} dosyasında tut; yarıda kalırsa aynı komut "
+                         f"kaldığı yerden sürer")
+    ap.add_argument("--serve", action="store_true",
+                    help="sıcak worker olarak çalış: hedef adlarını soketten/kuyruk klasöründen al")
+    ap.add_argument("--submit", nargs="+", metavar="AD", default=None,
+                    help="hedefleri çalışan worker'a gönder ('-': stdin'den satır satır)")
+    ap.add_argument("--socket", default=None, help=f"worker soketi (varsayılan: {WORKER_SOCKET})")
+    ap.add_argument("--spool", nargs="?", const=WORKER_SPOOL, default=None,
+                    help=f"kuyruk klasörü (varsayılan: {WORKER_SPOOL}); --serve --spool yalnızca klasörü izler "
+                         f"(ortak dosya sisteminde birden çok düğüm), --socket da verilirse ikisini; "
+                         f"--submit --spool soket yerine klasöre bırakır")
+    ap.add_argument("--no-wait", action="store_true", help="--submit --spool: sonucu bekleme")
+    ap.add_argument("--stop", action="store_true", help="çalışan worker'ı durdur")
+    ap.add_argument("--worker-status", action="store_true", help="çalışan worker'ın sayaçlarını yaz")
+    args = ap.parse_args(argv)
+    socket_path = args.socket or WORKER_SOCKET
+    # istemci komutları: ağır import, klasör, katalog yok
+    if args.submit:
+        ok = submit(_submit_targets(args.submit), socket_path, args.spool, wait=not args.no_wait)
+        return 0 if ok or args.no_wait else 1
+    if args.stop:
+        print(f" {daemon.stop(socket_path)}")
+        return
+    if args.worker_status:
+        print(json.dumps(next(daemon.request(socket_path, {"cmd": "stats"}), {}), ensure_ascii=False, indent=1))
+        return
+    if args.plot_mode:
+        PLOT_MODE = args.plot_mode
+    if args.no_plots:
+        PLOT_MODE = "off"
+    if args.output_format:
+        OUTPUT_FORMAT = args.output_format
+    if args.schedule:
+        SCHEDULE = args.schedule
+    if args.checkpoint:
+        CHECKPOINT = True
+    setup()
+    if args.serve:
+        serve(socket_path if args.socket or not args.spool else None, args.spool)
+        return
+    if args.render_only:
+        done, failed = render_pending(RENDER_WORKERS)
+        print(f" PNG: {done} üretildi, {failed} hata ({PNG_DIR})")
+        return
+
+    if args.merge:
+        print(f" Birleştirilen parça: {workqueue.merge_shards(OUTPUT_DIR)}")
+        return
+    if args.queue_status:
+        for k, (units, n) in sorted(workqueue.WorkQueue(WORK_QUEUE, SHARD_LEASE_S).progress().items()):
+            print(f" {k}: {units} birim, {n} hedef")
+        return
+
+    shard = (args.shards, args.shard_id) if args.shards else workqueue.shard_from_env()
+    queue = owner = units = None
+    checkpoint = False
+    if shard is not None and shard[0] > 1:
+        n_shards, shard_id = shard
+        use_shard_outputs(shard_id)
+        rows = load_rows(sharded=True)
+        queue = workqueue.WorkQueue(WORK_QUEUE, lease_s=SHARD_LEASE_S)
+        costs = {host: c for host, c, _ in plan_rows(rows)} if SCHEDULE == "cost" else None
+        added = queue.populate(workqueue.assign_shards(workqueue.group_by_host(rows), n_shards, costs), costs)
+        owner = workqueue.default_owner(shard_id)
+        print(f" Hedef sayısı: {len(rows)} | parça {shard_id}/{n_shards} | kuyruğa eklenen host: {added}")
+        save_line(LOGFILE, {"status": "shard_start", "shard": shard_id, "shards": n_shards, "owner": owner,
+                            "targets": len(rows), "queued_units": added})
+    else:
+        rows = load_rows()
+        print(f" Hedef sayısı: {len(rows)}")
+        if SCHEDULE == "cost":
+            units = plan_rows(rows)
+        if CHECKPOINT:
+            queue = open_checkpoint(rows, units)
+            checkpoint, shard, owner = True, (1, 0), workqueue.default_owner(0)
     ok = skip = nodata = err = 0
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
-        futures = [ex.submit(process_one, r) for r in rows]
-        for f in as_completed(futures):
-            planet, status = f.result()
+    run_start = time.time()
+    pool = tail = None
+    if PLOT_MODE == "deferred":
+        # önceki çalışmalardan kalan eksik PNG'ler + bu çalışmada manifest'e eklenen hedefler
+        pool = render.RenderPool(RENDER_WORKERS, on_done=_on_rendered)
+        tail = _outputs().tail() if OUTPUT_FORMAT != "csv" else render.ManifestTail(MANIFEST)
+        for spec in _render_pending_specs():
+            pool.submit(spec)
+    if queue is not None:
+        results = run_queue(queue, shard[1], owner)
+        lease = workqueue.Heartbeat(queue, owner)   # uzun birimlerde sahiplik düşmesin
+    elif units is not None:
+        results = run_units((host, rs) for host, _, rs in units)
+        lease = contextlib.nullcontext()
+    else:
+        results = run_rows(rows)
+        lease = contextlib.nullcontext()
+    with lease:
+        for planet, status in results:
+            if pool is not None:
+                _submit_new_plots(pool, tail)
             if status == "ok":
                 ok += 1
             elif status.startswith("skip"):
@@ -472,13 +1495,35 @@ def main():
                 nodata += 1
             else:
                 err += 1
-    summary_msg = f"\n Bitti | OK: {ok} | Skip: {skip} | No-data: {nodata} | Error: {err}"
+    render_msg = ""
+    if pool is not None:
+        _submit_new_plots(pool, tail)
+        rendered, render_failed = pool.close()
+        render_msg = f" | PNG: {rendered} (hata: {render_failed})"
+    elif PLOT_MODE == "off":
+        render_msg = " | PNG: kapalı (--render-only ile sonradan)"
+    summary_msg = f"\n Bitti | OK: {ok} | Skip: {skip} | No-data: {nodata} | Error: {err}{render_msg}"
     path_msg = (f" Çıktı klasörü: {OUTPUT_DIR}\n"
                 f"- PNG: {PNG_DIR}\n- CSV: {CSV_DIR}\n- Manifest: {MANIFEST}\n- Log: {LOGFILE}")
+    if OUTPUT_FORMAT != "csv":
+        path_msg += f"\n- Diziler: {_outputs().arrays_dir}\n- Tablo: {_outputs().db_path}"
 
 # hem log dosyasına yaz
     save_line(LOGFILE, {"status": "summary", "ok": ok, "skip": skip,
-                    "no_data": nodata, "error": err})
+                    "no_data": nodata, "error": err,
+                    "incremental": dict(_RECOMPUTE_REASONS)})
+    if _RECOMPUTE_REASONS:
+        summary_msg += "\n Artımlı: " + " | ".join(f"{k}: {v}" for k, v in sorted(_RECOMPUTE_REASONS.items()))
+
+    # aşama süreleri raporu (bu çalıştırmanın timing kayıtlarından)
+    try:
+        workers = ({"target": MAX_WORKERS} if EXEC_MODE == "thread" else
+                   {"fetch": IO_WORKERS if EXEC_MODE == "process" else None, "compute": COMPUTE_WORKERS})
+        report = summarize(load_records(LOGFILE, since=run_start), time.time() - run_start, workers)
+        save_line(LOGFILE, report)
+        summary_msg += "\n" + format_report(report)
+    except Exception as e:
+        save_line(LOGFILE, {"status": "report_error", "error": repr(e)})
 
 # hem de ekrana yazmayı dene (ama kapanmışsa sessiz geç)
     try:
@@ -487,7 +1532,23 @@ def main():
     except Exception:
         pass
 
+    if checkpoint:
+        left = queue.remaining()
+        if left == 0:
+            remove_checkpoint()
+        else:
+            print(f" Checkpoint: {left} host kaldı; aynı komutla devam edilir ({CHECKPOINT_DB})", flush=True)
+    # kuyrukta iş kalmadıysa parça çıktılarını son biten düğüm birleştirir
+    elif queue is not None and queue.remaining() == 0 and queue.try_take("merge", owner):
+        merged = workqueue.merge_shards(OUTPUT_DIR)
+        try:
+            print(f" Parça çıktıları birleştirildi: {merged} parça -> {OUTPUT_DIR}", flush=True)
+        except Exception:
+            pass
+
 if __name__ == "__main__":
-    main()
+    # süreç worker'ları fonksiyonları modül adıyla bulsun: betik sabit adla (scripts.load) yüklenip çalışır
+    from transit_pipeline import scripts
+    raise SystemExit(scripts.load("pipeline").main())
 
 
@@ -0,0 +1,417 @@
+# Çevrimdışı performans ölçümü: sentetik ürünlerle MAST/Exoplanet Archive'e gitmeden.
+#
+#   python -m benchmarks.run --scales 10,100,1000 --suites fold,bls,process_one,photometry
+#   python -m benchmarks.run --scales 10 --compare benchmarks/results/bench-20260101-120000.json
+#
+# Ölçülenler (suite × ölçek): hedef/s, hedef başına gecikme yüzdelikleri, tepe RSS,
+# periyot bulma oranı (BLS) ve derinlik hatası. Sonuçlar benchmarks/results/bench-<zaman>.json.
+# Veri kümesi --data-dir altında bir kez üretilir, sonraki koşularda yeniden kullanılır.
+#
+# Suite'ler:
+#   fold        Transit-Analysis-Pipeline.fold_plot_save (fold/bin + PNG + CSV + metrik)
+#   process_one run_rows ile tüm hedef akışı; arama/indirme sahte (yerel FITS), katalog sahte snapshot
+#   bls         transit_pipeline.bls.fast_bls süreç havuzunda (Kepler betiğindeki arama aşaması)
+#   photometry  transit_pipeline.photometry.batch_photometry sentetik TPF'lerde
+#   kepler      Kepler-10_b-Analysis/kepler_exoplanet_analysis.py uçtan uca sentetik TPF'lerde
+#               (katalog snapshot'ı, sahte TPF araması/indirmesi --cache-dir üzerinden, --no-plots)
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from benchmarks.synthetic import build_dataset, write_catalog  # noqa: E402
+
+warnings.filterwarnings("ignore")
+SUITES = ("fold", "process_one", "bls", "photometry", "kepler")
+
+
+def peak_rss_mb():
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def latency(values):
+    a = np.asarray(values, dtype=float)
+    if a.size == 0:
+        return None
+    p50, p90, p99 = np.percentile(a, [50, 90, 99])
+    return {"p50": round(float(p50), 4), "p90": round(float(p90), 4), "p99": round(float(p99), 4),
+            "max": round(float(a.max()), 4)}
+
+
+def period_recovered(found, true, tol=0.01):
+    """'ok' | 'alias' (1/2, 2, 1/3, 3 katı) | 'miss'"""
+    if found is None or not np.isfinite(found):
+        return "miss"
+    if abs(found - true) / true < tol:
+        return "ok"
+    for k in (0.5, 2.0, 1 / 3, 3.0):
+        if abs(found - k * true) / (k * true) < tol:
+            return "alias"
+    return "miss"
+
+
+def box_depth(time, flux, period, t0, dur_days):
+    phase = (time - t0 + 0.5 * period) % period - 0.5 * period
+    inside = np.abs(phase) < 0.25 * dur_days
+    outside = np.abs(phase) > dur_days
+    if inside.sum() < 3 or outside.sum() < 3:
+        return np.nan
+    return float(np.nanmedian(flux[outside]) - np.nanmedian(flux[inside]))
+
+
+def dataset(args, n, tpf=False):
+    key = f"{args.mission}-{args.shape}-{'tpf' if tpf else 'lc'}-seg{args.segments}-noise{args.noise_ppm:g}-seed{args.seed}"
+    root = os.path.join(args.data_dir, key)
+    manifest = os.path.join(root, "targets.json")
+    if os.path.exists(manifest):
+        with open(manifest) as f:
+            targets = json.load(f)
+        if len(targets) >= n:
+            return targets[:n]
+    t0 = time.time()
+    if tpf:
+        # TPF'ler büyük: Kepler long cadence, kısa taban çizgisi
+        targets = build_dataset(root, n, "Kepler", args.shape, args.segments, args.noise_ppm, args.seed,
+                                tpf=True, span=30.0)
+    else:
+        targets = build_dataset(root, n, args.mission, args.shape, args.segments, args.noise_ppm, args.seed,
+                                red_ppm=args.red_ppm)
+    with open(manifest, "w") as f:
+        json.dump(targets, f)
+    print(f"  veri: {n} hedef üretildi ({time.time() - t0:.1f} s) -> {root}")
+    return targets
+
+
+def read_arrays(path):
+    # BLS/derinlik için hafif okuyucu (lightkurve nesnesi kurmadan)
+    from astropy.io import fits
+    with fits.open(path, memmap=False) as h:
+        d = h[1].data
+        qcol = "SAP_QUALITY" if "SAP_QUALITY" in d.columns.names else "QUALITY"
+        ok = (d[qcol] == 0) & np.isfinite(d["PDCSAP_FLUX"])
+        t = np.asarray(d["TIME"][ok], dtype=np.float64)
+        f = np.asarray(d["PDCSAP_FLUX"][ok], dtype=np.float64)
+        e = np.asarray(d["PDCSAP_FLUX_ERR"][ok], dtype=np.float64)
+        bjdref = h[1].header["BJDREFI"] + h[1].header["BJDREFF"]
+    med = np.median(f)
+    return t, f / med, e / med, bjdref
+
+
+# ---- pipeline modülü ----
+def load_pipeline(outdir):
+    from transit_pipeline import scripts
+    os.environ["TRANSIT_OUTPUT_DIR"] = outdir
+    # sys.modules'e kayıtlı: process modunda worker'lar fonksiyonları ada göre bulur
+    return scripts.load("pipeline", reload=True)
+
+
+def fake_mast(targets):
+    """
+    Sentetik ürünler için (SEARCH_HOOK, FETCH_HOOK) çifti: arama hedefin ürünlerinden lightkurve
+    SearchResult'ı kurar, indirme dosyayı yerel kopyadan FitsCache'e yazar. Ağa hiç çıkılmaz.
+    """
+    import lightkurve as lk
+    from astropy.table import Table
+    by_host = {t["hostname"]: t for t in targets}
+    by_name = {os.path.basename(p): p for t in targets for p in t["products"]}
+    cols = ["author", "dataURI", "productFilename", "obs_id", "mission", "exptime", "distance",
+            "t_min", "target_name"]
+
+    def search(host, mission):
+        t = by_host.get(host)
+        names = [os.path.basename(p) for p in t["products"]] if t and t["mission"] == mission else []
+        # yazar hep SPOC: lightkurve "Kepler" yazarında yılı gerçek kplr dosya adından okur
+        rows = [("SPOC", f"mast:{mission}/product/{n}", n, n.rsplit(".", 1)[0], mission, 120.0, 0.0,
+                 58000.0, host) for n in names]
+        table = Table(rows=rows, names=cols) if rows else Table(names=cols, dtype=[str] * 5 + [float] * 3 + [str])
+        return lk.SearchResult(table)
+
+    def fetch(uri, fobj):
+        with open(by_name[os.path.basename(uri)], "rb") as src:
+            shutil.copyfileobj(src, fobj, length=1 << 20)
+
+    return search, fetch
+
+
+def reset_outputs(pipe, outdir, targets):
+    """Her ölçek temiz çıktı klasörüyle; arama/indirme kancaları yerel sentetik dosyalara yönlenir."""
+    from transit_pipeline.lccache import HostLightCurveCache
+    from transit_pipeline.resultstore import ResultStore
+    from transit_pipeline.outputstore import OutputStore
+    shutil.rmtree(outdir, ignore_errors=True)
+    pipe.OUTPUT_DIR = outdir
+    # process/async modunda worker'lar depoları bu ayarlardan yeniden kurar
+    pipe.CACHE_DIR = os.path.join(outdir, "lk_cache")
+    pipe.LC_CACHE_DIR = os.path.join(outdir, "lc_cache")
+    pipe.RESULTS_DB = os.path.join(outdir, "results.sqlite")
+    pipe.OUTPUT_STORE_DIR = None
+    pipe.PNG_DIR = os.path.join(outdir, "png")
+    pipe.CSV_DIR = os.path.join(outdir, "csv")
+    pipe.MANIFEST = os.path.join(outdir, "manifest.jsonl")
+    pipe.LOGFILE = os.path.join(outdir, "run_log.jsonl")
+    pipe.METRICS_CSV = os.path.join(outdir, "metrics.csv")
+    pipe.TTV_DIR = os.path.join(outdir, "ttv")
+    pipe.CATALOG_DB = os.path.join(outdir, "pscomppars.sqlite")
+    pipe.CATALOG_OFFLINE = True
+    for d in (pipe.PNG_DIR, pipe.CSV_DIR, pipe.TTV_DIR):
+        os.makedirs(d, exist_ok=True)
+    pipe._LC_CACHE = HostLightCurveCache(pipe.LC_CACHE_DIR)
+    pipe._RESULTS = ResultStore(pipe.RESULTS_DB)
+    pipe._OUTPUTS = OutputStore(outdir)
+    pipe._CATALOG = None
+    write_catalog(pipe.CATALOG_DB, targets)
+    # thread/process/async yolları aynı kancalardan geçer (async da ağa çıkmaz)
+    pipe.SEARCH_HOOK, pipe.FETCH_HOOK = fake_mast(targets)
+    pipe.USE_FITS_CACHE = True
+    pipe._FITS_CACHE = None
+    pipe._SEARCH_MEMO.clear()
+
+
+# ---- suite'ler ----
+def suite_fold(args, pipe, targets, outdir):
+    import lightkurve as lk
+    reset_outputs(pipe, outdir, targets)
+    lcs = [pipe.build_lightcurve(lk.LightCurveCollection([lk.read(p) for p in t["products"]]),
+                                 pipe.host_ephemerides(t["hostname"], t["pl_orbper"], t["pl_tranmid"], t["pl_trandur"]))
+           for t in targets]
+    lat = []
+    t_all = time.perf_counter()
+    for t, lc in zip(targets, lcs):
+        s = time.perf_counter()
+        pipe.fold_plot_save(t["pl_name"], t["hostname"], t["pl_orbper"], t["pl_tranmid"], t["pl_trandur"],
+                            lc, t["mission"], "SPOC", R_star=1.0, M_star=1.0)
+        lat.append(time.perf_counter() - s)
+    wall = time.perf_counter() - t_all
+    import pandas as pd
+    if pipe.OUTPUT_FORMAT == "binary":
+        m = pipe._OUTPUTS.metrics(["planet", "depth"]).set_index("planet")
+    else:
+        m = pd.read_csv(os.path.join(outdir, "metrics.csv")).set_index("planet")
+    err = []
+    for t in targets:
+        if t["pl_name"] in m.index:
+            err.append(abs(float(m.loc[t["pl_name"], "depth"]) - t["depth"]) / t["depth"])
+    return wall, lat, {"depth_metric_rel_err_median": round(float(np.median(err)), 4) if err else None}
+
+
+def suite_process_one(args, pipe, targets, outdir):
+    from transit_pipeline.profiling import load_records
+    reset_outputs(pipe, outdir, targets)
+    pipe.EXEC_MODE = args.exec_mode
+    pipe.MAX_WORKERS = args.workers
+    pipe.COMPUTE_WORKERS = args.workers
+    pipe.INCREMENTAL = True
+    # parametreler katalogdan gelsin: satırlarda yalnızca isimler
+    rows = [{"pl_name": t["pl_name"], "hostname": t["hostname"], "pl_orbper": None, "pl_tranmid": None,
+             "pl_trandur": None} for t in targets]
+    start = time.time()
+    t_all = time.perf_counter()
+    if args.schedule == "cost":
+        results = pipe.run_units((host, rs) for host, _, rs in pipe.plan_rows(rows))
+    else:
+        results = pipe.run_rows(rows)
+    statuses = [st for _, st in results]
+    wall = time.perf_counter() - t_all
+    recs = [r for r in load_records(pipe.LOGFILE, since=start) if r["phase"] in ("target", "compute")]
+    stages = {}
+    for r in recs:
+        for k, v in r["stages"].items():
+            stages[k] = stages.get(k, 0.0) + v
+    extra = {"ok": statuses.count("ok"), "statuses": {s: statuses.count(s) for s in set(statuses)},
+             "stage_seconds": {k: round(v, 3) for k, v in sorted(stages.items(), key=lambda kv: -kv[1])}}
+    return wall, [r["wall_s"] for r in recs], extra
+
+
+def _bls_one(job):
+    from transit_pipeline.bls import fast_bls
+    path, min_p, max_p = job
+    t, f, e, _ = read_arrays(path)
+    s = time.perf_counter()
+    res = fast_bls(t, f, e, minimum_period=min_p, maximum_period=max_p)
+    return float(res.period_at_max_power), float(res.depth_at_max_power), time.perf_counter() - s
+
+
+def suite_bls(args, pipe, targets, outdir):
+    jobs = [(t["products"][0], 0.5, 15.0) for t in targets]
+    t_all = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as ex:
+        out = list(ex.map(_bls_one, jobs))
+    wall = time.perf_counter() - t_all
+    verdict = [period_recovered(p, t["pl_orbper"]) for (p, _, _), t in zip(out, targets)]
+    derr = [abs(d - t["depth"]) / t["depth"] for (p, d, _), t, v in zip(out, targets, verdict) if v == "ok"]
+    return wall, [x[2] for x in out], {
+        "period_ok": round(verdict.count("ok") / len(verdict), 4),
+        "period_alias": round(verdict.count("alias") / len(verdict), 4),
+        "depth_rel_err_median": round(float(np.median(derr)), 4) if derr else None,
+    }
+
+
+def suite_photometry(args, pipe, targets, outdir):
+    import lightkurve as lk
+    from transit_pipeline.photometry import batch_photometry, tpf_arrays
+    lat = []
+    errs = []
+    chosen = {}
+    t_all = time.perf_counter()
+    for t in targets:
+        tpfs = [lk.read(p) for p in t["products"]]
+        s = time.perf_counter()
+        arrays = [tpf_arrays(x) for x in tpfs]
+        res = batch_photometry(arrays)
+        lat.append(time.perf_counter() - s)
+        for r in res:
+            chosen[r["aperture"]] = chosen.get(r["aperture"], 0) + 1
+            f = r["flux"] / np.nanmedian(r["flux"])
+            d = box_depth(r["time"], f, t["pl_orbper"], t["pl_tranmid"] - 2454833.0, t["pl_trandur"] / 24)
+            if np.isfinite(d):
+                errs.append(abs(d - t["depth"]) / t["depth"])
+    wall = time.perf_counter() - t_all
+    return wall, lat, {"apertures": chosen,
+                       "depth_rel_err_median": round(float(np.median(errs)), 4) if errs else None}
+
+
+def suite_kepler(args, pipe, targets, outdir):
+    import io
+    import contextlib
+    from transit_pipeline import scripts
+    kepler = scripts.load("kepler")
+    shutil.rmtree(outdir, ignore_errors=True)
+    os.makedirs(outdir)
+    catalog = os.path.join(outdir, "pscomppars.sqlite")
+    write_catalog(catalog, targets)
+    search, fetch = fake_mast(targets)
+    hosts = {t["pl_name"]: t["hostname"] for t in targets}
+    kepler.TPF_SEARCH_HOOK = lambda planet: search(hosts[planet], "Kepler")
+    kepler.FETCH_HOOK = fetch
+    lat, statuses = [], []
+    cwd = os.getcwd()
+    t_all = time.perf_counter()
+    try:
+        # betik çıktıları ./<gezegen>/ altına yazar
+        os.chdir(outdir)
+        for t in targets:
+            argv = ["--planetname", t["pl_name"], "--catalog-db", catalog, "--offline", "--no-plots",
+                    "--cache-dir", os.path.join(outdir, "fits_cache")]
+            s = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    kepler.main(argv)
+                # başarı: betik hata vermeden bitti ve özet/binlenmiş eğri yazıldı
+                d = os.path.join(outdir, kepler.sanitize_name(t["pl_name"]))
+                done = all(os.path.exists(os.path.join(d, f)) for f in ("planet_summary.csv", "binned_lightcurve.csv"))
+                statuses.append("ok" if done else "missing_outputs")
+            except Exception:
+                statuses.append("error")
+            lat.append(time.perf_counter() - s)
+    finally:
+        os.chdir(cwd)
+        kepler.TPF_SEARCH_HOOK = kepler.FETCH_HOOK = None
+    wall = time.perf_counter() - t_all
+    # periyot doğruluğu ölçülmez: betiğin birleşik aramasındaki frequency_factor=10000 ızgarası yıllık
+    # Kepler taban çizgisi içindir, 30 günlük sentetik çeyrekte yalnızca birkaç periyot noktası kalır
+    return wall, lat, {"ok": statuses.count("ok"), "statuses": {s: statuses.count(s) for s in set(statuses)}}
+
+
+RUNNERS = {"fold": suite_fold, "process_one": suite_process_one, "bls": suite_bls, "photometry": suite_photometry,
+           "kepler": suite_kepler}
+
+
+def environment():
+    try:
+        rev = subprocess.run(["git", "-C", REPO, "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, timeout=10).stdout.strip()
+    except Exception:
+        rev = None
+    return {"python": platform.python_version(), "numpy": np.__version__, "cpus": os.cpu_count(),
+            "machine": platform.machine(), "git": rev}
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        base = {(r["suite"], r["n"]): r for r in json.load(f)["results"]}
+    for r in current:
+        b = base.get((r["suite"], r["n"]))
+        if b and b.get("targets_per_s") and r.get("targets_per_s"):
+            print(f"  {r['suite']:<12}{r['n']:>7}  {b['targets_per_s']:>9.2f} -> {r['targets_per_s']:>9.2f} hedef/s"
+                  f"  (x{r['targets_per_s'] / b['targets_per_s']:.2f})")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sentetik verilerle çevrimdışı pipeline benchmark'ı")
+    ap.add_argument("--scales", default="10,100", help="virgülle ayrılmış hedef sayıları (ör. 10,100,1000,10000)")
+    ap.add_argument("--suites", default=",".join(SUITES))
+    ap.add_argument("--mission", choices=["TESS", "Kepler"], default="Kepler")
+    ap.add_argument("--shape", choices=["box", "batman"], default="box")
+    ap.add_argument("--segments", type=int, default=1, help="hedef başına çeyrek/sektör sayısı")
+    ap.add_argument("--noise-ppm", type=float, default=300.0)
+    ap.add_argument("--red-ppm", type=float, default=0.0, help="yavaş sistematik genliği")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    ap.add_argument("--exec-mode", choices=["thread", "process", "async"], default="thread")
+    ap.add_argument("--schedule", choices=["cost", "input"], default="cost",
+                    help="process_one: host grupları tahmini maliyetle (pipeline varsayılanı) ya da girdi sırası")
+    ap.add_argument("--output-format", choices=["csv", "binary", "both"], default="csv")
+    ap.add_argument("--plot-mode", choices=["inline", "deferred", "off"], default="inline",
+                    help="fold/process_one: deferred burada 'off' gibi ölçülür (render havuzu main()'de)")
+    ap.add_argument("--detrend", choices=["biweight", "median", "spline", "savgol"], default=None,
+                    help="fold/process_one: pipeline DETREND_METHOD (varsayılan: pipeline ayarı)")
+    ap.add_argument("--data-dir", default=os.path.join(REPO, "benchmarks", "data"))
+    ap.add_argument("--work-dir", default=os.path.join(REPO, "benchmarks", "work"))
+    ap.add_argument("--out", default=os.path.join(REPO, "benchmarks", "results"))
+    ap.add_argument("--compare", default=None, help="önceki sonuç JSON'u ile hedef/s karşılaştır")
+    args = ap.parse_args(argv)
+
+    scales = [int(x) for x in args.scales.split(",") if x]
+    suites = [s for s in args.suites.split(",") if s]
+    pipe = None
+    if {"fold", "process_one"} & set(suites):
+        pipe = load_pipeline(os.path.join(args.work_dir, "init"))
+        pipe.OUTPUT_FORMAT = args.output_format
+        pipe.PLOT_MODE = args.plot_mode
+        if args.detrend:
+            pipe.DETREND_METHOD = args.detrend
+
+    results = []
+    for suite in suites:
+        for n in scales:
+            targets = dataset(args, n, tpf=suite in ("photometry", "kepler"))
+            outdir = os.path.join(args.work_dir, f"{suite}-{n}")
+            rss0 = peak_rss_mb()
+            wall, lat, extra = RUNNERS[suite](args, pipe, targets, outdir)
+            rec = {"suite": suite, "n": n, "wall_s": round(wall, 3),
+                   "targets_per_s": round(n / wall, 3) if wall > 0 else None,
+                   "latency_s": latency(lat), "peak_rss_mb": round(peak_rss_mb(), 1),
+                   "peak_rss_growth_mb": round(peak_rss_mb() - rss0, 1), **extra}
+            results.append(rec)
+            lt = rec["latency_s"] or {}
+            print(f"{suite:<12}{n:>7}  {rec['targets_per_s']:>9.2f} hedef/s  p50 {lt.get('p50', 0):.3f}s"
+                  f"  p99 {lt.get('p99', 0):.3f}s  RSS {rec['peak_rss_mb']:.0f} MB  "
+                  + " ".join(f"{k}={v}" for k, v in extra.items() if not isinstance(v, dict)), flush=True)
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, time.strftime("bench-%Y%m%d-%H%M%S.json"))
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "args": vars(args), "results": results}, f, indent=2)
+    print(f"Sonuçlar: {path}")
+    if args.compare:
+        compare(results, args.compare)
+    # hız, eksik hedefle ölçülmüş olmasın: ok < n olan koşu başarısız
+    failed = [r for r in results if "ok" in r and r["ok"] < r["n"]]
+    if failed:
+        raise SystemExit("Başarısız: " + ", ".join(f"{r['suite']}-{r['n']} ok={r['ok']}/{r['n']}" for r in failed))
+
+
+if __name__ == "__main__":
+    main()
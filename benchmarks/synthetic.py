@@ -0,0 +1,194 @@
+# Sentetik Kepler/TESS ürünleri: transit enjekte edilmiş ışık eğrisi ve TPF FITS dosyaları,
+# sahte pscomppars kataloğu. lightkurve.read bunları gerçek SPOC/Kepler ürünleri gibi okur.
+import os
+import math
+
+import numpy as np
+
+MISSIONS = {
+    # cadence (gün), çeyrek/sektör uzunluğu (gün), zaman referansı, kalite sütunu
+    "Kepler": {"cadence": 29.4 / 1440, "span": 90.0, "bjdref": 2454833.0, "quality": "SAP_QUALITY",
+               "time_offset": 120.0},
+    "TESS": {"cadence": 2.0 / 1440, "span": 27.0, "bjdref": 2457000.0, "quality": "QUALITY",
+             "time_offset": 1400.0},
+}
+
+
+def box_model(t, period, t0, depth, dur_days):
+    phase = (t - t0 + 0.5 * period) % period - 0.5 * period
+    return 1.0 - depth * (np.abs(phase) < 0.5 * dur_days)
+
+
+def batman_model(t, period, t0, depth, dur_days, u=(0.3, 0.1)):
+    import batman
+    p = batman.TransitParams()
+    p.t0, p.per, p.rp = t0, period, math.sqrt(depth)
+    p.a = max(1.5, period / (math.pi * dur_days))
+    p.inc, p.ecc, p.w = 90.0, 0.0, 90.0
+    p.limb_dark, p.u = "quadratic", list(u)
+    return batman.TransitModel(p, t).light_curve(p)
+
+
+def make_target(i, rng, mission="TESS", shape="box", period_range=(0.8, 12.0), depth_range=(5e-4, 1e-2)):
+    """Bir sentetik hedefin katalog satırı (zaman: mutlak BJD)."""
+    m = MISSIONS[mission]
+    period = float(np.exp(rng.uniform(*np.log(period_range))))
+    dur_hr = float(np.clip(13.0 * (period / 365.0) ** (1 / 3) * rng.uniform(0.6, 1.2), 0.8, 10.0))
+    t0 = m["bjdref"] + m["time_offset"] + float(rng.uniform(0, period))
+    host = f"SYN-{mission[:1]}{i:06d}"
+    return {"pl_name": f"{host} b", "hostname": host, "pl_orbper": period, "pl_tranmid": t0,
+            "pl_trandur": dur_hr, "depth": float(rng.uniform(*depth_range)), "mission": mission,
+            "shape": shape, "st_rad": 1.0, "st_mass": 1.0}
+
+
+def simulate(target, rng, n_segments=1, noise_ppm=500.0, cadence=None, span=None, red_ppm=0.0):
+    """[(time_rel, flux, flux_err, quality), ...] segment başına (zaman görev referansına göre)."""
+    m = MISSIONS[target["mission"]]
+    cadence = cadence or m["cadence"]
+    span = span or m["span"]
+    model = batman_model if target["shape"] == "batman" else box_model
+    out = []
+    start = m["time_offset"]
+    t0_rel = target["pl_tranmid"] - m["bjdref"]
+    for _ in range(n_segments):
+        t = start + np.arange(0.0, span, cadence)
+        f = model(t, target["pl_orbper"], t0_rel, target["depth"], target["pl_trandur"] / 24.0)
+        sigma = noise_ppm * 1e-6
+        f = f + rng.normal(0.0, sigma, t.size)
+        if red_ppm:
+            # yavaş değişen sistematik (flatten'in temizlemesi gereken)
+            f = f * (1.0 + red_ppm * 1e-6 * np.sin(2 * np.pi * (t - start) / (span / 3.0)))
+        q = np.zeros(t.size, dtype=np.int32)
+        q[rng.random(t.size) < 0.002] = 128        # seyrek işaretli kadans
+        out.append((t, f, np.full(t.size, sigma), q))
+        start += span + 1.0
+    return out
+
+
+def _primary(target, segment, kind):
+    from astropy.io import fits
+    mission = target["mission"]
+    h = fits.Header()
+    h["TELESCOP"] = mission
+    h["MISSION"] = mission
+    h["ORIGIN"] = "NASA/Ames"
+    h["CREATOR"] = "TargetPixelExporterPipelineModule" if kind == "tpf" else (
+        "FluxExporter2PipelineModule" if mission == "Kepler" else "LightCurveExporterPipelineModule")
+    h["OBJECT"] = target["hostname"]
+    h["RA_OBJ"], h["DEC_OBJ"] = 290.0, 44.5
+    if mission == "Kepler":
+        h["KEPLERID"] = int(target["hostname"].split("-")[1][1:])
+        h["QUARTER"] = segment + 1
+    else:
+        h["TICID"] = int(target["hostname"].split("-")[1][1:])
+        h["SECTOR"] = segment + 1
+    return fits.PrimaryHDU(header=h)
+
+
+def write_lightcurve(path, target, segment, t, f, e, q, flux_scale=1e4):
+    from astropy.io import fits
+    m = MISSIONS[target["mission"]]
+    cols = [
+        fits.Column(name="TIME", format="D", unit="d", array=t),
+        fits.Column(name="CADENCENO", format="J", array=np.arange(t.size, dtype=np.int32)),
+        fits.Column(name="SAP_FLUX", format="E", unit="e-/s", array=(f * flux_scale).astype(np.float32)),
+        fits.Column(name="SAP_FLUX_ERR", format="E", unit="e-/s", array=(e * flux_scale).astype(np.float32)),
+        fits.Column(name="PDCSAP_FLUX", format="E", unit="e-/s", array=(f * flux_scale).astype(np.float32)),
+        fits.Column(name="PDCSAP_FLUX_ERR", format="E", unit="e-/s", array=(e * flux_scale).astype(np.float32)),
+        fits.Column(name=m["quality"], format="J", array=q),
+    ]
+    hdu = fits.BinTableHDU.from_columns(cols, name="LIGHTCURVE")
+    hdu.header["BJDREFI"] = int(m["bjdref"])
+    hdu.header["BJDREFF"] = m["bjdref"] - int(m["bjdref"])
+    hdu.header["TIMEUNIT"] = "d"
+    hdu.header["TIMESYS"] = "TDB"
+    fits.HDUList([_primary(target, segment, "lc"), hdu]).writeto(path, overwrite=True, checksum=True)
+    return path
+
+
+def write_tpf(path, target, segment, t, f, e, q, shape=(11, 11), flux_scale=5e4, bkg=100.0, rng=None,
+              neighbour=None):
+    """
+    Gauss PSF'li yıldız + arkaplan; APERTURE uzantısında pipeline maskesi (bit 2).
+    neighbour: (dy, dx, akı oranı) — sabit akılı komşu yıldız (açıklık kirlenmesi senaryoları).
+    """
+    from astropy.io import fits
+    rng = rng or np.random.default_rng(0)
+    m = MISSIONS[target["mission"]]
+    H, W = shape
+    yy, xx = np.mgrid[:H, :W]
+    cy, cx = (H - 1) / 2 + 0.3, (W - 1) / 2 - 0.2
+    psf = np.exp(-((yy - cy) ** 2 + (xx - cx) ** 2) / (2 * 1.2 ** 2))
+    psf /= psf.sum()
+    star = (f * flux_scale)[:, None, None] * psf[None]
+    if neighbour is not None:
+        ny, nx, ratio = neighbour
+        npsf = np.exp(-((yy - cy - ny) ** 2 + (xx - cx - nx) ** 2) / (2 * 1.2 ** 2))
+        star = star + (ratio * flux_scale * npsf / npsf.sum())[None]
+    var = np.clip(star + bkg, 1.0, None)
+    cube = (star + bkg + rng.normal(0, 1, star.shape) * np.sqrt(var)).astype(np.float32)
+    err = np.sqrt(var).astype(np.float32)
+    T = t.size
+    cols = [
+        fits.Column(name="TIME", format="D", unit="d", array=t),
+        fits.Column(name="TIMECORR", format="E", array=np.zeros(T, np.float32)),
+        fits.Column(name="CADENCENO", format="J", array=np.arange(T, dtype=np.int32)),
+        fits.Column(name="RAW_CNTS", format=f"{H * W}J", dim=f"({W},{H})", array=np.zeros((T, H, W), np.int32)),
+        fits.Column(name="FLUX", format=f"{H * W}E", unit="e-/s", dim=f"({W},{H})", array=cube),
+        fits.Column(name="FLUX_ERR", format=f"{H * W}E", unit="e-/s", dim=f"({W},{H})", array=err),
+        fits.Column(name="FLUX_BKG", format=f"{H * W}E", unit="e-/s", dim=f"({W},{H})",
+                    array=np.full((T, H, W), bkg, np.float32)),
+        fits.Column(name="FLUX_BKG_ERR", format=f"{H * W}E", unit="e-/s", dim=f"({W},{H})",
+                    array=np.ones((T, H, W), np.float32)),
+        fits.Column(name="QUALITY", format="J", array=q),
+        fits.Column(name="POS_CORR1", format="E", array=np.zeros(T, np.float32)),
+        fits.Column(name="POS_CORR2", format="E", array=np.zeros(T, np.float32)),
+    ]
+    tab = fits.BinTableHDU.from_columns(cols, name="TARGETTABLES")
+    tab.header["BJDREFI"] = int(m["bjdref"])
+    tab.header["BJDREFF"] = m["bjdref"] - int(m["bjdref"])
+    tab.header["TIMEUNIT"] = "d"
+    tab.header["TIMESYS"] = "TDB"
+    tab.header["1CRV5P"] = 100
+    tab.header["2CRV5P"] = 200
+    ap = np.where(psf > 0.01, 3, 1).astype(np.int32)     # bit 1: toplandı, bit 2: optimal açıklık
+    aphdu = fits.ImageHDU(ap, name="APERTURE")
+    fits.HDUList([_primary(target, segment, "tpf"), tab, aphdu]).writeto(path, overwrite=True, checksum=True)
+    return path
+
+
+def product_name(target, segment, kind="lc"):
+    suffix = "tp" if kind == "tpf" else "lc"
+    return f"{target['hostname'].lower()}-s{segment + 1:02d}_{suffix}.fits"
+
+
+def build_dataset(root, n_targets, mission="TESS", shape="box", n_segments=1, noise_ppm=500.0, seed=0,
+                  tpf=False, tpf_shape=(11, 11), cadence=None, span=None, red_ppm=0.0):
+    """
+    root/<host>/... altında ürünleri yazar. Döner: hedef listesi, her biri "products" (dosya yolları)
+    ve gerçek (enjekte) parametrelerle.
+    """
+    rng = np.random.default_rng(seed)
+    targets = []
+    for i in range(n_targets):
+        tgt = make_target(i, rng, mission, shape)
+        d = os.path.join(root, tgt["hostname"])
+        os.makedirs(d, exist_ok=True)
+        tgt["products"] = []
+        for s, (t, f, e, q) in enumerate(simulate(tgt, rng, n_segments, noise_ppm, cadence, span, red_ppm)):
+            if tpf:
+                p = write_tpf(os.path.join(d, product_name(tgt, s, "tpf")), tgt, s, t, f, e, q, tpf_shape, rng=rng)
+            else:
+                p = write_lightcurve(os.path.join(d, product_name(tgt, s)), tgt, s, t, f, e, q)
+            tgt["products"].append(p)
+        targets.append(tgt)
+    return targets
+
+
+def write_catalog(path, targets):
+    """Sahte pscomppars snapshot'ı (CatalogIndex biçiminde)."""
+    from transit_pipeline.catalog import CatalogIndex
+    idx = CatalogIndex(path, offline=True)
+    idx.write([{k: t.get(k) for k in ("pl_name", "hostname", "pl_orbper", "pl_tranmid", "pl_trandur",
+                                      "st_rad", "st_mass")} for t in targets])
+    return idx
@@ -0,0 +1,46 @@
+# fast_bls: lightkurve to_periodogram(method="bls") ile aynı ızgara ve aynı period_at_max_power
+import numpy as np
+import pytest
+
+lk = pytest.importorskip("lightkurve")
+
+from transit_pipeline.bls import fast_bls, lightkurve_period_grid
+
+
+def synthetic_lc(period=3.52, depth=0.005, duration=0.12, days=80.0, cadence=0.0204, noise=1e-3, seed=1):
+    rng = np.random.default_rng(seed)
+    time = np.arange(0.0, days, cadence) + 130.0
+    flux = 1.0 + rng.normal(0.0, noise, time.size)
+    phase = np.mod(time - 131.0 + 0.5 * period, period) - 0.5 * period
+    flux[np.abs(phase) < 0.5 * duration] -= depth
+    return lk.LightCurve(time=time, flux=flux, flux_err=np.full(time.size, noise))
+
+
+@pytest.mark.parametrize("frequency_factor", [10, 500])
+def test_grid_matches_lightkurve(frequency_factor):
+    lc = synthetic_lc()
+    pg = lc.to_periodogram(method="bls", minimum_period=0.5, maximum_period=20.0,
+                           frequency_factor=frequency_factor)
+    grid = lightkurve_period_grid(lc.time.value, 0.5, 20.0, frequency_factor=frequency_factor)
+    np.testing.assert_allclose(grid, pg.period.value, rtol=1e-12)
+
+
+@pytest.mark.parametrize("prior", [None, 3.52])
+def test_period_at_max_power_matches_lightkurve(prior):
+    lc = synthetic_lc()
+    pg = lc.to_periodogram(method="bls", minimum_period=0.5, maximum_period=20.0)
+    res = fast_bls(lc.time.value, lc.flux.value, lc.flux_err.value,
+                   minimum_period=0.5, maximum_period=20.0, prior_period=prior)
+    assert res.n_grid == pg.period.size
+    assert res.period_at_max_power == pytest.approx(pg.period_at_max_power.value, rel=1e-12)
+    if prior is None:
+        assert res.n_evaluated < res.n_grid // 2
+
+
+def test_sparse_grid_is_evaluated_exactly():
+    lc = synthetic_lc()
+    pg = lc.to_periodogram(method="bls", minimum_period=0.5, maximum_period=20.0, frequency_factor=10000)
+    res = fast_bls(lc.time.value, lc.flux.value, lc.flux_err.value,
+                   minimum_period=0.5, maximum_period=20.0, frequency_factor=10000)
+    assert res.n_evaluated == res.n_grid
+    assert res.period_at_max_power == pytest.approx(pg.period_at_max_power.value, rel=1e-12)
@@ -0,0 +1,72 @@
+# search_epoch: kaba kuvvet kutu taraması ve enjekte edilen t0 ile uyumlu
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import batman_model, box_model
+from transit_pipeline.epoch import search_epoch
+
+P, T0, DUR, DEPTH, NOISE = 3.1, 131.37, 0.15, 0.003, 5e-4
+
+
+def injected(model, seed=3):
+    rng = np.random.default_rng(seed)
+    t = np.arange(0.0, 60.0, 0.0204) + 130.0
+    return t, model(t, P, T0, DEPTH, DUR) + rng.normal(0.0, NOISE, t.size)
+
+
+def brute_force_t0(t, f, step=5e-4):
+    # her deneme epoğunda kutu içi ortalama eksik akının SNR'ı; en yükseği
+    trials = np.arange(T0 - 0.1, T0 + 0.1, step)
+    snr = []
+    for c in trials:
+        inside = np.abs(np.mod(t - c + 0.5 * P, P) - 0.5 * P) < 0.5 * DUR
+        snr.append((1.0 - f[inside]).sum() / np.sqrt(inside.sum()))
+    return trials[int(np.argmax(snr))]
+
+
+def nearest(t0):
+    return t0 - P * np.round((t0 - T0) / P)
+
+
+@pytest.mark.parametrize("model", [box_model, batman_model])
+def test_matches_brute_force_scan(model):
+    t, f = injected(model)
+    res = search_epoch(t, f, np.full(t.size, NOISE), period=P, duration=DUR)
+    assert abs(nearest(res["t0"]) - brute_force_t0(t, f)) < 2 * res["t0_err"]
+    assert abs(nearest(res["t0"]) - T0) < 2 * res["t0_err"]
+    assert res["depth"] == pytest.approx(DEPTH, rel=0.15)
+    assert res["n_transits"] == 19
+
+
+def test_unknown_duration():
+    t, f = injected(batman_model)
+    res = search_epoch(t, f, period=P)
+    assert abs(nearest(res["t0"]) - T0) < 2 * res["t0_err"]
+    assert res["snr"] > 20
+
+
+def test_no_data():
+    assert search_epoch(np.arange(5.0), np.ones(5), period=P) is None
+
+
+def test_rejected_epochs_bound_the_interval(monkeypatch):
+    # tepeden sonraki epoklar reddedilmiş (veri boşluğu/kapsama), öncekiler negatif SNR: Δχ² aralığı
+    # bunların üstünden yürümemeli
+    from transit_pipeline import epoch
+    t, f = injected(box_model)
+    e = np.full(t.size, NOISE)
+    clean = search_epoch(t, f, e, period=P, duration=DUR)
+    scan = epoch._scan
+
+    def gapped(*args):
+        snr, depth, n_s = scan(*args)
+        k = int(np.argmax(snr))
+        snr = snr.copy()
+        snr[(k + 1 + np.arange(snr.size // 4)) % snr.size] = -np.inf
+        snr[(k - 1 - np.arange(snr.size // 4)) % snr.size] = -50.0
+        return snr, depth, n_s
+
+    monkeypatch.setattr(epoch, "_scan", gapped)
+    res = search_epoch(t, f, e, period=P, duration=DUR)
+    assert res["t0"] == pytest.approx(clean["t0"])
+    assert res["t0_err"] <= clean["t0_err"]
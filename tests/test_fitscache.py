@@ -0,0 +1,71 @@
+# FitsCache.fetch_read: okuma LOCK_SH altında, evict okumadan sonra; başka sürecin evict'i bozulma sayılmaz
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("astropy")
+
+from benchmarks.synthetic import make_target, simulate, write_lightcurve
+from transit_pipeline import fitscache
+from transit_pipeline.fitscache import FitsCache, local_fetcher
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    rng = np.random.default_rng(0)
+    names = []
+    for i in range(3):
+        target = make_target(i, rng)
+        (t, f, e, q), = simulate(target, rng, span=2.0)
+        names.append(os.path.basename(write_lightcurve(str(tmp_path / f"p{i}_lc.fits"), target, 0, t, f, e, q)))
+    return str(tmp_path), ["mast:TESS/product/" + n for n in names]
+
+
+def read_size(path):
+    return os.path.getsize(path)
+
+
+def test_evict_runs_after_read(tmp_path, mirror):
+    src, uris = mirror
+    # sınır tek ürünün altında: her okumadan sonra okunan ürün de silinir, ama okumadan önce değil
+    cache = FitsCache(str(tmp_path / "cache"), max_bytes=1, fetcher=local_fetcher(src))
+    for uri in uris:
+        assert cache.fetch_read(uri, read_size) > 0
+    assert cache.entries() == []
+    assert os.listdir(cache.quarantine_dir) == []
+
+
+def test_eviction_in_lock_gap_is_not_corruption(tmp_path, mirror, monkeypatch):
+    src, uris = mirror
+    cache = FitsCache(str(tmp_path / "cache"), fetcher=local_fetcher(src))
+    downgrade = fitscache._FileLock.downgrade
+    calls = []
+
+    def evicted_in_gap(self):
+        # EX -> SH dönüşümünün arasında başka bir sürecin evict'i dosyayı siler
+        if not calls:
+            os.remove(cache.path_for(uris[0]))
+            cache._forget(uris[0])
+        calls.append(1)
+        downgrade(self)
+
+    monkeypatch.setattr(fitscache._FileLock, "downgrade", evicted_in_gap)
+    assert cache.fetch_read(uris[0], read_size) > 0
+    assert len(calls) == 2
+    assert os.listdir(cache.quarantine_dir) == []
+
+
+def test_unreadable_file_is_quarantined_and_refetched(tmp_path, mirror):
+    src, uris = mirror
+    cache = FitsCache(str(tmp_path / "cache"), fetcher=local_fetcher(src))
+    seen = []
+
+    def flaky(path):
+        seen.append(path)
+        if len(seen) == 1:
+            raise OSError("okunamadı")
+        return read_size(path)
+
+    assert cache.fetch_read(uris[1], flaky) > 0
+    assert len(os.listdir(cache.quarantine_dir)) == 1
@@ -0,0 +1,57 @@
+# gaiaderive: SkyCoord ile aynı galaktik koordinatlar ve kartezyen konumlar
+import numpy as np
+import pytest
+
+from transit_pipeline import gaiaderive
+
+
+def random_stars(n=20000, seed=7):
+    rng = np.random.default_rng(seed)
+    return {
+        "ra": rng.uniform(0.0, 360.0, n),
+        "dec": np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, n))),
+        "parallax": rng.uniform(10.0, 200.0, n),
+        "parallax_error": rng.uniform(0.01, 1.0, n),
+        "phot_g_mean_mag": rng.uniform(4.0, 18.0, n),
+        "phot_bp_mean_mag": rng.uniform(4.0, 19.0, n),
+        "phot_rp_mean_mag": rng.uniform(3.0, 17.0, n),
+    }
+
+
+def test_matches_skycoord():
+    u = pytest.importorskip("astropy.units")
+    from astropy.coordinates import SkyCoord
+    src = random_stars()
+    out = gaiaderive.derive(src, chunk=3000)
+    ref = SkyCoord(ra=src["ra"] * u.deg, dec=src["dec"] * u.deg,
+                   distance=(1000.0 / src["parallax"]) * u.pc, frame="icrs").galactic
+    sep = SkyCoord(l=out["l"] * u.deg, b=out["b"] * u.deg, frame="galactic").separation(ref).arcsec
+    assert sep.max() < 1e-6       # ölçülen en büyük fark ~1.6e-7″
+    xyz = ref.cartesian
+    for k, v in (("x", xyz.x), ("y", xyz.y), ("z", xyz.z)):
+        np.testing.assert_allclose(out[k], v.to_value(u.pc), rtol=0, atol=1e-9 * out["distance_pc"].max())
+
+
+def test_photometric_columns():
+    src = random_stars(1000)
+    out = gaiaderive.derive(src)
+    d = 1000.0 / src["parallax"]
+    np.testing.assert_allclose(out["distance_pc"], d)
+    np.testing.assert_allclose(out["M_G"], src["phot_g_mean_mag"] - 5 * np.log10(d / 10.0))
+    np.testing.assert_allclose(out["BP_RP"], src["phot_bp_mean_mag"] - src["phot_rp_mean_mag"])
+    np.testing.assert_allclose(out["relative_error"], src["parallax_error"] / src["parallax"])
+
+
+def test_ensure_derived_follows_base_file(tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    base = str(tmp_path / "tile.parquet")
+    src = random_stars(50)
+    pd.DataFrame({"source_id": np.arange(50), **src}).to_parquet(base)
+    path = gaiaderive.ensure_derived(base)
+    np.testing.assert_allclose(pd.read_parquet(path)["distance_pc"], 1000.0 / src["parallax"])
+    # aynı satır sayısı, farklı içerik: türetilmiş dosya yenilenmeli
+    src["parallax"] = src["parallax"][::-1].copy()
+    pd.DataFrame({"source_id": np.arange(50), **src}).to_parquet(base)
+    np.testing.assert_allclose(pd.read_parquet(gaiaderive.ensure_derived(base))["distance_pc"],
+                               1000.0 / src["parallax"])
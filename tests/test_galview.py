@@ -0,0 +1,34 @@
+# VoxelIndex: query/density kaba kuvvet yarıçap testiyle aynı; GalacticView sabit örnek
+import numpy as np
+import pytest
+
+from transit_pipeline.galview import GalacticView, VoxelIndex
+
+
+@pytest.mark.parametrize("radius, center", [(20.0, (0.0, 0.0, 0.0)), (35.0, (10.0, -5.0, 3.0)), (1e3, (0, 0, 0))])
+def test_voxel_query_matches_brute_force(radius, center):
+    rng = np.random.default_rng(8)
+    pts = rng.normal(0.0, 25.0, (50000, 3))
+    pts[::97] = np.nan
+    index = VoxelIndex(*pts.T)
+    got = np.sort(index.ids[index.query(radius, center)])
+    # indeks float32 koordinatlarla çalışır; referans da aynı hassasiyette
+    p32 = pts.astype(np.float32) - np.asarray(center, dtype=np.float32)
+    with np.errstate(invalid="ignore"):
+        ref = np.flatnonzero(np.einsum("ij,ij->i", p32, p32) <= radius * radius)
+    np.testing.assert_array_equal(got, ref)
+    cen, cnt = index.density(radius, center)
+    assert cnt.sum() == ref.size
+
+
+def test_sample_mode_is_stable_and_bounded():
+    rng = np.random.default_rng(9)
+    pts = rng.normal(0.0, 25.0, (50000, 3))
+    view = GalacticView(*pts.T, max_points=2000)
+    xyz20, _, _, n20 = view.select(20.0)
+    xyz30, _, _, n30 = view.select(30.0)
+    assert n30 > n20 > 2000
+    assert len(xyz20) < 1.2 * 2000 and len(xyz30) < 1.2 * 2000
+    # sabit sıra: büyük kürede görünen iç yıldızlar küçük kürede de görünür (kaydırıcıda titreme yok)
+    inner = {tuple(p) for p in xyz30.tolist() if np.dot(p, p) <= 20.0 ** 2}
+    assert inner <= {tuple(p) for p in xyz20.tolist()}
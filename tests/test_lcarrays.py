@@ -0,0 +1,37 @@
+# LightCurveArrays: lightkurve stitch() ve lc_cache girdisi gidiş-dönüş
+import numpy as np
+import pytest
+
+lk = pytest.importorskip("lightkurve")
+
+from transit_pipeline.lcarrays import LightCurveArrays
+
+
+def noisy_series(days=30.0, cadence=0.0204, noise=1e-3, seed=1):
+    rng = np.random.default_rng(seed)
+    time = np.arange(0.0, days, cadence) + 130.0
+    return time, 1.0 + rng.normal(0.0, noise, time.size), np.full(time.size, noise)
+
+
+def test_from_collection_matches_stitch():
+    t, f, e = noisy_series()
+    parts = [lk.LightCurve(time=t[:500], flux=5 * f[:500], flux_err=5 * e[:500]),
+             lk.LightCurve(time=t[600:], flux=3 * f[600:], flux_err=3 * e[600:])]
+    stitched = lk.LightCurveCollection(parts).stitch()
+    arrays = LightCurveArrays.from_collection(parts)
+    np.testing.assert_array_equal(arrays.time, stitched.time.value)
+    # float32 akı
+    np.testing.assert_allclose(arrays.flux, stitched.flux.value, rtol=1e-6)
+    np.testing.assert_allclose(arrays.flux_err, stitched.flux_err.value, rtol=1e-6)
+    assert arrays.n_segments == 2
+
+
+def test_entry_round_trip():
+    t, f, e = noisy_series()
+    arrays = LightCurveArrays.from_collection([lk.LightCurve(time=t, flux=f, flux_err=e)], meta={"host": "X"})
+    back = LightCurveArrays.from_entry(arrays.to_entry({"mission": "TESS"}))
+    np.testing.assert_array_equal(back.time, arrays.time)
+    np.testing.assert_array_equal(back.flux, arrays.flux)
+    np.testing.assert_array_equal(back.flux_err, arrays.flux_err)
+    assert back.meta["host"] == "X" and back.meta["mission"] == "TESS"
+    assert back.n_segments == 1
@@ -0,0 +1,61 @@
+# photometry: aperture_sums lightkurve to_lightcurve(method="aperture") ve piksel döngüsüyle aynı
+import numpy as np
+import pytest
+
+lk = pytest.importorskip("lightkurve")
+
+from benchmarks.synthetic import make_target, simulate, write_tpf
+from transit_pipeline import photometry as ph
+
+
+@pytest.fixture(scope="module")
+def tpf(tmp_path_factory):
+    rng = np.random.default_rng(4)
+    target = make_target(0, rng, mission="Kepler")
+    (t, f, e, q), = simulate(target, rng, span=20.0)
+    path = tmp_path_factory.mktemp("tpf") / "synthetic_lpd-targ.fits"
+    return lk.read(str(write_tpf(str(path), target, 0, t, f, e, q, rng=rng)))
+
+
+def test_matches_lightkurve_aperture(tpf):
+    a = ph.tpf_arrays(tpf)
+    masks = [a["pipeline_mask"], np.ones_like(a["pipeline_mask"])]
+    flux, err = ph.aperture_sums(a["flux"], a["flux_err"], masks)
+    for k, mask in enumerate(masks):
+        lc = tpf.to_lightcurve(aperture_mask=mask)
+        # float32 toplam
+        np.testing.assert_allclose(flux[:, k], lc.flux.value, rtol=1e-6)
+        np.testing.assert_allclose(err[:, k], lc.flux_err.value, rtol=1e-6)
+
+
+def test_nan_pixels_match_loop(tpf):
+    a = ph.tpf_arrays(tpf)
+    cube = a["flux"].copy()
+    cube[5, 3, 3] = np.nan
+    cube[7] = np.nan
+    mask = a["pipeline_mask"]
+    flux, err = ph.aperture_sums(cube, a["flux_err"], [mask])
+    for i in range(cube.shape[0]):
+        px, pe = cube[i][mask], a["flux_err"][i][mask]
+        ok = np.isfinite(px)
+        if not ok.any():
+            assert np.isnan(flux[i, 0]) and np.isnan(err[i, 0])
+            continue
+        assert flux[i, 0] == pytest.approx(px[ok].astype(np.float64).sum(), rel=1e-6)
+        assert err[i, 0] == pytest.approx(np.sqrt((pe[ok].astype(np.float64) ** 2).sum()), rel=1e-6)
+
+
+def test_cdpp_ranks_like_estimate_cdpp():
+    # estimate_cdpp Savitzky–Golay (gürültünün bir kısmını da fit eder, düşük), cdpp kayan medyan ile
+    # detrend eder (medyan gürültüsü eklenir, yüksek); ikisi de beyaz gürültüde σ/sqrt(13) ölçeğinde
+    # ve açıklıkları aynı sıraya koyar
+    rng = np.random.default_rng(6)
+    t = np.arange(0.0, 30.0, 0.0204)
+    trend = 1.0 + 0.002 * np.sin(2 * np.pi * t / 40.0)     # pencereye göre yavaş (medyanın eğrilik sapması yok)
+    noise = [3e-4, 5e-4, 8e-4]
+    fluxes = np.column_stack([trend + rng.normal(0.0, s, t.size) for s in noise])
+    ours = ph.cdpp(fluxes)
+    ref = [lk.LightCurve(time=t, flux=f).estimate_cdpp().value for f in fluxes.T]
+    assert list(np.argsort(ours)) == list(np.argsort(ref)) == [0, 1, 2]
+    np.testing.assert_allclose(ours, np.array(noise) / np.sqrt(ph.CDPP_DURATION) * 1e6, rtol=0.2)
+    np.testing.assert_allclose(ref, np.array(noise) / np.sqrt(ph.CDPP_DURATION) * 1e6, rtol=0.2)
@@ -0,0 +1,56 @@
+# measure_ttv: enjekte edilen transit zamanları; linear_ephemeris ağırlıklı polyfit ile aynı
+import numpy as np
+import pytest
+
+from transit_pipeline import ttv
+
+P, T0, DUR, DEPTH, NOISE, CADENCE = 3.1, 131.37, 0.15, 0.003, 3e-4, 0.0204
+AMP = 5.0 / 1440.0      # 5 dk sinüs TTV
+
+
+def true_times(epochs):
+    return T0 + epochs * P + AMP * np.sin(2 * np.pi * epochs / 7.0)
+
+
+def injected(seed=3):
+    rng = np.random.default_rng(seed)
+    t = np.arange(0.0, 60.0, CADENCE) + 130.0
+    tc = true_times(np.round((t - T0) / P))
+    f = 1.0 - DEPTH * ttv.trapezoid(t - tc, DUR, 0.15 * DUR, CADENCE)
+    return t, f + rng.normal(0.0, NOISE, t.size)
+
+
+def test_recovers_injected_times():
+    t, f = injected()
+    res = ttv.measure_ttv(t, f, np.full(t.size, NOISE), period=P, t0=T0, duration=DUR)
+    ok = res["ok"]
+    assert ok.sum() == 19
+    pull = (res["tc"] - true_times(res["epoch"]))[ok] / res["tc_err"][ok]
+    assert np.abs(pull).max() < 4.0
+    assert 0.4 < np.sqrt(np.mean(pull ** 2)) < 2.0
+    assert res["period"] == pytest.approx(P, abs=3 * res["period_err"])
+    oc = ttv.oc_table(res)
+    assert list(oc.columns) == ttv.OC_COLUMNS
+    assert set(ttv.summary(res)) == set(ttv.SUMMARY_COLUMNS)
+
+
+def test_linear_ephemeris_matches_polyfit():
+    rng = np.random.default_rng(5)
+    epochs = np.arange(10)
+    err = 1e-3 * (1.0 + epochs / 10.0)
+    tc = T0 + epochs * P + rng.normal(0.0, 1e-3, epochs.size)
+    t0, period, t0_err, period_err = ttv.linear_ephemeris(epochs, tc, err)
+    coef, cov = np.polyfit(epochs, tc, 1, w=1.0 / err, cov="unscaled")
+    assert (period, t0) == pytest.approx(tuple(coef), rel=1e-12)
+    assert (period_err, t0_err) == pytest.approx(tuple(np.sqrt(np.diag(cov))), rel=1e-9)
+
+
+def test_trapezoid_exposure_average():
+    dt = np.linspace(-0.1, 0.1, 401)
+    smooth = ttv.trapezoid(dt, DUR, 0.15 * DUR, exposure=CADENCE)
+    # poz süresi boyunca kaba kuvvet ortalama
+    offs = (np.arange(2000) + 0.5) / 2000 * CADENCE - 0.5 * CADENCE
+    ref = np.mean([ttv.trapezoid(dt + o, DUR, 0.15 * DUR) for o in offs], axis=0)
+    # ingress ≈ poz süresi: ceil(3 × poz / ingress) = 3 alt örnek; şekil ~%1 içinde, alan korunur
+    np.testing.assert_allclose(smooth, ref, atol=0.02)
+    assert smooth.sum() == pytest.approx(ref.sum(), rel=1e-3)
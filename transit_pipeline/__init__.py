@@ -0,0 +1 @@
+# Transit-Analysis-Pipeline.py ve kepler_exoplanet_analysis.py'nin ortak yardımcı modülleri.
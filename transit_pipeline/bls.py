@@ -0,0 +1,205 @@
+# Kaba-ince (coarse-to-fine) BLS periyot arama motoru.
+#
+# lightkurve to_periodogram(method="bls") ile aynı periyot ızgarası kurulur
+# (astropy BoxLeastSquares.autoperiod: frekansta düzgün, adım
+# df = frequency_factor * min(süre) / baseline²). Kaba aşamada ızgaranın seyrek
+# bir alt kümesi NumPy ile değerlendirilir: her periyot için faz bir kez
+# binlenir, tüm süreler aynı kümülatif toplamlardan hesaplanır. Komşu noktalar
+# arasındaki faz kayması (baseline * df * P) periyotla büyüdüğünden adım yerel
+# seçilir: iki kaba nokta arasında biriken kayma en kısa sürenin
+# `max_smear_frac` katını geçmez. En iyi `n_peaks` tepe çevresi astropy
+# BoxLeastSquares ile tam ızgarada yeniden hesaplanır; böylece
+# period_at_max_power lightkurve'ün bulduğu değerle aynı ızgara noktası olur.
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DEFAULT_DURATIONS = (0.05, 0.10, 0.15, 0.20, 0.25, 0.33)
+# kaba aşamada bir seferde binlenecek (periyot × nokta) hücresi
+CHUNK_CELLS = 4_000_000
+
+
+class BLSResult:
+    __slots__ = ("period", "power", "period_at_max_power", "power_at_max_power",
+                 "duration_at_max_power", "transit_time_at_max_power", "depth_at_max_power",
+                 "n_grid", "n_evaluated")
+
+    def __init__(self, **kw):
+        for k in self.__slots__:
+            setattr(self, k, kw.get(k))
+
+    def __repr__(self):
+        return (f"BLSResult(period_at_max_power={self.period_at_max_power!r}, "
+                f"evaluated={self.n_evaluated}/{self.n_grid})")
+
+
+def lightkurve_period_grid(time, minimum_period, maximum_period,
+                           duration=DEFAULT_DURATIONS, frequency_factor=10):
+    # lightkurve BoxLeastSquaresPeriodogram.from_lightcurve -> astropy autoperiod ile aynı ızgara
+    baseline = np.nanmax(time) - np.nanmin(time)
+    df = frequency_factor * np.min(duration) / baseline ** 2
+    if maximum_period < minimum_period:
+        minimum_period, maximum_period = maximum_period, minimum_period
+    fmin, fmax = 1.0 / maximum_period, 1.0 / minimum_period
+    nf = 1 + int(np.round((fmax - fmin) / df))
+    return 1.0 / (fmax - df * np.arange(nf))
+
+
+def _clean(time, flux, flux_err):
+    time = np.asarray(time, dtype=np.float64)
+    flux = np.asarray(flux, dtype=np.float64)
+    ok = np.isfinite(time) & np.isfinite(flux)
+    if flux_err is not None:
+        flux_err = np.asarray(flux_err, dtype=np.float64)
+        if np.all(np.isfinite(flux_err[ok]) & (flux_err[ok] > 0)):
+            return time[ok], flux[ok], flux_err[ok]
+    return time[ok], flux[ok], None
+
+
+def coarse_power(time, flux, flux_err, periods, duration=DEFAULT_DURATIONS, bins_per_duration=2):
+    """
+    Ağırlıklı BLS log-olabilirlik gücü (astropy objective="likelihood" ile aynı formül:
+    0.5 * s^2 * W / (W_in * W_out)), yalnız derinliği pozitif (dip) kutular.
+    """
+    w = np.ones_like(flux) if flux_err is None else 1.0 / flux_err ** 2
+    W = w.sum()
+    r = (flux - (w * flux).sum() / W) * w
+    duration = np.asarray(duration, dtype=np.float64)
+    bin_t = duration.min() / bins_per_duration
+    n = time.size
+    t = time - time.min()
+    out = np.empty(periods.size)
+    chunk = max(1, CHUNK_CELLS // max(n, 1))
+    for lo in range(0, periods.size, chunk):
+        P = periods[lo:lo + chunk]
+        k = P.size
+        nb = int(np.ceil(P.max() / bin_t))
+        # faz bir kez binlenir ...
+        idx = ((np.mod(t[None, :], P[:, None]) / P[:, None]) * nb).astype(np.int64)
+        np.minimum(idx, nb - 1, out=idx)
+        gidx = (idx + (np.arange(k) * nb)[:, None]).ravel()
+        sw = np.bincount(gidx, weights=np.broadcast_to(w, (k, n)).ravel(), minlength=k * nb).reshape(k, nb)
+        sr = np.bincount(gidx, weights=np.broadcast_to(r, (k, n)).ravel(), minlength=k * nb).reshape(k, nb)
+        # ... ve tüm süreler aynı (faz sarmalı) kümülatif toplamlardan okunur
+        maxw = int(np.ceil(duration.max() / P.min() * nb)) + 1
+        maxw = min(maxw, nb)
+        cw = np.concatenate([np.zeros((k, 1)), np.cumsum(np.concatenate([sw, sw[:, :maxw]], axis=1), axis=1)], axis=1)
+        cr = np.concatenate([np.zeros((k, 1)), np.cumsum(np.concatenate([sr, sr[:, :maxw]], axis=1), axis=1)], axis=1)
+        best = np.zeros(k)
+        starts = np.arange(nb)
+        for d in duration:
+            width = np.clip(np.rint(d / P * nb).astype(np.int64), 1, maxw)
+            end = starts[None, :] + width[:, None]
+            wi = np.take_along_axis(cw, end, axis=1) - cw[:, :nb]
+            si = np.take_along_axis(cr, end, axis=1) - cr[:, :nb]
+            wo = W - wi
+            with np.errstate(invalid="ignore", divide="ignore"):
+                p = np.where((wi > 0) & (wo > 0) & (si < 0), 0.5 * si ** 2 * W / (wi * wo), 0.0)
+            np.maximum(best, p.max(axis=1), out=best)
+        out[lo:lo + k] = best
+    return out
+
+
+def _grid_step(time, periods):
+    # her noktadan bir sonrakine baseline boyunca biriken faz kayması (gün) = baseline * |d(1/P)| * P
+    if periods.size < 2:
+        return np.full(periods.size, np.inf)
+    baseline = time.max() - time.min()
+    step = baseline * np.abs(np.diff(1.0 / periods)) * periods[:-1]
+    return np.r_[step, step[-1]]
+
+
+def _coarse_indices(step, limit):
+    # biriken kayma `limit`'i her aştığında bir kaba nokta; son nokta her zaman dahil
+    drift = np.r_[0.0, np.cumsum(step[:-1])]
+    idx = np.flatnonzero(np.r_[True, np.diff(np.floor(drift / limit)) > 0])
+    if idx[-1] != step.size - 1:
+        idx = np.r_[idx, step.size - 1]
+    return idx
+
+
+def _exact(time, flux, flux_err, periods, duration):
+    from astropy.timeseries import BoxLeastSquares
+    return BoxLeastSquares(time, flux, dy=flux_err).power(periods, duration, objective="likelihood")
+
+
+def fast_bls(time, flux, flux_err=None, minimum_period=0.5, maximum_period=None,
+             duration=DEFAULT_DURATIONS, frequency_factor=10, n_peaks=5,
+             prior_period=None, prior_window=0.1, max_smear_frac=0.5):
+    """
+    prior_period verilirse ızgara [prior_period - prior_window, prior_period + prior_window]
+    aralığına daraltılır (katalog periyodu etrafında arama).
+    """
+    time, flux, flux_err = _clean(time, flux, flux_err)
+    if maximum_period is None:
+        maximum_period = (time.max() - time.min()) / 3.0
+    grid = lightkurve_period_grid(time, minimum_period, maximum_period, duration, frequency_factor)
+    n_grid = grid.size
+    if prior_period is not None:
+        grid = grid[(grid >= prior_period - prior_window) & (grid <= prior_period + prior_window)]
+    if grid.size == 0:
+        raise ValueError("Periyot ızgarası boş (minimum/maximum_period veya prior'ı kontrol et)")
+
+    step = _grid_step(time, grid)
+    coarse_idx = _coarse_indices(step, 2 * max_smear_frac * np.min(duration))
+    # ortalama adım 2'den küçükse (ör. frequency_factor=10000 gibi seyrek ızgaralar) kaba aşama kazandırmaz
+    windows = None
+    if grid.size >= 2 * coarse_idx.size:
+        cp = coarse_power(time, flux, flux_err, grid[coarse_idx], duration)
+        # yerel maksimumlar arasından en güçlü n_peaks tepe
+        is_peak = np.r_[True, cp[1:] >= cp[:-1]] & np.r_[cp[:-1] >= cp[1:], True]
+        cand = np.flatnonzero(is_peak)
+        cand = cand[np.argsort(cp[cand])[::-1][:n_peaks]]
+        # tam arama penceresi komşu kaba noktaları ve tepe genişliğini (~ en uzun süre / yerel adım) kapsar
+        windows = []
+        for c in cand:
+            j = coarse_idx[c]
+            width = int(np.ceil(np.max(duration) / step[j]))
+            lo = min(coarse_idx[max(c - 1, 0)], j - width)
+            hi = max(coarse_idx[min(c + 1, coarse_idx.size - 1)], j + width)
+            windows.append(np.arange(max(0, lo), min(grid.size, hi + 1)))
+        evaluated = np.unique(np.concatenate(windows))
+        if evaluated.size > grid.size // 2:
+            windows = None
+    if windows is None:
+        res = _exact(time, flux, flux_err, grid, duration)
+        power = np.asarray(res.power)
+        evaluated = np.arange(grid.size)
+    else:
+        res = _exact(time, flux, flux_err, grid[evaluated], duration)
+        # çizim için: kaba güç (ölçek aynı) + tam değerlendirilen pencereler
+        power = np.full(grid.size, np.nan)
+        power[coarse_idx] = cp
+        power[evaluated] = np.asarray(res.power)
+        power = np.interp(np.arange(grid.size), np.flatnonzero(np.isfinite(power)),
+                          power[np.isfinite(power)])
+
+    i = int(np.argmax(np.asarray(res.power)))
+    return BLSResult(
+        period=grid, power=power,
+        period_at_max_power=float(np.asarray(res.period)[i]),
+        power_at_max_power=float(np.asarray(res.power)[i]),
+        duration_at_max_power=float(np.asarray(res.duration)[i]),
+        transit_time_at_max_power=float(np.asarray(res.transit_time)[i]),
+        depth_at_max_power=float(np.asarray(res.depth)[i]),
+        n_grid=n_grid, n_evaluated=int(evaluated.size),
+    )
+
+
+def _fast_bls_job(args):
+    series, kw = args
+    try:
+        return fast_bls(*series, **kw)
+    except Exception as e:
+        return e
+
+
+def fast_bls_many(series, workers=None, **kw):
+    """series: [(time, flux, flux_err), ...] (ör. çeyrekler); sonuçlar aynı sırada, hata ise exception nesnesi."""
+    series = list(series)
+    workers = workers or min(len(series), os.cpu_count() or 1)
+    if workers <= 1 or len(series) <= 1:
+        return [_fast_bls_job((s, kw)) for s in series]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(_fast_bls_job, [(s, kw) for s in series]))
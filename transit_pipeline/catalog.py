@@ -0,0 +1,176 @@
+# pscomppars tablosunun yerel, indeksli kopyası.
+#
+# Gezegen başına NasaExoplanetArchive sorgusu yerine tablo tek seferde çekilip
+# SQLite'a yazılır; aramalar bellekteki sözlüklerden O(1) yapılır. İnterneti
+# olmayan compute node'larında önceden hazırlanmış snapshot dosyası kullanılır:
+#
+#   python -m transit_pipeline.catalog --db /arf/scratch/.../pscomppars.sqlite
+import os
+import re
+import time
+import sqlite3
+import argparse
+import threading
+
+import numpy as np
+
+CATALOG_TABLE = "pscomppars"
+# Transit-Analysis-Pipeline.py + kepler_exoplanet_analysis.py'nin kullandığı sütunlar
+CATALOG_COLUMNS = [
+    "pl_name", "hostname", "pl_orbper", "pl_tranmid", "pl_trandur",
+    "st_teff", "st_rad", "st_mass", "sy_dist", "sy_vmag", "sy_gaiamag",
+]
+_TEXT_COLUMNS = {"pl_name", "hostname"}
+
+
+def normalize_name(name) -> str:
+    return re.sub(r"\s+", " ", str(name)).strip().lower()
+
+
+def _plain(v):
+    # astropy/numpy değerini sqlite'a yazılabilir python tipine çevir
+    if v is None or np.ma.is_masked(v):
+        return None
+    v = getattr(v, "value", v)
+    if isinstance(v, (bytes, np.bytes_)):
+        v = v.decode("utf-8", errors="ignore")
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and np.isnan(v):
+        return None
+    return v
+
+
+def fetch_catalog(columns=CATALOG_COLUMNS):
+    try:
+        from astroquery.ipac.nexsci.nasa_exoplanet_archive import NasaExoplanetArchive
+    except Exception:
+        from astroquery.nasa_exoplanet_archive import NasaExoplanetArchive
+    tbl = NasaExoplanetArchive.query_criteria(table=CATALOG_TABLE, select=",".join(columns))
+    cols = [c for c in columns if c in tbl.colnames]
+    return [{c: _plain(r[c]) for c in cols} for r in tbl]
+
+
+class CatalogIndex:
+    """pl_name ve hostname anahtarlı yerel katalog; max_age_days'ten eskiyse yenilenir."""
+
+    def __init__(self, path, max_age_days=7.0, columns=CATALOG_COLUMNS, offline=False):
+        self.path = str(path)
+        self.max_age_days = max_age_days
+        self.columns = list(columns)
+        self.offline = offline
+        self._by_name = None
+        self._by_host = None
+        self._lock = threading.RLock()
+
+    # --- snapshot ---
+    def fetched_at(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with sqlite3.connect(self.path) as con:
+                row = con.execute("SELECT value FROM meta WHERE key = 'fetched_at'").fetchone()
+            return float(row[0]) if row else None
+        except sqlite3.Error:
+            return None
+
+    def is_fresh(self) -> bool:
+        ts = self.fetched_at()
+        if ts is None:
+            return False
+        if self.max_age_days is None:
+            return True
+        return (time.time() - ts) < self.max_age_days * 86400.0
+
+    def write(self, records):
+        # önce geçici dosyaya yaz, sonra yerine taşı: okuyan süreçler yarım snapshot görmez
+        tmp = f"{self.path}.tmp{os.getpid()}"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        coldefs = ", ".join(f"{c} {'TEXT' if c in _TEXT_COLUMNS else 'REAL'}" for c in self.columns)
+        con = sqlite3.connect(tmp)
+        try:
+            con.execute(f"CREATE TABLE planets (name_key TEXT PRIMARY KEY, host_key TEXT, {coldefs})")
+            con.execute("CREATE INDEX planets_host ON planets (host_key)")
+            con.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            placeholders = ", ".join("?" * (len(self.columns) + 2))
+            con.executemany(
+                f"INSERT OR REPLACE INTO planets VALUES ({placeholders})",
+                [(normalize_name(r.get("pl_name")),
+                  normalize_name(r.get("hostname")) if r.get("hostname") is not None else None,
+                  *[r.get(c) for c in self.columns]) for r in records if r.get("pl_name")]
+            )
+            con.execute("INSERT INTO meta VALUES ('fetched_at', ?)", (str(time.time()),))
+            con.commit()
+        finally:
+            con.close()
+        os.replace(tmp, self.path)
+        with self._lock:
+            self._by_name = self._by_host = None
+
+    def refresh(self, fetch=fetch_catalog):
+        self.write(fetch(self.columns))
+
+    def ensure(self):
+        # offline modda yaşına bakılmaksızın mevcut snapshot kullanılır
+        if self.offline:
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(f"Katalog snapshot'ı yok: {self.path}")
+            return
+        if not self.is_fresh():
+            self.refresh()
+
+    # --- arama ---
+    def _load(self):
+        with self._lock:
+            if self._by_name is not None:
+                return
+            self.ensure()
+            by_name, by_host = {}, {}
+            with sqlite3.connect(self.path) as con:
+                cur = con.execute("SELECT * FROM planets")
+                names = [d[0] for d in cur.description]
+                for row in cur:
+                    rec = dict(zip(names, row))
+                    name_key = rec.pop("name_key")
+                    host_key = rec.pop("host_key")
+                    by_name[name_key] = rec
+                    if host_key is not None:
+                        by_host.setdefault(host_key, []).append(rec)
+            self._by_name, self._by_host = by_name, by_host
+
+    def get(self, pl_name):
+        self._load()
+        rec = self._by_name.get(normalize_name(pl_name))
+        return dict(rec) if rec is not None else None
+
+    def by_host(self, hostname):
+        self._load()
+        return [dict(r) for r in self._by_host.get(normalize_name(hostname), [])]
+
+    def records(self):
+        self._load()
+        return [dict(r) for r in self._by_name.values()]
+
+    def __len__(self):
+        self._load()
+        return len(self._by_name)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="pscomppars tablosunu yerel SQLite snapshot'ına çek")
+    ap.add_argument("--db", required=True, help="snapshot dosyası (ör. pscomppars.sqlite)")
+    ap.add_argument("--max-age-days", type=float, default=0.0,
+                    help="snapshot bundan yeniyse yeniden çekme (0: her zaman çek)")
+    args = ap.parse_args(argv)
+    idx = CatalogIndex(args.db, max_age_days=args.max_age_days)
+    if args.max_age_days > 0 and idx.is_fresh():
+        print(f"Snapshot güncel: {args.db}")
+    else:
+        idx.refresh()
+    print(f"{len(idx)} gezegen -> {args.db}")
+
+
+if __name__ == "__main__":
+    main()
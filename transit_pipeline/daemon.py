@@ -0,0 +1,277 @@
+# Uzun ömürlü (sıcak) worker: hedef adlarını yerel soket ya da kuyruk klasöründen alır.
+#
+# Her CLI çağrısı/worker süreci import (lightkurve, astropy ...), katalog açma ve önbellek
+# kurulumunu yeniden öder; tek hedef için bu saniyeler sürer. Sıcak worker bunları bir kez yapar,
+# sonra gelen her hedef yalnızca kendi işinin süresini öder (güncel hedefin atlanması milisaniye).
+#
+# Soket protokolü (AF_UNIX, satır başına bir JSON):
+#   istemci -> {"targets": ["Kepler-10 b", {"pl_name": ..., "pl_orbper": ...}, ...]}
+#   worker  -> hedef bittikçe {"target": ..., "status": ..., "seconds": ...}, sonda {"done": true, ...}
+#   {"cmd": "ping"} | {"cmd": "stats"} | {"cmd": "stop"}
+#
+# Kuyruk klasörü (soket olmayan ortamlar, ortak dosya sistemi; maildir düzeni):
+#   <spool>/tmp/<id>.json  -> <spool>/new/<id>.json   istemci yazar, atomik rename ile bırakır
+#   <spool>/cur/<id>.json                             worker rename ile sahiplenir (tek worker alır)
+#   <spool>/done/<id>.jsonl                           hedef başına sonuç satırları (atomik)
+#
+#   worker = WarmWorker(handle, socket_path="worker.sock", spool_dir="spool", workers=8)
+#   worker.serve_forever()
+#   for res in submit("worker.sock", ["Kepler-10 b"]): print(res)
+import os
+import json
+import time
+import uuid
+import signal
+import socket
+import threading
+import socketserver
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+POLL_S = 1.0          # kuyruk klasörü tarama aralığı
+CONNECT_TIMEOUT = 2.0
+
+
+def _target_label(target):
+    if isinstance(target, dict):
+        return str(target.get("pl_name") or target.get("planet") or "")
+    return str(target)
+
+
+class WarmWorker:
+    """
+    handle(target) -> sonuç dict'i (ör. {"planet": ..., "status": ...}). Hedefler workers iş
+    parçacıklı ortak havuzda çalışır; soket ve kuyruk istekleri aynı havuzu paylaşır.
+    """
+
+    def __init__(self, handle, socket_path=None, spool_dir=None, workers=1, poll_s=POLL_S, on_event=None):
+        if not socket_path and not spool_dir:
+            raise ValueError("socket_path ya da spool_dir gerekli")
+        self.handle = handle
+        self.socket_path = str(socket_path) if socket_path else None
+        self.spool_dir = str(spool_dir) if spool_dir else None
+        self.workers = max(1, int(workers))
+        self.poll_s = float(poll_s)
+        self.on_event = on_event
+        self.started = time.time()
+        self.counts = {}
+        self._counts_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pool = None
+        self._server = None
+
+    # ---- hedef çalıştırma ----
+    def _run_one(self, target):
+        start = time.perf_counter()
+        try:
+            res = dict(self.handle(target) or {})
+        except Exception as e:
+            res = {"status": "error", "error": repr(e)}
+        res.setdefault("target", _target_label(target))
+        res.setdefault("status", "ok")
+        res["seconds"] = round(time.perf_counter() - start, 4)
+        with self._counts_lock:
+            self.counts[res["status"]] = self.counts.get(res["status"], 0) + 1
+        return res
+
+    def run_targets(self, targets):
+        """Sonuçları bittikçe üretir."""
+        futures = [self._pool.submit(self._run_one, t) for t in targets]
+        for f in as_completed(futures):
+            yield f.result()
+
+    def stats(self):
+        with self._counts_lock:
+            counts = dict(self.counts)
+        return {"pid": os.getpid(), "uptime_s": round(time.time() - self.started, 1), "workers": self.workers,
+                "socket": self.socket_path, "spool": self.spool_dir, "counts": counts}
+
+    def _event(self, rec):
+        if self.on_event is not None:
+            try:
+                self.on_event(rec)
+            except Exception:
+                pass
+
+    # ---- soket ----
+    def _make_server(self):
+        worker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                try:
+                    req = json.loads(line)
+                except ValueError:
+                    self._send({"error": "geçersiz istek"})
+                    return
+                cmd = req.get("cmd")
+                if cmd == "ping":
+                    self._send({"pong": True, "pid": os.getpid()})
+                elif cmd == "stats":
+                    self._send(worker.stats())
+                elif cmd == "stop":
+                    self._send({"stopping": True})
+                    worker.shutdown()
+                else:
+                    targets = list(req.get("targets") or [])
+                    start = time.perf_counter()
+                    worker._event({"status": "worker_request", "source": "socket", "targets": len(targets)})
+                    for res in worker.run_targets(targets):
+                        self._send(res)
+                    self._send({"done": True, "n": len(targets), "seconds": round(time.perf_counter() - start, 4)})
+
+            def _send(self, rec):
+                try:
+                    self.wfile.write((json.dumps(rec, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                except OSError:
+                    pass    # istemci bağlantıyı kapattı; hedefler yine de işlenir
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        _clear_stale_socket(self.socket_path)
+        d = os.path.dirname(self.socket_path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        return Server(self.socket_path, Handler)
+
+    # ---- kuyruk klasörü ----
+    def _spool_loop(self):
+        for sub in ("tmp", "new", "cur", "done"):
+            os.makedirs(os.path.join(self.spool_dir, sub), exist_ok=True)
+        while not self._stop.is_set():
+            for name in sorted(os.listdir(os.path.join(self.spool_dir, "new"))):
+                if self._stop.is_set():
+                    break
+                if name.endswith(".json"):
+                    self._spool_job(name)
+            self._stop.wait(self.poll_s)
+
+    def _spool_job(self, name):
+        new = os.path.join(self.spool_dir, "new", name)
+        cur = os.path.join(self.spool_dir, "cur", name)
+        try:
+            os.rename(new, cur)      # başka worker aldıysa FileNotFoundError
+        except OSError:
+            return
+        try:
+            with open(cur, encoding="utf-8") as f:
+                targets = json.load(f).get("targets") or []
+        except (OSError, ValueError) as e:
+            targets, results = [], [{"status": "error", "error": f"okunamadı: {e!r}"}]
+        else:
+            self._event({"status": "worker_request", "source": "spool", "job": name, "targets": len(targets)})
+            results = list(self.run_targets(targets))
+        out = os.path.join(self.spool_dir, "done", name[:-len(".json")] + ".jsonl")
+        tmp = f"{out}.tmp.{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for res in results:
+                f.write(json.dumps(res, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp, out)
+        try:
+            os.remove(cur)
+        except OSError:
+            pass
+
+    # ---- yaşam döngüsü ----
+    def serve_forever(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="warm-worker")
+        threads = []
+        try:
+            if self.spool_dir:
+                threads.append(threading.Thread(target=self._spool_loop, name="spool", daemon=True))
+            if self.socket_path:
+                self._server = self._make_server()
+                threads.append(threading.Thread(target=self._server.serve_forever, name="socket", daemon=True))
+            if threading.current_thread() is threading.main_thread():
+                for sig in (signal.SIGTERM, signal.SIGINT):
+                    signal.signal(sig, lambda *_: self.shutdown())
+            for t in threads:
+                t.start()
+            self._event({"status": "worker_start", **self.stats()})
+            while not self._stop.wait(0.5):
+                pass
+        finally:
+            self._stop.set()
+            if self._server is not None:
+                self._server.shutdown()
+                self._server.server_close()
+                try:
+                    os.remove(self.socket_path)
+                except OSError:
+                    pass
+            for t in threads:
+                t.join(timeout=5)
+            self._pool.shutdown(wait=True)
+            self._event({"status": "worker_stop", **self.stats()})
+
+    def shutdown(self):
+        self._stop.set()
+
+
+def _clear_stale_socket(path):
+    # önceki worker düzgün kapanmadıysa dosya kalır; dinleyen varsa ikinci worker başlatılmaz
+    if not os.path.exists(path):
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(CONNECT_TIMEOUT)
+            s.connect(path)
+    except OSError:
+        os.remove(path)
+        return
+    raise RuntimeError(f"{path} üzerinde çalışan bir worker var")
+
+
+# ---- istemci ----
+def request(socket_path, req, timeout=None):
+    """İsteği gönderir, yanıt satırlarını (dict) üretir."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(CONNECT_TIMEOUT)
+        s.connect(str(socket_path))
+        s.settimeout(timeout)
+        s.sendall((json.dumps(req, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+        with s.makefile("r", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def submit(socket_path, targets, timeout=None):
+    """Hedef sonuçlarını bittikçe üretir; son satır {"done": true, ...}."""
+    yield from request(socket_path, {"targets": list(targets)}, timeout)
+
+
+def ping(socket_path):
+    try:
+        return next(request(socket_path, {"cmd": "ping"}, CONNECT_TIMEOUT), {}).get("pong", False)
+    except OSError:
+        return False
+
+
+def stop(socket_path):
+    return next(request(socket_path, {"cmd": "stop"}, CONNECT_TIMEOUT), {})
+
+
+def spool_submit(spool_dir, targets):
+    """Hedefleri kuyruk klasörüne bırakır; iş kimliğini döndürür."""
+    job = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    for sub in ("tmp", "new"):
+        os.makedirs(os.path.join(spool_dir, sub), exist_ok=True)
+    tmp = os.path.join(spool_dir, "tmp", f"{job}.json")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"targets": list(targets), "submitted": time.time()}, f, ensure_ascii=False, default=str)
+    os.rename(tmp, os.path.join(spool_dir, "new", f"{job}.json"))
+    return job
+
+
+def spool_results(spool_dir, job, wait_s=None, poll_s=POLL_S):
+    """İşin sonuç satırları; wait_s kadar bekler (None: sonsuz, 0: beklemez), hazır değilse None."""
+    path = os.path.join(spool_dir, "done", f"{job}.jsonl")
+    deadline = None if wait_s is None else time.time() + wait_s
+    while not os.path.exists(path):
+        if deadline is not None and time.time() >= deadline:
+            return None
+        time.sleep(poll_s)
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
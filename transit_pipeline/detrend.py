@@ -0,0 +1,213 @@
+# Transit maskeli, sağlam (robust) kayan pencere detrend.
+#
+# lightkurve flatten() (Savitzky–Golay) transit noktalarını da fit eder: trend transit içinde
+# aşağı çekilir, bölünmüş akıda derinlik küçülür. Burada:
+# - host'un bilinen tüm gezegenlerinin (katalog P/t0/süre) transitleri tek maskede birleşir,
+#   maskeli noktalar trend tahminine girmez (trend transit boyunca komşulardan gelir)
+# - seri boşluklarda (çeyrek/sektör arası, veri indirme boşlukları) segmentlere bölünür,
+#   pencere segment sınırını aşmaz
+# - konum tahmini medyan, Tukey biweight ya da sigma kırpmalı kübik spline
+# - pencere her noktada değil düğüm noktalarında (pencere/KNOT_DIVISOR aralıklı) hesaplanır,
+#   aradaki noktalara doğrusal ara değer: 4 yıllık Kepler serisinde flatten'den hızlı
+#
+#   mask = transit_mask(t, [(P, t0, süre_gün), ...])
+#   trend = robust_trend(t, flux, window_days=1.0, method="biweight", mask=mask)
+#   flat = flux / trend
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+METHODS = ("median", "biweight", "spline")
+GAP_DAYS = 0.5            # bundan uzun boşluk yeni segment başlatır
+KNOT_DIVISOR = 16         # pencere başına düğüm sayısı (trend pencereden kısa ölçekte değişmez)
+MIN_VALID = 0.2           # penceredeki maskesiz nokta oranı bundan azsa düğüm atlanır (komşulardan ara değer)
+BIWEIGHT_C = 5.0          # Tukey biweight ayar sabiti (MAD biriminde)
+BIWEIGHT_ITER = 5
+SPLINE_SIGMA = 3.0
+SPLINE_ITER = 3
+BATCH_CELLS = 4_000_000   # bir seferde işlenen (düğüm × pencere) hücresi; bellek sınırı
+
+
+def default_duration(period):
+    """Süresi bilinmeyen gezegen için kaba transit süresi (gün): Güneş benzeri yıldız, b=0."""
+    return float(np.clip(13.0 / 24.0 * (period / 365.0) ** (1.0 / 3.0), 1.0 / 24.0, 0.75))
+
+
+def transit_mask(time, ephemerides, pad=1.5):
+    """
+    ephemerides: [(period, t0, süre_gün), ...] — time ile aynı zaman sisteminde.
+    True: herhangi bir gezegenin transitinin pad × süre genişliğindeki penceresi içinde.
+    """
+    time = np.asarray(time, dtype=np.float64)
+    mask = np.zeros(time.shape, dtype=bool)
+    for period, t0, dur in ephemerides:
+        if not period or not np.isfinite(period) or period <= 0 or t0 is None or not np.isfinite(t0):
+            continue
+        dur = dur if dur is not None and np.isfinite(dur) and dur > 0 else default_duration(period)
+        half = 0.5 * period
+        phase = np.mod(time - t0 + half, period) - half
+        mask |= np.abs(phase) < 0.5 * pad * dur
+    return mask
+
+
+def segments(time, gap_days=GAP_DAYS):
+    """Artan sıralı time için [(başlangıç, bitiş), ...] indeks aralıkları (bitiş hariç)."""
+    if time.size == 0:
+        return []
+    cuts = np.flatnonzero(np.diff(time) > gap_days) + 1
+    bounds = np.r_[0, cuts, time.size]
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def _row_median(win, n):
+    """Satır medyanları; n: satırdaki sonlu değer sayısı (>0). NaN'lar sıralamada sona gider."""
+    s = np.sort(win, axis=1)
+    r = np.arange(win.shape[0])
+    return 0.5 * (s[r, (n - 1) // 2] + s[r, n // 2])
+
+
+def _biweight(win, loc, n):
+    d = win - loc[:, None]
+    mad = _row_median(np.abs(d), n)
+    scale = BIWEIGHT_C * np.where(mad > 0, mad, np.inf)
+    for _ in range(BIWEIGHT_ITER):
+        d = win - loc[:, None]
+        u = d / scale[:, None]
+        w = np.where(np.abs(u) < 1.0, (1.0 - u * u) ** 2, 0.0)     # NaN -> 0 ağırlık
+        sw = w.sum(axis=1)
+        step = np.divide(np.nansum(w * d, axis=1), sw, out=np.zeros_like(sw), where=sw > 0)
+        loc = loc + step
+    return loc
+
+
+def _window_locations(grid, width, centers, method):
+    """Düğüm merkezli pencerelerde konum (geçersiz düğümde NaN)."""
+    half = width // 2
+    padded = np.pad(grid, half, constant_values=np.nan)
+    view = sliding_window_view(padded, width)
+    out = np.full(centers.size, np.nan)
+    min_n = max(3, int(MIN_VALID * width))
+    rows = max(1, BATCH_CELLS // width)
+    for s in range(0, centers.size, rows):
+        win = view[centers[s:s + rows]]
+        n = np.isfinite(win).sum(axis=1)
+        ok = n >= min_n
+        if not ok.any():
+            continue
+        win, n = win[ok], n[ok]
+        loc = _row_median(win, n)
+        if method == "biweight":
+            loc = _biweight(win, loc, n)
+        out[s:s + rows][ok] = loc
+    return out
+
+
+def _segment_trend(t, f, ok, window_days, method):
+    n_ok = int(ok.sum())
+    if n_ok == 0:
+        return np.full(t.size, np.nan)
+    if n_ok < 3 or t[-1] - t[0] <= 0:
+        return np.full(t.size, np.nanmedian(f[ok]))
+    # düzgün kadans ızgarası: indeks penceresi = zaman penceresi (eksik kadanslar NaN)
+    dt = np.diff(t)
+    cadence = float(np.median(dt[dt > 0])) if (dt > 0).any() else (t[-1] - t[0])
+    n_grid = int(round((t[-1] - t[0]) / cadence)) + 1
+    if n_grid > 4 * t.size:     # çok düzensiz örnekleme: ortalama aralık
+        cadence = (t[-1] - t[0]) / (t.size - 1)
+        n_grid = t.size
+    idx = np.clip(np.rint((t - t[0]) / cadence).astype(np.int64), 0, n_grid - 1)
+    grid = np.full(n_grid, np.nan)
+    grid[idx[ok]] = f[ok]
+    width = int(round(window_days / cadence)) | 1
+    width = max(3, min(width, n_grid if n_grid % 2 else n_grid - 1))
+    step = max(1, width // KNOT_DIVISOR)
+    centers = np.unique(np.r_[np.arange(0, n_grid, step), n_grid - 1])
+    loc = _window_locations(grid, width, centers, method)
+    good = np.isfinite(loc)
+    if not good.any():
+        return np.full(t.size, np.nanmedian(f[ok]))
+    return np.interp(t, t[0] + centers[good] * cadence, loc[good])
+
+
+def _spline_trend(t, f, ok, window_days):
+    from scipy.interpolate import LSQUnivariateSpline
+    use = ok.copy()
+    trend = None
+    for _ in range(SPLINE_ITER):
+        tu = t[use]
+        if tu.size < 8:
+            return None
+        knots = np.arange(tu[0] + window_days, tu[-1] - 0.5 * window_days, window_days)
+        # boş aralığın sonundaki düğüm atılır (Schoenberg–Whitney koşulu)
+        if knots.size:
+            pos = np.searchsorted(tu, knots)
+            knots = knots[np.diff(np.r_[0, pos]) >= 4]
+        try:
+            trend = LSQUnivariateSpline(tu, f[use], knots, k=3)(t)
+        except ValueError:
+            return None
+        resid = f - trend
+        sigma = 1.4826 * np.nanmedian(np.abs(resid[use] - np.nanmedian(resid[use])))
+        if not np.isfinite(sigma) or sigma == 0:
+            break
+        new = ok & (np.abs(resid) < SPLINE_SIGMA * sigma)
+        if np.array_equal(new, use):
+            break
+        use = new
+    return trend
+
+
+def robust_trend(time, flux, window_days, method="biweight", mask=None, gap_days=GAP_DAYS):
+    """
+    time'a hizalı trend dizisi. mask True olan (transit) ve sonlu olmayan noktalar tahmine girmez.
+    method: "median" | "biweight" | "spline". Segment başına hesaplanır (gap_days'ten uzun boşluk).
+    """
+    if method not in METHODS:
+        raise ValueError(f"bilinmeyen detrend yöntemi: {method!r} (seçenekler: {', '.join(METHODS)})")
+    t = np.asarray(time, dtype=np.float64)
+    f = np.asarray(flux, dtype=np.float64)
+    order = None
+    if t.size > 1 and (np.diff(t) < 0).any():
+        order = np.argsort(t, kind="stable")
+        t, f = t[order], f[order]
+        mask = np.asarray(mask, dtype=bool)[order] if mask is not None else None
+    ok = np.isfinite(t) & np.isfinite(f)
+    if mask is not None:
+        ok &= ~np.asarray(mask, dtype=bool)
+    trend = np.empty(t.size)
+    for a, b in segments(t, gap_days):
+        seg = None
+        if method == "spline":
+            seg = _spline_trend(t[a:b], f[a:b], ok[a:b], window_days)
+        if seg is None:     # spline kurulamadı (kısa segment): biweight
+            seg = _segment_trend(t[a:b], f[a:b], ok[a:b], window_days, "median" if method == "median" else "biweight")
+        trend[a:b] = seg
+    if order is not None:
+        out = np.empty_like(trend)
+        out[order] = trend
+        return out
+    return trend
+
+
+def detrend(time, flux, flux_err=None, window_days=1.0, method="biweight", mask=None, gap_days=GAP_DAYS):
+    """(flux / trend, flux_err / trend ya da None, trend)"""
+    trend = robust_trend(time, flux, window_days, method, mask, gap_days)
+    flux = np.asarray(flux, dtype=np.float64) / trend
+    if flux_err is not None:
+        flux_err = np.asarray(flux_err, dtype=np.float64) / trend
+    return flux, flux_err, trend
+
+
+def window_for(time, cadences, ephemerides=(), min_durations=3.0):
+    """
+    Pencere (gün): `cadences` kadans (flatten(window_length) karşılığı), ama en az en uzun
+    transit süresinin min_durations katı (maskeli aralık pencereden kısa kalsın).
+    """
+    t = np.asarray(time, dtype=np.float64)
+    dt = np.diff(t)
+    dt = dt[dt > 0]
+    window = float(cadences) * float(np.median(dt)) if dt.size else 1.0
+    durs = [d if d is not None and np.isfinite(d) and d > 0 else default_duration(p)
+            for p, _, d in ephemerides if p]
+    if durs:
+        window = max(window, min_durations * max(durs))
+    return window
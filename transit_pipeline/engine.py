@@ -0,0 +1,295 @@
+# Süreç havuzu tabanlı çalıştırma motoru.
+#
+# Ağ beklemesi (arama/indirme) ana süreçte sınırlı bir thread havuzunda,
+# CPU işi (stitch/flatten/fold/bin/çizim) ayrı süreçlerde yapılır.
+# manifest/log/metrics dosyalarına yalnızca tek bir yazıcı süreç yazar.
+#
+# Ana süreçte thread'ler (indirme havuzu, async döngüsü) çalışırken fork güvenli değil (kilitler
+# kopyalanır); worker'lar ve yazıcı forkserver (yoksa spawn) bağlamında başlar. Worker'lar ana
+# sürecin belleğini miras almadığından çağıranın modül ayarları worker_state ile taşınır.
+import csv
+import json
+import os
+import sys
+import queue
+import importlib.util
+import asyncio
+import threading
+import multiprocessing as mp
+from concurrent.futures import (ThreadPoolExecutor, ProcessPoolExecutor, Future,
+                                wait, FIRST_COMPLETED)
+
+_RECORD_QUEUE = None
+
+
+def set_record_queue(q):
+    global _RECORD_QUEUE
+    _RECORD_QUEUE = q
+
+
+def put_record(kind: str, path: str, rec: dict) -> bool:
+    # yazıcı süreç çalışıyorsa kaydı kuyruğa at; değilse çağıran kendisi yazar
+    q = _RECORD_QUEUE
+    if q is None:
+        return False
+    q.put((kind, path, rec))
+    return True
+
+
+def csv_header(path, default):
+    """CSV dosyası varsa ve boş değilse kendi başlığı, yoksa default: satırlar hep aynı sütunlarla yazılır."""
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), None)
+    except OSError:
+        header = None
+    return header or list(default)
+
+
+# forkserver süreci bunları bir kez yükler, worker'lar import etmeden başlar
+FORKSERVER_PRELOAD = ["numpy", "astropy.io.fits", "lightkurve", "matplotlib.pyplot"]
+
+
+def default_context():
+    # fork yok: ana süreçteki thread'lerin kilit/durumları worker'lara kopyalanmasın
+    if "forkserver" in mp.get_all_start_methods():
+        ctx = mp.get_context("forkserver")
+        ctx.set_forkserver_preload(FORKSERVER_PRELOAD)
+        return ctx
+    return mp.get_context("spawn")
+
+
+def _writer_loop(q):
+    handles = {}
+    writers = {}
+    try:
+        while True:
+            msg = q.get()
+            if msg is None:
+                break
+            kind, path, rec = msg
+            f = handles.get(path)
+            if f is None:
+                newfile = not os.path.exists(path) or os.path.getsize(path) == 0
+                f = handles[path] = open(path, "a", newline="", encoding="utf-8")
+                if kind == "csv":
+                    # save_row ile aynı başlık: dosyanınki, yoksa kaydın (sabit sütun listesi) anahtarları
+                    fieldnames = list(rec.keys()) if newfile else csv_header(path, rec.keys())
+                    writers[path] = (csv.DictWriter(f, fieldnames=fieldnames), newfile)
+            if kind == "csv":
+                w, needs_header = writers[path]
+                if needs_header:
+                    w.writeheader()
+                    writers[path] = (w, False)
+                w.writerow({k: rec.get(k) for k in w.fieldnames})
+            else:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+    finally:
+        for f in handles.values():
+            try:
+                f.close()
+            except Exception:
+                pass
+
+
+def start_writer(ctx=None):
+    ctx = ctx or default_context()
+    q = ctx.Queue()
+    p = ctx.Process(target=_writer_loop, args=(q,), name="record-writer", daemon=True)
+    p.start()
+    return q, p
+
+
+def stop_writer(q, p):
+    q.put(None)
+    p.join()
+
+
+def restore_module(name, path, settings):
+    """
+    worker_state: (modül adı, dosya yolu, {ayar: değer}). Modül worker'da yoksa (betikler) dosyadan
+    aynı adla yüklenir, ayarlar üzerine yazılır; compute_fn pickle ile ada göre bulunur. "__main__"
+    desteklenmez (spawn'da fonksiyonların globals'ı modülden ayrı kopyadır): betikler
+    transit_pipeline.scripts.load ile sabit adla çalıştırılır.
+    """
+    mod = sys.modules.get(name)
+    if mod is None:
+        spec = importlib.util.spec_from_file_location(name, path)
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[name] = mod
+        spec.loader.exec_module(mod)
+    vars(mod).update(settings)
+    return mod
+
+
+def init_worker(q, worker_state=None, mpl_backend="Agg"):
+    # her worker kendi matplotlib durumuyla başlar
+    set_record_queue(q)
+    if worker_state is not None:
+        restore_module(*worker_state)
+    try:
+        import matplotlib
+        matplotlib.use(mpl_backend, force=True)
+        import matplotlib.pyplot as plt
+        plt.close("all")
+        matplotlib.rcdefaults()
+    except Exception:
+        pass
+
+
+def run_staged(rows, fetch_fn, compute_fn, io_workers=8, compute_workers=None,
+               max_inflight=None, mp_context=None, worker_state=None):
+    """
+    rows üzerinde iki aşamalı çalıştırma; her hedef için compute/fetch sonucunu
+    tamamlandıkça (planet, status) olarak üretir.
+
+    fetch_fn(row) -> (job, result): job None ise result doğrudan sonuçtur
+    (skip/no_data vb.), değilse job compute_fn(job) ile süreç havuzunda işlenir.
+    worker_state: restore_module argümanları (compute_fn'in modülü ve ayarları).
+    """
+    ctx = mp_context or default_context()
+    compute_workers = compute_workers or (os.cpu_count() or 4)
+    max_inflight = max_inflight or 2 * compute_workers
+    # indirilmiş ama henüz işlenmemiş hedef sayısını sınırlar (bellek/disk baskısı)
+    slots = threading.BoundedSemaphore(max_inflight)
+
+    q, writer = start_writer(ctx)
+    set_record_queue(q)
+    try:
+        with ProcessPoolExecutor(max_workers=compute_workers, mp_context=ctx,
+                                 initializer=init_worker, initargs=(q, worker_state)) as cpool, \
+                ThreadPoolExecutor(max_workers=io_workers) as iopool:
+
+            def stage(row):
+                slots.acquire()
+                try:
+                    job, result = fetch_fn(row)
+                except Exception:
+                    slots.release()
+                    raise
+                if job is None:
+                    slots.release()
+                    return result
+                fut = cpool.submit(compute_fn, job)
+                fut.add_done_callback(lambda _f: slots.release())
+                return fut
+
+            # satırlar tembel okunur (sıralı plan ya da kuyruktan alma): bekleyen fetch sayısı sınırlı
+            rows = iter(rows)
+            pending = {}
+            computing = {}
+
+            def admit():
+                while len(pending) < io_workers + max_inflight:
+                    row = next(rows, None)
+                    if row is None:
+                        return
+                    pending[iopool.submit(stage, row)] = row
+
+            admit()
+            while pending or computing:
+                done, _ = wait(set(pending) | set(computing), return_when=FIRST_COMPLETED)
+                for f in done:
+                    row = pending.pop(f, None)
+                    if row is None:
+                        row = computing.pop(f)
+                    try:
+                        r = f.result()
+                    except Exception:
+                        # worker çökmesi (BrokenProcessPool vb.) tüm koşuyu durdurmasın
+                        yield str(row.get("pl_name", "")).strip(), "error"
+                        continue
+                    if isinstance(r, Future):
+                        computing[r] = row
+                    else:
+                        yield r
+                admit()
+    finally:
+        set_record_queue(None)
+        stop_writer(q, writer)
+
+
+_DONE = object()
+
+
+def run_async_staged(rows, fetch_coro, compute_fn, compute_workers=None, max_inflight=None,
+                     max_fetching=64, mp_context=None, worker_state=None):
+    """
+    run_staged'in asyncio sürümü: fetch_coro(row) -> (job, result) coroutine'leri bir
+    olay döngüsünde koşar, hazır job'lar sınırlı bir kuyruk üzerinden süreç havuzuna
+    beslenir. İndirme gecikmesi/yeniden denemeler compute worker'larını bekletmez.
+    """
+    ctx = mp_context or default_context()
+    compute_workers = compute_workers or (os.cpu_count() or 4)
+    max_inflight = max_inflight or 2 * compute_workers
+    out = queue.Queue()
+    errors = []
+
+    async def _main():
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Queue(maxsize=max_inflight)
+        fetching = asyncio.Semaphore(max_fetching)
+        with ProcessPoolExecutor(max_workers=compute_workers, mp_context=ctx,
+                                 initializer=init_worker, initargs=(q, worker_state)) as cpool:
+
+            async def produce(row):
+                async with fetching:
+                    try:
+                        job, result = await fetch_coro(row)
+                    except Exception:
+                        job, result = None, (str(row.get("pl_name", "")).strip(), "error")
+                if job is None:
+                    out.put(result)
+                else:
+                    await ready.put((row, job))
+
+            async def consume():
+                while True:
+                    item = await ready.get()
+                    if item is None:
+                        return
+                    row, job = item
+                    try:
+                        out.put(await loop.run_in_executor(cpool, compute_fn, job))
+                    except Exception:
+                        out.put((str(row.get("pl_name", "")).strip(), "error"))
+
+            consumers = [asyncio.create_task(consume()) for _ in range(compute_workers)]
+            # satırlar tembel okunur: aynı anda en fazla max_fetching + max_inflight üretici
+            admit = asyncio.Semaphore(max_fetching + max_inflight)
+            producers = set()
+            for r in rows:
+                await admit.acquire()
+                task = asyncio.create_task(produce(r))
+                producers.add(task)
+                task.add_done_callback(lambda t: (admit.release(), producers.discard(t)))
+            await asyncio.gather(*producers)
+            for _ in consumers:
+                await ready.put(None)
+            await asyncio.gather(*consumers)
+
+    def runner():
+        try:
+            asyncio.run(_main())
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            out.put(_DONE)
+
+    q, writer = start_writer(ctx)
+    set_record_queue(q)
+    try:
+        th = threading.Thread(target=runner, name="async-fetch", daemon=True)
+        th.start()
+        while True:
+            item = out.get()
+            if item is _DONE:
+                break
+            yield item
+        th.join()
+        if errors:
+            raise errors[0]
+    finally:
+        set_record_queue(None)
+        stop_writer(q, writer)
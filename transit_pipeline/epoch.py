@@ -0,0 +1,130 @@
+# Bilinen periyotta transit epoğu (t0) arama: eşleşmiş filtre.
+#
+# Seri bir kez katlanır, faz ince binlere (süre/oversample) ağırlıklı toplanır; tüm deneme
+# epoklarında kutu ya da yamuk şablonun derinliği ve SNR'ı tek dairesel korelasyonla (FFT)
+# hesaplanır:
+#   derinlik(e) = Σ s_k A[e+k] / Σ s_k² W[e+k],  σ(e) = 1 / sqrt(Σ s_k² W[e+k])
+#   A_b = Σ w (taban - f),  W_b = Σ w,  w = 1/σ²   (b bini içindeki noktalar)
+# t0 belirsizliği SNR² = Δχ² eğrisinden: tepe değerinden 1 düşük kalan aralığın yarı genişliği.
+# Süre bilinmiyorsa birkaç deneme süresinden en yüksek SNR'lı seçilir.
+#
+#   res = search_epoch(t, flux, flux_err, period=3.52, duration=0.12)
+#   res["t0"], res["t0_err"], res["snr"], res["depth"]
+import numpy as np
+
+OVERSAMPLE = 10           # süre başına faz bini
+INGRESS_FRAC = 0.15       # yamuk şablonda giriş/çıkış süresi / toplam süre
+CLIP_SIGMA = 5.0          # bundan parlak noktalar atılır (transit aşağı yönlü; tek aykırı nokta epoğu çekmesin)
+MIN_COVERAGE = 0.25       # kutudaki nokta sayısı medyanın bu oranından azsa (veri boşluğu) epok geçersiz
+DURATION_TRIALS = (0.5, 1.0, 2.0)   # süre bilinmiyorsa kaba tahminin katları
+
+
+def _template(n_dur, shape):
+    """Bin cinsinden şablon (transit içi 1, yamukta kenarlar doğrusal); uzunluk >= 1."""
+    n = max(1, int(round(n_dur)))
+    if shape == "box" or n < 4:
+        return np.ones(n)
+    x = (np.arange(n) + 0.5) / n            # 0..1
+    ramp = max(INGRESS_FRAC, 1.0 / n)
+    return np.clip(np.minimum(x, 1.0 - x) / ramp, 0.0, 1.0)
+
+
+def _correlate(a, s, nb):
+    """Dairesel korelasyon: out[e] = Σ_k s[k] a[(e + k) mod nb]."""
+    kern = np.zeros(nb)
+    kern[:s.size] = s
+    return np.fft.irfft(np.fft.rfft(a) * np.conj(np.fft.rfft(kern)), nb)
+
+
+def _scan(phase_bin, w, resid, nb, n_dur, shape):
+    s = _template(n_dur, shape)
+    A = np.bincount(phase_bin, weights=w * resid, minlength=nb)
+    W = np.bincount(phase_bin, weights=w, minlength=nb)
+    C = np.bincount(phase_bin, minlength=nb).astype(np.float64)
+    num = _correlate(A, s, nb)
+    den = _correlate(W, s * s, nb)
+    cov = _correlate(C, np.ones(s.size), nb)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        depth = num / den
+        snr = num / np.sqrt(den)
+    ok = (den > 0) & (cov >= max(3.0, MIN_COVERAGE * np.median(cov[cov > 0]) if (cov > 0).any() else 3.0))
+    snr = np.where(ok, snr, -np.inf)
+    # epok e şablonun başlangıcı; merkez s.size / 2 bin sonra
+    return snr, depth, s.size
+
+
+def search_epoch(time, flux, flux_err=None, period=None, duration=None, oversample=OVERSAMPLE,
+                 shape="trapezoid", reference=None):
+    """
+    time/flux: detrend edilmiş (taban ~1) seri, period ve duration gün. duration None ise
+    DURATION_TRIALS × kaba tahmin denenir. reference: t0'ın yakınına konacağı zaman
+    (varsayılan: verinin ortası; P–t0 kovaryansı en küçük).
+    Döner: {"t0", "t0_err", "snr", "depth", "duration", "n_transits"} ya da veri yoksa None.
+    """
+    from transit_pipeline.detrend import default_duration
+    t = np.asarray(time, dtype=np.float64)
+    f = np.asarray(flux, dtype=np.float64)
+    e = np.asarray(flux_err, dtype=np.float64) if flux_err is not None else None
+    ok = np.isfinite(t) & np.isfinite(f)
+    if e is not None:
+        ok &= np.isfinite(e) & (e > 0)
+    t, f = t[ok], f[ok]
+    e = e[ok] if e is not None else None
+    if t.size < 10 or not period or period <= 0:
+        return None
+
+    base = np.median(f)
+    mad_sigma = 1.4826 * np.median(np.abs(f - base))
+    if not np.isfinite(mad_sigma) or mad_sigma <= 0:
+        mad_sigma = np.std(f) or 1.0
+    keep = f < base + CLIP_SIGMA * mad_sigma
+    t, f = t[keep], f[keep]
+    if e is None:
+        w = np.full(t.size, 1.0 / mad_sigma ** 2)
+    else:
+        e = e[keep]
+        # bildirilen hatalar saçılmadan küçükse SNR şişmesin
+        scale = max(1.0, mad_sigma / np.median(e))
+        w = 1.0 / (e * scale) ** 2
+    base = np.sum(w * f) / np.sum(w)
+    resid = base - f
+
+    durations = [duration] if duration else [m * default_duration(period) for m in DURATION_TRIALS]
+    ref = float(reference) if reference is not None else 0.5 * (t.min() + t.max())
+    best = None
+    for dur in durations:
+        dur = min(float(dur), 0.5 * period)
+        nb = int(np.clip(np.ceil(period / dur * oversample), 16, 2_000_000))
+        width = period / nb
+        phase = np.mod(t - ref, period)
+        phase_bin = np.minimum((phase / width).astype(np.int64), nb - 1)
+        snr, depth, n_s = _scan(phase_bin, w, resid, nb, dur / width, shape)
+        k = int(np.argmax(snr))
+        if not np.isfinite(snr[k]):
+            continue
+        if best is None or snr[k] > best["snr"]:
+            best = {"snr": float(snr[k]), "depth": float(depth[k]), "duration": dur, "k": k,
+                    "snr_curve": snr, "nb": nb, "width": width, "n_s": n_s}
+    if best is None:
+        return None
+
+    nb, width, k = best["nb"], best["width"], best["k"]
+    snr = best["snr_curve"]
+    center = (k + 0.5 * best["n_s"]) * width            # ref'e göre transit merkezi fazı
+    # Δχ² = SNR_max² - SNR² <= 1 olan ardışık epoklar; reddedilen (kapsama/boşluk) ya da negatif SNR'lı
+    # epok aralığı keser (-inf² ya da büyük negatif SNR'ın karesi aralığı yanlışça genişletmesin)
+    with np.errstate(invalid="ignore"):
+        chi = np.where(np.isfinite(snr) & (snr > 0), best["snr"] ** 2 - snr ** 2, np.inf)
+    lo = hi = 0
+    while lo < nb // 2 and chi[(k - lo - 1) % nb] <= 1.0:
+        lo += 1
+    while hi < nb // 2 and chi[(k + hi + 1) % nb] <= 1.0:
+        hi += 1
+    t0_err = max(0.5 * (lo + hi + 1) * width, width / np.sqrt(12.0))
+
+    t0 = ref + center
+    t0 -= period * np.round((t0 - ref) / period)       # ref'e en yakın transit
+    epochs = np.unique(np.round((t - t0) / period).astype(np.int64)[
+        np.abs(np.mod(t - t0 + 0.5 * period, period) - 0.5 * period) < 0.5 * best["duration"]])
+    return {"t0": float(t0), "t0_err": float(t0_err), "snr": best["snr"], "depth": best["depth"],
+            "duration": float(best["duration"]), "n_transits": int(epochs.size)}
@@ -0,0 +1,99 @@
+# Asenkron indirme zamanlayıcısı.
+#
+# - arşiv (görev) başına eşzamanlı bağlantı sınırı (asyncio.Semaphore)
+# - tüm istekler için token-bucket hız sınırlayıcı
+# - aynı anahtarlı eşzamanlı istekler tek isteğe indirgenir (coalescing)
+# - başarısız istek jitter'lı üstel beklemeyle yeniden denenir; bekleme
+#   sırasında ne bağlantı ne de compute worker tutulur
+# Bloklayan lightkurve/astroquery çağrıları scheduler'ın thread havuzunda koşar.
+import time
+import random
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+class FetchScheduler:
+    def __init__(self, limits=None, default_limit=4, rate=10.0, burst=20, retries=3,
+                 base_sleep=2.0, max_sleep=60.0, on_retry=None):
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.retries = retries
+        self.base_sleep = base_sleep
+        self.max_sleep = max_sleep
+        self.on_retry = on_retry
+        self.bucket = TokenBucket(rate, burst)
+        self._sems = {}
+        self._inflight = {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(4, sum(self.limits.values()) + default_limit),
+            thread_name_prefix="fetch")
+        self.stats = {"requests": 0, "coalesced": 0, "retries": 0}
+
+    def _sem(self, mission):
+        key = mission if mission in self.limits else None
+        sem = self._sems.get(key)
+        if sem is None:
+            sem = self._sems[key] = asyncio.Semaphore(self.limits.get(mission, self.default_limit))
+        return sem
+
+    async def call(self, key, mission, fn, *args, **kwargs):
+        """fn(*args) sonucunu döndürür; aynı key için uçuştaki istek varsa onu bekler."""
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(fut)
+        fut = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await self._run(key, mission, functools.partial(fn, *args, **kwargs))
+            fut.set_result(result)
+            return result
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # bekleyen yoksa "never retrieved" uyarısı çıkmasın
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _run(self, key, mission, call):
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            async with self._sem(mission):
+                await self.bucket.acquire()
+                self.stats["requests"] += 1
+                try:
+                    return await loop.run_in_executor(self.executor, call)
+                except Exception as e:
+                    err = e
+            if attempt >= self.retries:
+                raise err
+            delay = min(self.max_sleep, self.base_sleep * (2 ** attempt)) * random.uniform(0.5, 1.5)
+            self.stats["retries"] += 1
+            if self.on_retry is not None:
+                self.on_retry(key, mission, attempt, delay, err)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,304 @@
+# CACHE_DIR için çökmeye dayanıklı MAST ürün önbelleği.
+#
+# - indirme önce geçici dosyaya, doğrulama sonrası os.replace ile yerine
+# - ürün başına dosya kilidi (yazarken LOCK_EX, okurken LOCK_SH)
+# - FITS bütünlük kontrolü; bozuk dosya quarantine/ altına taşınıp yeniden indirilir
+# - manifest.sqlite: önbellekteki ürünler, boyutları ve son erişim zamanları
+# - max_bytes aşılınca en eski erişilen (LRU) ve kullanılmayan ürünler silinir
+#
+# Eski lk_cache/mastDownload ağacını doğrulayıp manifest'e almak için:
+#   python -m transit_pipeline.fitscache --root <CACHE_DIR> --adopt --max-gb 200
+import os
+import time
+import shutil
+import sqlite3
+import hashlib
+import argparse
+import threading
+import urllib.request
+from urllib.parse import quote
+
+try:
+    import fcntl
+except ImportError:  # Windows: kilitsiz çalışır
+    fcntl = None
+
+MAST_DOWNLOAD_URL = "https://mast.stsci.edu/api/v0.1/Download/file?uri={uri}"
+FITS_BLOCK = 2880
+
+
+def http_fetcher(url_template=MAST_DOWNLOAD_URL, timeout=120):
+    def fetch(uri, fobj):
+        url = url_template.format(uri=quote(uri, safe=":/"))
+        with urllib.request.urlopen(url, timeout=timeout) as r:
+            shutil.copyfileobj(r, fobj, length=1 << 20)
+    return fetch
+
+
+def local_fetcher(mirror_dir):
+    # testler/offline için: uri'nin dosya adını mirror_dir altında arar (sahte MAST dizini)
+    def fetch(uri, fobj):
+        with open(os.path.join(mirror_dir, os.path.basename(uri)), "rb") as src:
+            shutil.copyfileobj(src, fobj, length=1 << 20)
+    return fetch
+
+
+def verify_fits(path, deep=False) -> bool:
+    """Kesik/yarım indirmeleri yakalar; deep=True tüm HDU verisini ve CHECKSUM'ı okur."""
+    try:
+        size = os.path.getsize(path)
+        if size == 0 or size % FITS_BLOCK != 0:
+            return False
+        with open(path, "rb") as f:
+            if not f.read(30).startswith(b"SIMPLE  ="):
+                return False
+        from astropy.io import fits
+        with fits.open(path, memmap=False, lazy_load_hdus=False, checksum=deep) as hdul:
+            if deep:
+                for hdu in hdul:
+                    _ = hdu.data
+        return True
+    except Exception:
+        return False
+
+
+class _FileLock:
+    def __init__(self, path, shared=False, blocking=True):
+        self.path = path
+        self.shared = shared
+        self.blocking = blocking
+        self.f = None
+
+    def __enter__(self):
+        self.f = open(self.path, "a")
+        if fcntl is not None:
+            flags = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+            if not self.blocking:
+                flags |= fcntl.LOCK_NB
+            try:
+                fcntl.flock(self.f, flags)
+            except BlockingIOError:
+                self.f.close()
+                self.f = None
+                raise
+        return self
+
+    def downgrade(self):
+        # LOCK_EX -> LOCK_SH aynı dosya tanıtıcısında; flock dönüşümü atomik değil (arada kısa bir boşluk olabilir)
+        if self.f is not None and fcntl is not None and not self.shared:
+            fcntl.flock(self.f, fcntl.LOCK_SH)
+            self.shared = True
+
+    def __exit__(self, *exc):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+
+class FitsCache:
+    def __init__(self, root, max_bytes=None, fetcher=None, deep_verify=False):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        self.fetcher = fetcher or http_fetcher()
+        self.deep_verify = deep_verify
+        self.products_dir = os.path.join(self.root, "products")
+        self.quarantine_dir = os.path.join(self.root, "quarantine")
+        self.locks_dir = os.path.join(self.root, "locks")
+        self.manifest_path = os.path.join(self.root, "manifest.sqlite")
+        self._evict_lock = threading.Lock()
+        for d in (self.products_dir, self.quarantine_dir, self.locks_dir):
+            os.makedirs(d, exist_ok=True)
+        with self._db() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS products (
+                name TEXT PRIMARY KEY, uri TEXT, path TEXT NOT NULL, size INTEGER NOT NULL,
+                created REAL NOT NULL, last_access REAL NOT NULL)""")
+            con.execute("CREATE INDEX IF NOT EXISTS products_access ON products (last_access)")
+
+    def _db(self):
+        con = sqlite3.connect(self.manifest_path, timeout=60)
+        # WAL paylaşımlı bellek ister, ortak dosya sisteminde (Lustre/NFS) güvenli değil (bkz. workqueue)
+        con.execute("PRAGMA journal_mode=DELETE")
+        return con
+
+    # --- yollar ---
+    # MAST ürün dosya adları tekildir; anahtar olarak uri'nin son parçası kullanılır
+    # (böylece eski mastDownload ağacından içe alınan dosyalar da eşleşir)
+    @staticmethod
+    def product_name(uri) -> str:
+        return os.path.basename(str(uri))
+
+    def path_for(self, uri) -> str:
+        name = self.product_name(uri)
+        sub = hashlib.sha1(name.encode("utf-8")).hexdigest()[:2]
+        return os.path.join(self.products_dir, sub, name)
+
+    def _lock(self, uri, shared=False, blocking=True):
+        name = self.product_name(uri)
+        return _FileLock(os.path.join(self.locks_dir, name + ".lock"), shared, blocking)
+
+    # --- manifest ---
+    def _record(self, uri, path):
+        now = time.time()
+        name = self.product_name(uri)
+        with self._db() as con:
+            con.execute("INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, COALESCE("
+                        "(SELECT created FROM products WHERE name = ?), ?), ?)",
+                        (name, uri, path, os.path.getsize(path), name, now, now))
+
+    def _touch(self, uri):
+        with self._db() as con:
+            con.execute("UPDATE products SET last_access = ? WHERE name = ?",
+                        (time.time(), self.product_name(uri)))
+
+    def _forget(self, uri):
+        with self._db() as con:
+            con.execute("DELETE FROM products WHERE name = ?", (self.product_name(uri),))
+
+    def total_bytes(self) -> int:
+        with self._db() as con:
+            return int(con.execute("SELECT COALESCE(SUM(size), 0) FROM products").fetchone()[0])
+
+    def entries(self):
+        with self._db() as con:
+            return con.execute("SELECT name, path, size, created, last_access FROM products "
+                               "ORDER BY last_access").fetchall()
+
+    # --- indirme ---
+    def quarantine(self, path, uri=None):
+        if os.path.exists(path):
+            dst = os.path.join(self.quarantine_dir, f"{int(time.time())}_{os.path.basename(path)}")
+            try:
+                os.replace(path, dst)
+            except OSError:
+                os.remove(path)
+        if uri is not None:
+            self._forget(uri)
+
+    def _fetch_locked(self, uri, path):
+        # LOCK_EX altında: geçerli dosya varsa erişim zamanı güncellenir, yoksa indirilir
+        if os.path.exists(path):
+            if verify_fits(path, self.deep_verify):
+                self._touch(uri)
+                return
+            self.quarantine(path, uri)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.part{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(tmp, "wb") as f:
+                self.fetcher(uri, f)
+                f.flush()
+                os.fsync(f.fileno())
+            if not verify_fits(tmp, self.deep_verify):
+                self.quarantine(tmp)
+                raise IOError(f"İndirilen dosya bozuk: {uri}")
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._record(uri, path)
+
+    def fetch(self, uri) -> str:
+        path = self.path_for(uri)
+        with self._lock(uri):
+            self._fetch_locked(uri, path)
+        self.evict()
+        return path
+
+    def fetch_read(self, uri, reader, retries=1):
+        """
+        Ürünü hazırlayıp okur. Kilit bırakılmadan LOCK_EX'ten LOCK_SH'ye indirilir ve okuma bitene kadar
+        tutulur (evict silemez); evict okumadan sonra çalışır. Okunamayan dosya karantinaya alınıp
+        yeniden çekilir; kilit dönüşümü sırasında başka süreç silmişse karantina yok, yalnızca yeniden çekilir.
+        """
+        path = self.path_for(uri)
+        last = None
+        try:
+            for _ in range(retries + 1):
+                with self._lock(uri) as lock:
+                    self._fetch_locked(uri, path)
+                    lock.downgrade()
+                    if not os.path.exists(path):
+                        last = FileNotFoundError(path)
+                        continue
+                    try:
+                        return reader(path)
+                    except Exception as e:
+                        last = e
+                with self._lock(uri):
+                    self.quarantine(path, uri)
+            raise last
+        finally:
+            self.evict()
+
+    def download_search(self, search_result, reader):
+        """lightkurve SearchResult'taki tüm ürünleri önbellekten okur (download_all yerine)."""
+        uris = [str(u) for u in search_result.table["dataURI"]]
+        return [self.fetch_read(u, reader) for u in uris]
+
+    # --- temizlik ---
+    def evict(self):
+        if not self.max_bytes:
+            return 0
+        freed = 0
+        with self._evict_lock:
+            total = self.total_bytes()
+            if total <= self.max_bytes:
+                return 0
+            for name, path, size, _, _ in self.entries():
+                if total <= self.max_bytes:
+                    break
+                try:
+                    with self._lock(name, blocking=False):
+                        if os.path.exists(path):
+                            os.remove(path)
+                        self._forget(name)
+                except BlockingIOError:
+                    continue  # kullanımda
+                total -= size
+                freed += size
+        return freed
+
+    def adopt(self, tree):
+        """Eski bir mastDownload ağacındaki FITS dosyalarını doğrulayıp önbelleğe taşır."""
+        good = bad = 0
+        for dirpath, _, files in os.walk(tree):
+            for fn in files:
+                if not fn.endswith(".fits"):
+                    continue
+                src = os.path.join(dirpath, fn)
+                uri = "mast:" + os.path.relpath(src, tree).replace(os.sep, "/")
+                dst = self.path_for(uri)
+                if os.path.exists(dst):
+                    continue
+                if not verify_fits(src, self.deep_verify):
+                    self.quarantine(src)
+                    bad += 1
+                    continue
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                with self._lock(uri):
+                    os.replace(src, dst)
+                    self._record(uri, dst)
+                good += 1
+        self.evict()
+        return good, bad
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="FITS önbellek bakımı")
+    ap.add_argument("--root", required=True)
+    ap.add_argument("--max-gb", type=float, default=None)
+    ap.add_argument("--adopt", action="store_true", help="root/mastDownload ağacını doğrula ve içe al")
+    ap.add_argument("--deep", action="store_true", help="CHECKSUM ve tüm veri bloklarını doğrula")
+    args = ap.parse_args(argv)
+    max_bytes = int(args.max_gb * 1024 ** 3) if args.max_gb else None
+    cache = FitsCache(args.root, max_bytes=max_bytes, deep_verify=args.deep)
+    if args.adopt:
+        good, bad = cache.adopt(os.path.join(args.root, "mastDownload"))
+        print(f"İçe alınan: {good} | Karantina: {bad}")
+    freed = cache.evict()
+    print(f"Önbellek: {len(cache.entries())} ürün, {cache.total_bytes() / 1024 ** 3:.2f} GB "
+          f"(silinen: {freed / 1024 ** 3:.2f} GB)")
+
+
+if __name__ == "__main__":
+    main()
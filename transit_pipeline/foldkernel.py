@@ -0,0 +1,134 @@
+# Saf NumPy fold/bin/metrik çekirdeği.
+#
+# lightkurve'ün fold() -> bin() -> DataFrame zinciri yerine ham dizilerle
+# tek geçişte faz, binlenmiş akı ve transit metriklerini hesaplar. Faz
+# lightkurve fold(period, epoch_time) ile aynı tanımdır (gün, [-P/2, P/2)),
+# binler en küçük fazdan başlar, bin zamanı bin ortasıdır, boş binler NaN.
+import numpy as np
+
+R_SUN = 6.957e8        # m
+R_EARTH = 6.371e6      # m
+M_SUN = 1.989e30       # kg
+AU = 1.496e11          # m
+G = 6.67430e-11        # SI
+
+# batch modunda bir seferde işlenecek en fazla (çift sayısı × nokta sayısı)
+BATCH_CELLS = 20_000_000
+# transit_metrics anahtarları (metrics.csv sütunları)
+METRIC_COLUMNS = ["depth", "snr", "avg_flux", "flux_var", "Rp_Rearth", "a_AU"]
+
+
+def fold_phase(time, period, epoch):
+    half = 0.5 * period
+    return np.mod(time - epoch + half, period) - half
+
+
+def bin_sorted(phase, flux, flux_err, bin_size):
+    """phase artan sıralı olmalı. (bin_phase, bin_flux, bin_err, count) döndürür."""
+    if phase.size == 0:
+        e = np.empty(0)
+        return e, e, e, np.empty(0, dtype=np.int64)
+    ok = np.isfinite(flux)
+    idx = ((phase - phase[0]) / bin_size).astype(np.int64)
+    nb = int(idx[-1]) + 1
+    w = ok.astype(np.float64)
+    cnt = np.bincount(idx, weights=w, minlength=nb)
+    s = np.bincount(idx, weights=np.where(ok, flux, 0.0), minlength=nb)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bflux = s / cnt
+        if flux_err is not None:
+            e2 = np.bincount(idx, weights=np.where(ok, flux_err, 0.0) ** 2, minlength=nb)
+            berr = np.sqrt(e2) / cnt
+        else:
+            berr = np.full(nb, np.nan)
+    bphase = phase[0] + (np.arange(nb) + 0.5) * bin_size
+    return bphase, bflux, berr, cnt.astype(np.int64)
+
+
+def transit_metrics(flux, flux_err, period, R_star=np.nan, M_star=np.nan):
+    depth = 1.0 - np.nanmin(flux)
+    avg_flux = np.nanmean(flux)
+    flux_var = np.nanvar(flux)
+    snr = depth / np.nanmedian(flux_err) if flux_err is not None else None
+
+    Rp_Rearth = None
+    a_AU = None
+    if R_star is not None and not np.isnan(R_star):
+        Rp_Rearth = (R_star * R_SUN / R_EARTH) * np.sqrt(depth)
+    if M_star is not None and not np.isnan(M_star) and period is not None:
+        P_sec = period * 86400
+        a_m = (G * M_star * M_SUN * (P_sec ** 2) / (4 * np.pi ** 2)) ** (1 / 3)
+        a_AU = a_m / AU
+    return {"depth": depth, "snr": snr, "avg_flux": avg_flux, "flux_var": flux_var,
+            "Rp_Rearth": Rp_Rearth, "a_AU": a_AU}
+
+
+def fold_bin_metrics(time, flux, flux_err, period, epoch, bin_size=0.001,
+                     R_star=np.nan, M_star=np.nan):
+    time = np.asarray(time, dtype=np.float64)
+    # float32 akı (LightCurveArrays) sıralanırken float64'e çevrilir: tek kopya
+    flux = np.asarray(flux)
+    flux_err = np.asarray(flux_err) if flux_err is not None else None
+
+    phase = fold_phase(time, period, epoch)
+    order = np.argsort(phase, kind="stable")
+    phase = phase[order]
+    f = flux[order].astype(np.float64, copy=False)
+    fe = flux_err[order].astype(np.float64, copy=False) if flux_err is not None else None
+    bphase, bflux, berr, cnt = bin_sorted(phase, f, fe, bin_size)
+    return {
+        "phase": phase, "flux": f, "flux_err": fe,
+        "bin_phase": bphase, "bin_flux": bflux, "bin_err": berr, "bin_count": cnt,
+        "metrics": transit_metrics(f, fe, period, R_star, M_star),
+    }
+
+
+def fold_bin_metrics_batch(time, flux, flux_err, periods, epochs, bin_size=0.001,
+                           R_star=np.nan, M_star=np.nan):
+    """Aynı host'un birden çok (period, epoch) çifti; faz/sıralama/binleme 2B dizilerle yapılır."""
+    time = np.asarray(time, dtype=np.float64)
+    flux = np.asarray(flux, dtype=np.float64)
+    flux_err = np.asarray(flux_err, dtype=np.float64) if flux_err is not None else None
+    periods = np.atleast_1d(np.asarray(periods, dtype=np.float64))
+    epochs = np.atleast_1d(np.asarray(epochs, dtype=np.float64))
+    n = time.size
+    chunk = max(1, BATCH_CELLS // max(n, 1))
+
+    out = []
+    for lo in range(0, periods.size, chunk):
+        P = periods[lo:lo + chunk, None]
+        E = epochs[lo:lo + chunk, None]
+        k = P.shape[0]
+        phase = np.mod(time[None, :] - E + 0.5 * P, P) - 0.5 * P
+        order = np.argsort(phase, axis=1, kind="stable")
+        phase = np.take_along_axis(phase, order, axis=1)
+        f = flux[order]
+        fe = flux_err[order] if flux_err is not None else None
+
+        # tüm satırları tek bincount ile binle: satır r'nin binleri r*nb'den başlar
+        idx = ((phase - phase[:, :1]) / bin_size).astype(np.int64)
+        nb = int(idx[:, -1].max()) + 1 if n else 0
+        gidx = (idx + (np.arange(k) * nb)[:, None]).ravel()
+        ok = np.isfinite(f).ravel()
+        cnt = np.bincount(gidx, weights=ok.astype(np.float64), minlength=k * nb).reshape(k, nb)
+        s = np.bincount(gidx, weights=np.where(ok, f.ravel(), 0.0), minlength=k * nb).reshape(k, nb)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            bflux = s / cnt
+            if fe is not None:
+                e2 = np.bincount(gidx, weights=np.where(ok, fe.ravel(), 0.0) ** 2,
+                                 minlength=k * nb).reshape(k, nb)
+                berr = np.sqrt(e2) / cnt
+            else:
+                berr = np.full((k, nb), np.nan)
+
+        for r in range(k):
+            nbr = int(idx[r, -1]) + 1 if n else 0
+            out.append({
+                "phase": phase[r], "flux": f[r], "flux_err": fe[r] if fe is not None else None,
+                "bin_phase": phase[r, 0] + (np.arange(nbr) + 0.5) * bin_size,
+                "bin_flux": bflux[r, :nbr], "bin_err": berr[r, :nbr],
+                "bin_count": cnt[r, :nbr].astype(np.int64),
+                "metrics": transit_metrics(f[r], fe[r] if fe is not None else None,
+                                           float(periods[lo + r]), R_star, M_star),
+            })
+    return out
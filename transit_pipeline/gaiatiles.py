@@ -0,0 +1,205 @@
+# Gaia TAP sorgularını gökyüzü karolarına bölüp paralel çalıştıran, sonuçları
+# karo başına Parquet dosyası olarak saklayan önbellek (gaia_hrdiagram / galaktik_duzlem).
+#
+# - karo sorguları thread havuzunda aynı anda gönderilir
+# - her karo  <root>/<sorgu özeti>/<karo>.parquet  olarak yazılır (geçici dosya + os.replace)
+#   sorgu özeti: tablo + WHERE + TOP/ORDER BY; sütunlar özete girmez
+# - yalnızca eksik karolar çekilir; eksik sütun varsa o karo için sadece
+#   source_id + eksik sütunlar sorgulanıp mevcut dosyaya eklenir
+# - okuma pyarrow ile tek seferde (döngü içinde pd.concat yok)
+# - derived=True: mesafe, M_G, l/b/x/y/z vb. karo yanında saklanır (bkz. gaiaderive)
+#
+# TOP N ... ORDER BY x: her karo kendi TOP N'ini çeker, birleşimde tekrar sıralanıp
+# ilk N alınır; bu, tek bir global sorgu ile aynı sonucu verir.
+#
+# Test/offline için sahte TAP sunucusu: GaiaTileCache(..., query_fn=tap_sync_fetcher("http://127.0.0.1:8000/tap"))
+import io
+import os
+import json
+import hashlib
+import threading
+import urllib.request
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from transit_pipeline.gaiaderive import derivable, derived_path, ensure_derived
+
+GAIA_TABLE = "gaiadr3.gaia_source"
+KEY_COLUMN = "source_id"
+
+
+def astroquery_fetcher(use_async=False):
+    def fetch(adql):
+        from astroquery.gaia import Gaia
+        job = Gaia.launch_job_async(adql) if use_async else Gaia.launch_job(adql)
+        return job.get_results().to_pandas()
+    return fetch
+
+
+def tap_sync_fetcher(url, timeout=600):
+    # standart TAP /sync uç noktası (CSV çıktı); sahte yerel TAP sunucusuyla da çalışır
+    def fetch(adql):
+        data = urlencode({"REQUEST": "doQuery", "LANG": "ADQL", "FORMAT": "csv", "QUERY": adql}).encode()
+        with urllib.request.urlopen(url.rstrip("/") + "/sync", data=data, timeout=timeout) as r:
+            return pd.read_csv(io.BytesIO(r.read()))
+    return fetch
+
+
+def sky_tiles(ra_step=60.0, dec_step=20.0, dec_range=(-90.0, 90.0), ra_range=(0.0, 360.0)):
+    """[(ra_min, ra_max, dec_min, dec_max), ...] — yarı açık aralıklar, kenarlar çakışmaz."""
+    ra_edges = np.arange(ra_range[0], ra_range[1] + 1e-9, ra_step)
+    dec_edges = np.arange(dec_range[0], dec_range[1] + 1e-9, dec_step)
+    if ra_edges[-1] < ra_range[1]:
+        ra_edges = np.append(ra_edges, ra_range[1])
+    if dec_edges[-1] < dec_range[1]:
+        dec_edges = np.append(dec_edges, dec_range[1])
+    return [(float(r0), float(r1), float(d0), float(d1))
+            for r0, r1 in zip(ra_edges[:-1], ra_edges[1:])
+            for d0, d1 in zip(dec_edges[:-1], dec_edges[1:])]
+
+
+def tile_predicate(tile):
+    ra0, ra1, d0, d1 = tile
+    ra_hi = "<=" if ra1 >= 360.0 else "<"
+    dec_hi = "<=" if d1 >= 90.0 else "<"
+    return f"ra >= {ra0:g} AND ra {ra_hi} {ra1:g} AND dec >= {d0:g} AND dec {dec_hi} {d1:g}"
+
+
+def tile_name(tile):
+    return "ra{:g}_{:g}_dec{:g}_{:g}".format(*tile)
+
+
+class GaiaTileCache:
+    def __init__(self, root, query_fn=None, workers=6, retries=2):
+        self.root = root
+        self.query_fn = query_fn or astroquery_fetcher()
+        self.workers = workers
+        self.retries = retries
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    # ---- sorgu tanımı ----
+    @staticmethod
+    def query_id(where="", top=None, order_by=None, table=GAIA_TABLE):
+        spec = {"table": table, "where": " ".join(where.split()), "top": top, "order_by": order_by}
+        return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def build_adql(columns, tile, where="", top=None, order_by=None, table=GAIA_TABLE):
+        cond = tile_predicate(tile)
+        if where.strip():
+            cond = f"({where.strip()}) AND {cond}"
+        head = f"SELECT TOP {int(top)}" if top else "SELECT"
+        adql = f"{head} {', '.join(columns)} FROM {table} WHERE {cond}"
+        if order_by:
+            adql += f" ORDER BY {order_by}"
+        return adql
+
+    def path_for(self, qid, tile):
+        return os.path.join(self.root, qid, tile_name(tile) + ".parquet")
+
+    def _lock(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    # ---- karo okuma/yazma ----
+    @staticmethod
+    def cached_columns(path):
+        if not os.path.exists(path):
+            return None
+        import pyarrow.parquet as pq
+        try:
+            return list(pq.read_schema(path).names)
+        except Exception:
+            return None   # bozuk dosya: yeniden çekilir
+
+    @staticmethod
+    def _write(path, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp)
+        os.replace(tmp, path)
+
+    def _query(self, adql):
+        err = None
+        for _ in range(self.retries + 1):
+            try:
+                return self.query_fn(adql)
+            except Exception as e:
+                err = e
+        raise err
+
+    def _ensure_tile(self, tile, columns, where, top, order_by, table, derived=False):
+        """Karo dosyasını istenen sütunları içerecek hale getirir; ne yapıldığını döndürür."""
+        qid = self.query_id(where, top, order_by, table)
+        path = self.path_for(qid, tile)
+        with self._lock(path):
+            status = self._fill_tile(path, tile, columns, where, top, order_by, table)
+            if derived:
+                ensure_derived(path)
+            return status
+
+    def _fill_tile(self, path, tile, columns, where, top, order_by, table):
+        have = self.cached_columns(path)
+        if have is None:
+            cols = [KEY_COLUMN] + [c for c in columns if c != KEY_COLUMN]
+            self._write(path, self._query(self.build_adql(cols, tile, where, top, order_by, table)))
+            return "fetched"
+        missing = [c for c in columns if c not in have]
+        if not missing:
+            return "cached"
+        import pyarrow.parquet as pq
+        old = pq.read_table(path).to_pandas()
+        new = self._query(self.build_adql([KEY_COLUMN] + missing, tile, where, top, order_by, table))
+        self._write(path, old.merge(new, on=KEY_COLUMN, how="left"))
+        return "columns_added"
+
+    def ensure(self, tiles, columns, where="", top=None, order_by=None, table=GAIA_TABLE, progress=None,
+               derived=False):
+        """Eksik karoları/sütunları paralel çeker; {karo: durum} döndürür."""
+        status = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as ex:
+            futs = {ex.submit(self._ensure_tile, t, list(columns), where, top, order_by, table, bool(derived)): t
+                    for t in tiles}
+            for fut, t in futs.items():
+                status[t] = fut.result()
+                if progress:
+                    progress(t, status[t])
+        return status
+
+    def load(self, tiles, columns, where="", top=None, order_by=None, table=GAIA_TABLE, progress=None,
+             derived=False):
+        """
+        Karoları sağlar ve tek bir DataFrame olarak döndürür (yalnızca istenen sütunlar).
+        derived=True: istenen sütunlardan türetilebilen tüm sütunlar (gaiaderive), ya da ad listesi.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        columns = list(columns)
+        self.ensure(tiles, columns, where, top, order_by, table, progress, derived)
+        qid = self.query_id(where, top, order_by, table)
+        dcols = derivable(columns) if derived is True else [c for c in (derived or []) if c in derivable(columns)]
+        parts = []
+        for t in tiles:
+            path = self.path_for(qid, t)
+            part = pq.read_table(path, columns=columns)
+            if dcols:
+                # türetilmiş dosya kaynak karoyla aynı satır sırasında yazılır
+                dpart = pq.read_table(derived_path(path), columns=dcols)
+                for c in dcols:
+                    part = part.append_column(c, dpart.column(c))
+            parts.append(part)
+        tbl = pa.concat_tables(parts) if parts else pa.table({c: [] for c in columns + dcols})
+        df = tbl.to_pandas(split_blocks=True, self_destruct=True)
+        if top and order_by:
+            key, _, direction = order_by.strip().partition(" ")
+            if key in df.columns:
+                df = df.sort_values(key, ascending=direction.strip().upper() != "DESC", kind="stable")
+            df = df.head(int(top)).reset_index(drop=True)
+        return df
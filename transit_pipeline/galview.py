@@ -0,0 +1,184 @@
+# galaktik_duzlem.ipynb 3B görünümü için uzaysal indeks + ayrıntı seviyeli (LOD) çizim.
+#
+# - VoxelIndex: yıldızlar voksel anahtarına göre bir kez sıralanır (CSR: voksel -> [start, stop)),
+#   yarıçap sorgusu yalnızca küreyle kesişen vokselleri dolaşır; tamamen içerdeki vokseller
+#   nokta testi olmadan alınır
+# - GalacticView: figüre giden nokta sayısı max_points ile sınırlı
+#     "sample"  : yıldız başına sabit rastgele sıra; kaydırıcı hareket ettikçe aynı yıldızlar görünür kalır
+#     "density" : voksel başına ağırlık merkezi + sayı (gerekirse vokseller 2x2x2 birleştirilir)
+# - kaydırıcı hareketinde figür yeniden kurulmaz; FigureWidget izinin verileri batch_update ile değişir
+import numpy as np
+
+MAX_CELLS = 128 ** 3
+
+
+def _ranges(starts, stops):
+    """[start, stop) aralıklarının birleşik indeks dizisi (döngüsüz)."""
+    lens = stops - starts
+    total = int(lens.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.cumsum(lens) - lens
+    return np.repeat(starts - offsets, lens) + np.arange(total, dtype=np.int64)
+
+
+class VoxelIndex:
+    def __init__(self, x, y, z, cell=None, per_cell=64):
+        pts = np.column_stack([x, y, z]).astype(np.float32)
+        ok = np.isfinite(pts).all(axis=1)
+        ids = np.flatnonzero(ok)
+        pts = pts[ok]
+        self.lo = pts.min(axis=0) if len(pts) else np.zeros(3, np.float32)
+        span = (pts.max(axis=0) - self.lo) if len(pts) else np.ones(3, np.float32)
+        span = np.maximum(span, 1e-6)
+        if cell is None:
+            # hücre başına ~per_cell yıldız, toplam hücre sayısı MAX_CELLS ile sınırlı
+            n_cells = min(MAX_CELLS, max(1, len(pts) // per_cell))
+            cell = float(np.cbrt(np.prod(span) / n_cells))
+        self.cell = max(float(cell), float(span.max()) / np.cbrt(MAX_CELLS))
+        self.shape = np.floor(span / self.cell).astype(np.int64) + 1
+
+        ijk = np.floor((pts - self.lo) / self.cell).astype(np.int64)
+        np.minimum(ijk, self.shape - 1, out=ijk)
+        key = np.ravel_multi_index(ijk.T, self.shape)
+        order = np.argsort(key, kind="stable")
+        self.pts = np.ascontiguousarray(pts[order])
+        self.ids = ids[order]            # sıralı konum -> orijinal satır
+        counts = np.bincount(key, minlength=int(np.prod(self.shape)))
+        self.start = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.counts = counts
+        # voksel ağırlık merkezleri (density modu)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.centroid = np.stack([np.bincount(key, weights=pts[:, a], minlength=counts.size) for a in range(3)],
+                                     axis=1) / counts[:, None]
+
+    def __len__(self):
+        return len(self.pts)
+
+    def _candidate_voxels(self, radius, center):
+        c = np.asarray(center, dtype=np.float64)
+        lo = np.floor((c - radius - self.lo) / self.cell).astype(np.int64)
+        hi = np.floor((c + radius - self.lo) / self.cell).astype(np.int64)
+        lo = np.clip(lo, 0, self.shape - 1)
+        hi = np.clip(hi, 0, self.shape - 1)
+        if np.any(c + radius < self.lo) or np.any(hi < lo):
+            return np.empty(0, np.int64), np.empty(0, bool)
+        axes = [np.arange(lo[a], hi[a] + 1) for a in range(3)]
+        # eksen başına kutuya en yakın/en uzak mesafe, sonra 3B toplama (ızgara yayını)
+        near, far = [], []
+        for a in range(3):
+            b0 = self.lo[a] + axes[a] * self.cell
+            b1 = b0 + self.cell
+            near.append(np.maximum(0.0, np.maximum(b0 - c[a], c[a] - b1)) ** 2)
+            far.append(np.maximum(np.abs(b0 - c[a]), np.abs(b1 - c[a])) ** 2)
+        dmin = near[0][:, None, None] + near[1][None, :, None] + near[2][None, None, :]
+        dmax = far[0][:, None, None] + far[1][None, :, None] + far[2][None, None, :]
+        r2 = radius * radius
+        hit = dmin <= r2
+        vox = np.ravel_multi_index(np.meshgrid(*axes, indexing="ij"), self.shape)[hit]
+        inside = (dmax <= r2)[hit]
+        occupied = self.counts[vox] > 0
+        return vox[occupied], inside[occupied]
+
+    def query(self, radius, center=(0.0, 0.0, 0.0)):
+        """Küre içindeki yıldızların sıralı konumları (self.pts / self.ids indeksleri)."""
+        vox, inside = self._candidate_voxels(radius, center)
+        full = _ranges(self.start[vox[inside]], self.start[vox[inside] + 1])
+        part = _ranges(self.start[vox[~inside]], self.start[vox[~inside] + 1])
+        if part.size:
+            d = self.pts[part] - np.asarray(center, dtype=np.float32)
+            part = part[np.einsum("ij,ij->i", d, d) <= radius * radius]
+        return np.sort(np.concatenate([full, part]))
+
+    def density(self, radius, center=(0.0, 0.0, 0.0), max_points=50000):
+        """(merkezler (n,3), sayılar) — küre içindeki vokseller, gerekirse kabalaştırılmış."""
+        vox, inside = self._candidate_voxels(radius, center)
+        cen = self.centroid[vox].copy()
+        cnt = self.counts[vox].astype(np.int64)
+        # sınırdaki vokseller: yalnızca küre içindeki noktalardan yeniden say
+        edge = np.flatnonzero(~inside)
+        if edge.size:
+            s, e = self.start[vox[edge]], self.start[vox[edge] + 1]
+            idx = _ranges(s, e)
+            owner = np.repeat(edge, e - s)
+            d = self.pts[idx] - np.asarray(center, dtype=np.float32)
+            m = np.einsum("ij,ij->i", d, d) <= radius * radius
+            idx, owner = idx[m], owner[m]
+            n_in = np.bincount(owner, minlength=len(vox))[edge]
+            sums = np.stack([np.bincount(owner, weights=self.pts[idx, a], minlength=len(vox))[edge]
+                             for a in range(3)], axis=1)
+            cnt[edge] = n_in
+            with np.errstate(invalid="ignore", divide="ignore"):
+                cen[edge] = sums / n_in[:, None]
+        keep = cnt > 0
+        cen, cnt = cen[keep], cnt[keep]
+        shape = self.shape.copy()
+        ijk = np.stack(np.unravel_index(vox[keep], shape), axis=1)
+        while len(cnt) > max_points:
+            ijk //= 2
+            shape = (shape + 1) // 2
+            uniq, inv = np.unique(np.ravel_multi_index(ijk.T, shape), return_inverse=True)
+            w = np.bincount(inv, weights=cnt)
+            cen = np.stack([np.bincount(inv, weights=cen[:, a] * cnt) for a in range(3)], axis=1) / w[:, None]
+            cnt = w.astype(np.int64)
+            ijk = np.stack(np.unravel_index(uniq, shape), axis=1)
+        return cen, cnt
+
+
+class GalacticView:
+    def __init__(self, x, y, z, max_points=50000, mode="sample", index=None, seed=0):
+        self.index = index if index is not None else VoxelIndex(x, y, z)
+        self.max_points = int(max_points)
+        self.mode = mode
+        self.rank = np.random.default_rng(seed).random(len(self.index), dtype=np.float32)
+        self.fig = None
+        self._last = None
+
+    def select(self, radius, center=(0.0, 0.0, 0.0)):
+        """(xyz, boyut, renk, toplam_yıldız) — figüre gidecek en fazla max_points nokta."""
+        if self.mode == "density":
+            cen, cnt = self.index.density(radius, center, self.max_points)
+            dist = np.linalg.norm(cen - np.asarray(center), axis=1)
+            size = 2 + 4 * np.log1p(cnt) / max(np.log1p(cnt).max(), 1e-9) if len(cnt) else cnt
+            return cen, size, dist, int(cnt.sum())
+        pos = self.index.query(radius, center)
+        n = len(pos)
+        if n > self.max_points:
+            pos = pos[self.rank[pos] < self.max_points / n]
+        xyz = self.index.pts[pos]
+        dist = np.linalg.norm(xyz - np.asarray(center, dtype=np.float32), axis=1)
+        size = 6 - 4 * (dist / dist.max()) if len(dist) and dist.max() > 0 else np.full(len(dist), 6.0)
+        return xyz, size, dist, n
+
+    def figure(self):
+        import plotly.graph_objects as go
+        self.fig = go.FigureWidget()
+        self.fig.add_trace(go.Scatter3d(
+            x=[], y=[], z=[], mode="markers",
+            marker=dict(size=[], color=[], colorscale="Viridis", colorbar=dict(title="Distance [pc]")),
+            name="Stars"))
+        self.fig.add_trace(go.Scatter3d(
+            x=[0], y=[0], z=[0], mode="markers",
+            marker=dict(size=8, color="yellow", symbol="circle"), name="Sun"))
+        self.fig.update_layout(
+            scene=dict(xaxis_title="X [pc]", yaxis_title="Y [pc]", zaxis_title="Z [pc]", aspectmode="data"),
+            margin=dict(l=0, r=0, b=0, t=40))
+        self._last = None
+        return self.fig
+
+    def update(self, radius=20):
+        # interact() dönüş değerini ayrıca göstermesin diye None döner; figür self.fig
+        if self.fig is None:
+            self.figure()
+        xyz, size, dist, n = self.select(radius)
+        key = (n, len(xyz), self.mode)
+        if key == self._last:
+            return   # görünür küme değişmedi
+        self._last = key
+        shown = "" if len(xyz) == n else f", gösterilen {len(xyz)}"
+        with self.fig.batch_update():
+            tr = self.fig.data[0]
+            tr.x, tr.y, tr.z = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+            tr.marker.size = size
+            tr.marker.color = dist
+            self.fig.layout.title = f"Güneş merkezli 3D dağılım (r ≤ {radius} pc, {n} yıldız{shown})"
@@ -0,0 +1,71 @@
+# Ağır kütüphanelerin ilk kullanımda yüklenmesi.
+#
+# lightkurve (~3.5 s), astroquery, pandas, astropy ve matplotlib modül başında import edilince her
+# süreç (worker, tek hedefli CLI çağrısı, --queue-status gibi hiç veri işlemeyen komutlar) bu
+# bedeli öder. Vekil nesne ilk öznitelik erişiminde modülü import eder, sonra doğrudan ona yönlenir:
+#
+#   lk = lazy_import("lightkurve", setup=lambda m: m.log.setLevel("ERROR"))
+#   lk.search_lightcurve(...)     # import burada
+#
+#   python -X importtime Transit-Analysis-Pipeline.py --queue-status   # başlangıç maliyeti
+import sys
+import importlib
+import threading
+
+_LOCK = threading.RLock()
+
+
+class LazyModule:
+    """name modülünün vekili; setup(modül) yalnızca ilk yüklemede bir kez çağrılır."""
+
+    def __init__(self, name, setup=None):
+        self.__dict__["_name"] = name
+        self.__dict__["_setup"] = setup
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        mod = self.__dict__["_module"]
+        if mod is not None:
+            return mod
+        with _LOCK:
+            mod = self.__dict__["_module"]
+            if mod is None:
+                mod = importlib.import_module(self._name)
+                if self._setup is not None:
+                    try:
+                        self._setup(mod)
+                    except Exception:
+                        pass    # ayar (log seviyesi vb.) başarısızsa modül yine kullanılabilir
+                self.__dict__["_module"] = mod
+        return mod
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "yüklü" if self.__dict__["_module"] is not None else "yüklenmedi"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_import(name, setup=None):
+    return LazyModule(name, setup)
+
+
+def is_loaded(name):
+    """Modül bu süreçte (vekil ya da doğrudan import ile) yüklenmiş mi."""
+    return name in sys.modules
+
+
+def preload(*modules):
+    """Vekilleri şimdi yükler (sıcak worker başlangıcında; ilk hedef import bedelini ödemesin)."""
+    for m in modules:
+        if isinstance(m, LazyModule):
+            m._load()
+        else:
+            importlib.import_module(m)
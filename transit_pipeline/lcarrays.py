@@ -0,0 +1,186 @@
+# Pipeline aşamaları arasında taşınan hafif ışık eğrisi: lightkurve.LightCurve yerine düz diziler.
+#
+# LightCurve astropy Time + Quantity sütunları, meta ve görevin tüm ek sütunlarıyla gelir; her aşama
+# getattr(x, "value", x) ile bunları yeniden açar. Burada yalnızca hesabın kullandığı alanlar:
+#   time      float64, bitişik (görevin kendi zamanı: BTJD/BKJD ...)
+#   flux      float32 (normalize akı ~1; float32 bağıl hassasiyeti ~6e-8, ppm sinyallerin çok altında)
+#   flux_err  float32 ya da None
+#   quality   int32 bayraklar ya da None
+#   segments  int64 sınırlar [0, ..., n]: çeyrek/sektör i = [segments[i], segments[i+1])
+#   time_offset  BJD = time + time_offset (btjd 2457000, bkjd 2454833)
+# Kernel'ler (fold/bin, detrend, epoch, ttv) dizileri doğrudan alır; seçim/maskeleme dışında kopya yok.
+# __slots__: nesne başına __dict__ yok, pickle yalnızca dizileri taşır.
+#
+#   lca = LightCurveArrays.from_collection(lcc)          # stitch karşılığı (her parça medyana normalize)
+#   lca = lca.remove_nans()
+#   flat = lca.with_flux(flux / trend, flux_err / trend)  # time/quality/segments paylaşılır
+#   lc = flat.to_lightcurve()                             # gerekirse lightkurve'e geri
+import numpy as np
+
+TIME_OFFSETS = {"btjd": 2457000.0, "bkjd": 2454833.0}
+
+
+def _values(x):
+    if x is None:
+        return None
+    x = getattr(x, "value", x)
+    if np.ma.isMaskedArray(x):
+        x = x.filled(np.nan) if x.dtype.kind == "f" else x.filled(0)
+    return np.asarray(x)
+
+
+def _column(lc, name):
+    try:
+        return _values(lc[name]) if name in getattr(lc, "colnames", ()) else None
+    except Exception:
+        return None
+
+
+class LightCurveArrays:
+    __slots__ = ("time", "flux", "flux_err", "quality", "segments", "time_format", "time_scale",
+                 "time_offset", "meta")
+
+    def __init__(self, time, flux, flux_err=None, quality=None, segments=None, time_format="jd",
+                 time_scale="tdb", time_offset=None, meta=None):
+        # dtype zaten doğruysa ascontiguousarray kopyalamaz
+        self.time = np.ascontiguousarray(time, dtype=np.float64)
+        self.flux = np.ascontiguousarray(flux, dtype=np.float32)
+        self.flux_err = np.ascontiguousarray(flux_err, dtype=np.float32) if flux_err is not None else None
+        self.quality = np.ascontiguousarray(quality, dtype=np.int32) if quality is not None else None
+        n = self.time.size
+        self.segments = np.asarray([0, n] if segments is None else segments, dtype=np.int64)
+        self.time_format = str(time_format).lower()
+        self.time_scale = str(time_scale)
+        self.time_offset = TIME_OFFSETS.get(self.time_format, 0.0) if time_offset is None else float(time_offset)
+        self.meta = dict(meta or {})
+
+    # ---- lightkurve dönüşümleri ----
+    @classmethod
+    def from_lightcurve(cls, lc, meta=None):
+        t = lc.time
+        return cls(_values(t), _values(lc.flux), _values(getattr(lc, "flux_err", None)),
+                   _column(lc, "quality"), None, getattr(t, "format", "jd"), getattr(t, "scale", "tdb"),
+                   meta=meta)
+
+    @classmethod
+    def from_collection(cls, lcs, normalize=True, meta=None):
+        """
+        LightCurveCollection.stitch() karşılığı: her parça kendi medyanına bölünür (normalize=True),
+        sırayla tek dizilere yazılır; parça sınırları segments'te kalır. LightCurve ya da
+        LightCurveArrays parçaları kabul eder.
+        """
+        parts = [p if isinstance(p, cls) else cls.from_lightcurve(p) for p in lcs]
+        if not parts:
+            raise ValueError("boş koleksiyon")
+        n = sum(len(p) for p in parts)
+        has_err = all(p.flux_err is not None for p in parts)
+        has_q = all(p.quality is not None for p in parts)
+        time = np.empty(n, dtype=np.float64)
+        flux = np.empty(n, dtype=np.float32)
+        flux_err = np.empty(n, dtype=np.float32) if has_err else None
+        quality = np.empty(n, dtype=np.int32) if has_q else None
+        bounds = [0]
+        lo = 0
+        for p in parts:
+            hi = lo + len(p)
+            scale = 1.0
+            if normalize:
+                finite = p.flux[np.isfinite(p.flux)]
+                med = float(np.median(finite)) if finite.size else 1.0
+                scale = 1.0 / med if med != 0.0 and np.isfinite(med) else 1.0
+            time[lo:hi] = p.time
+            np.multiply(p.flux, scale, out=flux[lo:hi], casting="unsafe")
+            if has_err:
+                np.multiply(p.flux_err, abs(scale), out=flux_err[lo:hi], casting="unsafe")
+            if has_q:
+                quality[lo:hi] = p.quality
+            lo = hi
+            bounds.append(hi)
+        first = parts[0]
+        return cls(time, flux, flux_err, quality, bounds, first.time_format, first.time_scale,
+                   first.time_offset, meta if meta is not None else first.meta)
+
+    def to_lightcurve(self):
+        import lightkurve as lk
+        from astropy.time import Time
+        time = Time(self.time, format=self.time_format, scale=self.time_scale)
+        lc = lk.LightCurve(time=time, flux=self.flux.astype(np.float64),
+                           flux_err=self.flux_err.astype(np.float64) if self.flux_err is not None else None)
+        if self.quality is not None:
+            lc["quality"] = self.quality
+        return lc
+
+    # ---- lc_cache girdisi (lccache.HostLightCurveCache) ----
+    def to_entry(self, meta=None):
+        entry = {"time": self.time, "flux": self.flux, "flux_err": self.flux_err,
+                 "segments": self.segments,
+                 "meta": dict(self.meta, **(meta or {}), time_format=self.time_format,
+                              time_scale=self.time_scale, time_offset=self.time_offset)}
+        if self.quality is not None:
+            entry["quality"] = self.quality
+        return entry
+
+    @classmethod
+    def from_entry(cls, entry):
+        meta = dict(entry.get("meta") or {})
+        fmt = meta.pop("time_format", "jd")
+        scale = meta.pop("time_scale", "tdb")
+        offset = meta.pop("time_offset", None)
+        return cls(entry["time"], entry["flux"], entry.get("flux_err"), entry.get("quality"),
+                   entry.get("segments"), fmt, scale, offset, meta)
+
+    # ---- işlemler ----
+    def __len__(self):
+        return int(self.time.size)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.time, self.flux, self.flux_err, self.quality, self.segments)
+                   if a is not None)
+
+    @property
+    def n_segments(self):
+        return int(self.segments.size - 1)
+
+    def segment(self, i):
+        """i. parçanın (time, flux, flux_err) görünümleri."""
+        lo, hi = int(self.segments[i]), int(self.segments[i + 1])
+        return (self.time[lo:hi], self.flux[lo:hi],
+                self.flux_err[lo:hi] if self.flux_err is not None else None)
+
+    def bjd(self):
+        return self.time + self.time_offset
+
+    def _like(self, time, flux, flux_err, quality, segments):
+        return LightCurveArrays(time, flux, flux_err, quality, segments, self.time_format, self.time_scale,
+                                self.time_offset, self.meta)
+
+    def select(self, keep):
+        """Boolean maskeyle alt küme; segment sınırları korunur."""
+        keep = np.asarray(keep, dtype=bool)
+        counts = np.concatenate(([0], np.cumsum(keep)))
+        return self._like(self.time[keep], self.flux[keep],
+                          self.flux_err[keep] if self.flux_err is not None else None,
+                          self.quality[keep] if self.quality is not None else None,
+                          counts[self.segments])
+
+    def remove_nans(self):
+        # LightCurve.remove_nans gibi yalnızca akıya bakar; temizse aynı nesne
+        ok = np.isfinite(self.flux)
+        return self if ok.all() else self.select(ok)
+
+    def with_flux(self, flux, flux_err=None):
+        """Aynı zaman/kalite/segmentlerle yeni akı (ör. detrend sonucu)."""
+        return self._like(self.time, flux, flux_err, self.quality, self.segments)
+
+    def normalize(self):
+        finite = self.flux[np.isfinite(self.flux)]
+        med = float(np.median(finite)) if finite.size else 1.0
+        if med == 0.0 or not np.isfinite(med):
+            return self
+        return self.with_flux(self.flux / np.float32(med),
+                              self.flux_err / np.float32(abs(med)) if self.flux_err is not None else None)
+
+    def __repr__(self):
+        return (f"LightCurveArrays(n={len(self)}, segments={self.n_segments}, format={self.time_format!r}, "
+                f"offset={self.time_offset}, {self.nbytes / 1e6:.1f} MB)")
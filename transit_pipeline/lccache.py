@@ -0,0 +1,139 @@
+# Host düzeyinde stitch+flatten edilmiş ışık eğrisi önbelleği.
+#
+# Çok gezegenli sistemlerde (KOI-94 d/e, AU Mic b/c ...) arama, indirme,
+# stitch ve flatten host başına bir kez yapılır. Sonuç bellekte (LRU) ve
+# diskte .npz olarak float dizileri halinde tutulur. Aynı host için eşzamanlı
+# istekler tek bir hesaplamayı bekler (süreç içinde Future, süreçler arasında
+# dosya kilidi).
+#
+# compute() None döndürürse (indirme/okuma hatası, geçici olabilir) hiçbir şey
+# saklanmaz, sonraki istek yeniden dener. Kesin "ürün yok" sonucu NO_DATA ile
+# bildirilir; yalnızca o bellekte tutulur (diskte değil: yeni veri gelince
+# sonraki koşu yeniden arar).
+import os
+import io
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası kilit yok
+    fcntl = None
+
+_MISS = object()
+NO_DATA = object()
+
+
+class HostLightCurveCache:
+    def __init__(self, cache_dir, max_items=64):
+        self.cache_dir = str(cache_dir)
+        self.max_items = max_items
+        self._mem = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key_id(key) -> str:
+        return hashlib.sha1(json.dumps(list(key), default=str).encode("utf-8")).hexdigest()
+
+    def path_for(self, key) -> str:
+        return os.path.join(self.cache_dir, f"{self.key_id(key)}.npz")
+
+    # --- disk ---
+    def _load_disk(self, key):
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                # time/flux/meta zorunlu; flux_err, quality, segments (LightCurveArrays.to_entry) isteğe bağlı
+                entry = {name: z[name] for name in z.files if name != "meta"}
+                entry.setdefault("flux_err", None)
+                entry["meta"] = json.loads(str(z["meta"]))
+                return entry
+        except Exception:
+            # bozuk/yarım dosya: sil, yeniden hesaplansın
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _store_disk(self, key, entry):
+        path = self.path_for(key)
+        arrays = {k: v for k, v in entry.items() if k != "meta" and v is not None}
+        arrays["meta"] = np.array(json.dumps(entry["meta"], default=str))
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        tmp = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(buf.getvalue())
+        os.replace(tmp, path)
+
+    # --- bellek (LRU) ---
+    def _remember(self, key, entry):
+        with self._lock:
+            self._mem[key] = entry
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_items:
+                self._mem.popitem(last=False)
+
+    def has(self, key) -> bool:
+        with self._lock:
+            if key in self._mem:
+                return True
+        return os.path.exists(self.path_for(key))
+
+    def _file_lock(self, key):
+        if fcntl is None:
+            return None
+        f = open(self.path_for(key) + ".lock", "a")
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return f
+
+    def get_or_compute(self, key, compute):
+        """
+        compute() -> entry (LightCurveArrays.to_entry çıktısı), NO_DATA (ürün yok, bellekte tutulur)
+        veya None (başarısız, tutulmaz). Döndürülen değer entry ya da None; entry diskten de okunabilir.
+        """
+        with self._lock:
+            entry = self._mem.get(key, _MISS)
+            if entry is not _MISS:
+                self._mem.move_to_end(key)
+                return None if entry is NO_DATA else entry
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+        if not owner:
+            return fut.result()
+
+        try:
+            lockf = self._file_lock(key)
+            try:
+                entry = self._load_disk(key)
+                if entry is None:
+                    entry = compute()
+                    if entry is not None and entry is not NO_DATA:
+                        self._store_disk(key, entry)
+            finally:
+                if lockf is not None:
+                    lockf.close()
+            if entry is not None:
+                self._remember(key, entry)
+            if entry is NO_DATA:
+                entry = None
+            fut.set_result(entry)
+            return entry
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
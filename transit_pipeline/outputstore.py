@@ -0,0 +1,256 @@
+# Hedef başına ikili çıktı: float32 .npy diziler + manifest ve metrikler tek SQLite tablosunda.
+#
+#   <root>/arrays/<hedef>.npy   (3, N) float32: phase_day, flux, flux_err (np.load(mmap_mode="r") ile açılır)
+#   <root>/outputs.sqlite       targets tablosu: hedef başına bir satır (manifest + metrik sütunları);
+#                               yeni metrik anahtarları gelince sütun eklenir
+#
+# csv/<hedef>.csv + manifest.jsonl + metrics.csv üçlüsünün ikili karşılığı; pipeline'da OUTPUT_FORMAT
+# ile seçilir. Okuma:
+#   store = OutputStore(OUTPUT_DIR)
+#   df = store.metrics(["planet", "depth", "snr"], where="snr > ?", params=(7,))
+#   phase, flux, flux_err = store.load("Kepler-10 b")
+#   store.to_parquet("metrics.parquet")
+#
+#   python -m transit_pipeline.outputstore --root OUTPUT_DIR --parquet metrics.parquet
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+
+import numpy as np
+
+ARRAY_FIELDS = ("phase_day", "flux", "flux_err")
+DB_NAME = "outputs.sqlite"
+
+
+def _plain(v):
+    # sqlite'a yazılabilir python tipi; dict/list JSON metni olur
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, (dict, list, tuple)):
+        return json.dumps(v, ensure_ascii=False, default=str)
+    if isinstance(v, float) and not np.isfinite(v):
+        return None
+    return v
+
+
+def _sql_type(v):
+    if isinstance(v, (bool, int, np.integer, np.bool_)):
+        return "INTEGER"
+    if isinstance(v, (float, np.floating)):
+        return "REAL"
+    return "TEXT"
+
+
+def read_folded(path, mmap=True):
+    """Katlanmış eğri dosyası (.npy ya da eski .csv) -> (phase_day, flux, flux_err)."""
+    if path.endswith(".npy"):
+        a = np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+        return a[0], a[1], a[2]
+    import pandas as pd
+    df = pd.read_csv(path)
+    return tuple(df[c].to_numpy(dtype=np.float64) for c in ARRAY_FIELDS)
+
+
+def manifest_records(path):
+    """manifest.jsonl ya da outputs.sqlite -> manifest kayıtları (hedef başına son kayıt sonda)."""
+    if path.endswith(".sqlite"):
+        return OutputStore(os.path.dirname(os.path.abspath(path))).records()
+    out = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    continue
+    return out
+
+
+def data_path(rec, csv_dir, arrays_dir=None):
+    """Kaydın katlanmış eğri dosyası: ikili dizi varsa o, yoksa CSV; hiçbiri yoksa None."""
+    if rec.get("arrays") and arrays_dir:
+        return os.path.join(arrays_dir, rec["arrays"])
+    if rec.get("csv") and csv_dir:
+        return os.path.join(csv_dir, rec["csv"])
+    return None
+
+
+class OutputStore:
+    def __init__(self, root, arrays_dir=None):
+        # arrays_dir: dizileri başka klasöre yaz (parçalı çalıştırmada ortak arrays/, tablo parçaya özel)
+        self.root = str(root)
+        self.arrays_dir = str(arrays_dir) if arrays_dir else os.path.join(self.root, "arrays")
+        self.db_path = os.path.join(self.root, DB_NAME)
+        os.makedirs(self.arrays_dir, exist_ok=True)
+        self._columns = None
+        self._lock = threading.Lock()
+        with self._db() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS targets (
+                planet TEXT PRIMARY KEY, seq INTEGER NOT NULL, updated REAL NOT NULL)""")
+            con.execute("CREATE INDEX IF NOT EXISTS targets_seq ON targets (seq)")
+
+    def _db(self):
+        # her işlemde yeni bağlantı: fork edilen worker'larla güvenli
+        con = sqlite3.connect(self.db_path, timeout=60)
+        # WAL paylaşımlı bellek ister, ortak dosya sisteminde (Lustre/NFS) güvenli değil (bkz. workqueue)
+        con.execute("PRAGMA journal_mode=DELETE")
+        return con
+
+    # ---- diziler ----
+    def array_path(self, name):
+        return os.path.join(self.arrays_dir, name)
+
+    def write_arrays(self, base, phase, flux, flux_err=None):
+        """(3, N) float32 .npy yazar (atomik); dosya adını döndürür."""
+        n = len(phase)
+        a = np.empty((len(ARRAY_FIELDS), n), dtype=np.float32)
+        a[0] = phase
+        a[1] = flux
+        a[2] = flux_err if flux_err is not None else np.nan
+        name = f"{base}.npy"
+        path = self.array_path(name)
+        tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            np.save(f, a, allow_pickle=False)
+        os.replace(tmp, path)
+        return name
+
+    def load(self, planet, mmap=True):
+        """Hedefin katlanmış eğrisi (phase_day, flux, flux_err); mmap=True ise diskten eşlenmiş görünümler."""
+        rec = self.get(planet)
+        if rec is None or not rec.get("arrays"):
+            raise KeyError(planet)
+        return read_folded(self.array_path(rec["arrays"]), mmap=mmap)
+
+    def load_many(self, planets=None, mmap=True):
+        """(planet, (phase_day, flux, flux_err)) üreteci; planets None ise tüm hedefler."""
+        for rec in self.records(planets=planets):
+            if rec.get("arrays"):
+                yield rec["planet"], read_folded(self.array_path(rec["arrays"]), mmap=mmap)
+
+    # ---- tablo ----
+    def columns(self, con=None, refresh=False):
+        if self._columns is None or refresh:
+            if con is None:
+                with self._db() as c:
+                    rows = c.execute("PRAGMA table_info(targets)").fetchall()
+            else:
+                rows = con.execute("PRAGMA table_info(targets)").fetchall()
+            self._columns = [r[1] for r in rows]
+        return self._columns
+
+    def _ensure_columns(self, con, rec):
+        have = set(self.columns(con))
+        for k, v in rec.items():
+            if k in have:
+                continue
+            try:
+                con.execute(f'ALTER TABLE targets ADD COLUMN "{k}" {_sql_type(v)}')
+            except sqlite3.OperationalError:
+                pass    # başka bir süreç aynı sütunu eklemiş
+        if not have.issuperset(rec):
+            self.columns(con, refresh=True)
+
+    def put(self, planet, rec):
+        """Hedefin satırını rec ile değiştirir (rec'te olmayan sütunlar NULL olur)."""
+        rec = {k: _plain(v) for k, v in rec.items() if k not in ("planet", "seq", "updated")}
+        with self._lock, self._db() as con:
+            con.execute("BEGIN IMMEDIATE")
+            self._ensure_columns(con, rec)
+            seq = con.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM targets").fetchone()[0]
+            cols = ["planet", "seq", "updated"] + list(rec)
+            names = ", ".join(f'"{c}"' for c in cols)
+            sql = f"INSERT OR REPLACE INTO targets ({names}) VALUES ({', '.join('?' * len(cols))})"
+            con.execute(sql, [planet, seq, time.time()] + list(rec.values()))
+
+    def get(self, planet):
+        recs = self.records(planets=[planet])
+        return recs[0] if recs else None
+
+    def records(self, since_seq=0, planets=None):
+        """seq sırasıyla satırlar (dict, NULL sütunlar atlanır)."""
+        sql = "SELECT * FROM targets WHERE seq > ?"
+        params = [since_seq]
+        if planets is not None:
+            planets = list(planets)
+            sql += f" AND planet IN ({', '.join('?' * len(planets))})"
+            params += planets
+        with self._db() as con:
+            cur = con.execute(sql + " ORDER BY seq", params)
+            names = [d[0] for d in cur.description]
+            return [{k: v for k, v in zip(names, row) if v is not None} for row in cur]
+
+    def metrics(self, columns=None, where=None, params=(), planets=None):
+        """Alt küme DataFrame'i: columns (None: hepsi), where (SQL ifadesi, ? parametreleri), planets."""
+        import pandas as pd
+        cols = "*" if not columns else ", ".join(f'"{c}"' for c in columns)
+        sql = f"SELECT {cols} FROM targets"
+        conds, args = [], list(params)
+        if where:
+            conds.append(f"({where})")
+        if planets is not None:
+            planets = list(planets)
+            conds.append(f"planet IN ({', '.join('?' * len(planets))})")
+            args += planets
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        with self._db() as con:
+            cur = con.execute(sql + " ORDER BY planet", args)
+            names = [d[0] for d in cur.description]
+            return pd.DataFrame.from_records(cur.fetchall(), columns=names)
+
+    def to_parquet(self, path, columns=None, where=None, params=()):
+        df = self.metrics(columns, where, params)
+        df.to_parquet(path, index=False)
+        return path
+
+    def tail(self):
+        return StoreTail(self)
+
+
+class StoreTail:
+    """Son okumadan beri yazılan satırlar (render.ManifestTail'in tablo karşılığı)."""
+
+    def __init__(self, store, from_end=True):
+        self.store = store
+        self.seq = 0
+        if from_end:
+            with store._db() as con:
+                self.seq = con.execute("SELECT COALESCE(MAX(seq), 0) FROM targets").fetchone()[0]
+
+    def read(self):
+        recs = self.store.records(since_seq=self.seq)
+        if recs:
+            self.seq = recs[-1]["seq"]
+        return recs
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="İkili çıktı deposunu incele / dışa aktar")
+    ap.add_argument("--root", required=True, help="outputs.sqlite ve arrays/ içeren klasör")
+    ap.add_argument("--parquet", default=None, help="tüm tabloyu bu Parquet dosyasına yaz")
+    ap.add_argument("--csv-dir", default=None, help="dizileri eski biçimde <hedef>.csv olarak dışa aktar")
+    args = ap.parse_args(argv)
+    store = OutputStore(args.root)
+    recs = store.records()
+    print(f"{len(recs)} hedef, {len(store.columns())} sütun")
+    if args.parquet:
+        store.to_parquet(args.parquet)
+        print(f"-> {args.parquet}")
+    if args.csv_dir:
+        import pandas as pd
+        os.makedirs(args.csv_dir, exist_ok=True)
+        for rec in recs:
+            if not rec.get("arrays"):
+                continue
+            arrays = read_folded(store.array_path(rec["arrays"]))
+            name = rec.get("csv") or os.path.splitext(rec["arrays"])[0] + ".csv"
+            pd.DataFrame(dict(zip(ARRAY_FIELDS, arrays))).to_csv(os.path.join(args.csv_dir, name), index=False)
+        print(f"-> {args.csv_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# TPF piksel küplerinden toplu açıklık (aperture) fotometrisi.
+#
+# - aday açıklıklar (pipeline, threshold, optimal-SNR, genişletilmiş pipeline) tek bir
+#   (K, piksel) maske matrisine dizilir; tüm açıklıkların ışık eğrileri tek matris
+#   çarpımıyla çıkar: (T, piksel) @ (piksel, K)
+# - aynı piksel düzenine sahip çeyrekler zaman ekseninde birleştirilip birlikte işlenir
+# - maskeler hedefe tohumlanır (pipeline maskesinin merkezi, yoksa damga merkezi; en parlak piksel
+#   komşu yıldız olabilir). Sinyal hedef şablonudur: arkaplan çıkarılır, PSF simetrik kabul edilip
+#   her piksel merkeze göre aynasıyla karşılaştırılır (küçüğü); komşunun akısı sinyal sayılmaz.
+#   Şablon harmanlanmış komşuda hedef dışı payı eksik tahmin eder (alt sınır), bu yüzden sınır düşük.
+# - her çeyrek için, hedef dışı akı payı MAX_CONTAMINATION'ı aşmayan adaylardan CDPP'si en düşük
+#   olan seçilir (komşu yıldızı alan açıklık CDPP'yi düşürür ama transit derinliğini seyreltir)
+#
+# Toplam, lightkurve to_lightcurve(method="aperture") ile aynı: NaN pikseller 0 sayılır,
+# açıklıkta hiç sonlu piksel yoksa akı NaN, hata sqrt(Σσ²).
+import numpy as np
+
+CDPP_WINDOW = 101        # detrend penceresi (kadans), flatten(window_length=101) ile aynı
+CDPP_DURATION = 13       # 13 uzun kadans ≈ 6.5 saat (lightkurve estimate_cdpp varsayılanı)
+MAX_CONTAMINATION = 0.05  # auto seçim: açıklıktaki (arkaplan çıkarılmış) akının hedef dışı pay sınırı
+CENTER_SEARCH = 0.5       # hedef merkezi pipeline maskesi merkezinden en fazla bu kadar piksel kayar
+
+
+def tpf_arrays(tpf):
+    """lightkurve TPF -> düz diziler (kalite maskesi uygulanmış kadanslar)."""
+    return {
+        "time": np.asarray(tpf.time.value, dtype=np.float64),
+        "flux": np.asarray(tpf.flux.value, dtype=np.float32),
+        "flux_err": np.asarray(tpf.flux_err.value, dtype=np.float32),
+        "pipeline_mask": np.asarray(tpf.pipeline_mask, dtype=bool),
+        "quarter": getattr(tpf, "quarter", None),
+    }
+
+
+def _component(mask, seed):
+    """mask içinde seed pikseline bağlı (4-komşu) bölge."""
+    out = np.zeros_like(mask)
+    if not mask[seed]:
+        return out
+    stack = [seed]
+    h, w = mask.shape
+    while stack:
+        i, j = stack.pop()
+        if out[i, j]:
+            continue
+        out[i, j] = True
+        for a, b in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+            if 0 <= a < h and 0 <= b < w and mask[a, b] and not out[a, b]:
+                stack.append((a, b))
+    return out
+
+
+def background_level(image):
+    """Damganın arkaplanı ve gürültüsü: (medyan, 1.4826·MAD)."""
+    vals = image[np.isfinite(image)]
+    if vals.size == 0:
+        return 0.0, 0.0
+    med = float(np.median(vals))
+    return med, float(1.4826 * np.median(np.abs(vals - med)))
+
+
+def target_center(image, pipeline_mask=None, search=CENTER_SEARCH, step=0.05):
+    """
+    Hedefin alt piksel merkezi. Başlangıç: pipeline maskesinin geometrik merkezi (yoksa damga merkezi);
+    ±search piksel içinde simetrik şablon akısını en büyüten nokta. Arama dar tutulur: daha uzakta
+    hedefle parlak komşunun arası da yüksek simetrik akı verir.
+    """
+    H, W = image.shape
+    if pipeline_mask is not None and pipeline_mask.any():
+        rows, cols = np.nonzero(pipeline_mask)
+        c0 = (float(rows.mean()), float(cols.mean()))
+    else:
+        c0 = ((H - 1) / 2.0, (W - 1) / 2.0)
+    signal = _signal(image)
+    offsets = np.arange(-search, search + step / 2, step)
+    return max(((c0[0] + dy, c0[1] + dx) for dy in offsets for dx in offsets),
+               key=lambda c: _symmetric(signal, c).sum())
+
+
+def _signal(image, background=None):
+    bkg = background_level(image)[0] if background is None else background
+    return np.where(np.isfinite(image), image - bkg, 0.0)
+
+
+def _symmetric(signal, center):
+    # her piksel ve merkeze göre aynasının (kübik spline ile kaydırılmış ters görüntü) küçüğü
+    from scipy.ndimage import shift
+    H, W = signal.shape
+    mirror = shift(signal[::-1, ::-1], (2 * center[0] - (H - 1), 2 * center[1] - (W - 1)), order=3,
+                   mode="constant")
+    return np.clip(np.minimum(signal, mirror), 0.0, None)
+
+
+def target_template(image, center=None, background=None):
+    """
+    Hedefin arkaplan çıkarılmış akı şablonu (SDSS deblender şablonu gibi): PSF merkeze göre simetrik
+    kabul edilir, her piksel aynasıyla karşılaştırılıp küçüğü alınır. Komşu yıldızın akısı aynada
+    bulunmadığından şablona girmez.
+    """
+    center = target_center(image) if center is None else center
+    return _symmetric(_signal(image, background), center)
+
+
+def threshold_mask(image, threshold=3.0, center=None):
+    """
+    Medyan + threshold·σ(MAD) üstündeki ve akısının çoğu hedef şablonundan gelen, hedef merkezine bağlı
+    bölge (create_threshold_mask benzeri; en parlak piksel komşu yıldız olabileceğinden hedefe tohumlanır).
+    """
+    finite = np.isfinite(image)
+    if not finite.any():
+        return np.zeros(image.shape, dtype=bool)
+    med, mad = background_level(image)
+    center = target_center(image) if center is None else center
+    above = finite & (image > med + threshold * mad)
+    target = target_template(image, center, med) >= 0.5 * (image - med)
+    seed = (int(round(center[0])), int(round(center[1])))
+    return _component(above & target, seed)
+
+
+def optimal_snr_mask(image, noise_var, center=None, background=None):
+    """
+    Pikseller hedef şablonunun (arkaplan ve komşu yıldız akısı çıkarılmış) SNR'sine göre sıralanır;
+    toplam S/sqrt(ΣN) en yüksek olan önek seçilir. Gürültüde tüm akı (komşu dahil) sayılır.
+    """
+    center = target_center(image) if center is None else center
+    signal = target_template(image, center, background)
+    ok = np.isfinite(image) & np.isfinite(noise_var) & (noise_var > 0) & (signal > 0)
+    mask = np.zeros(image.shape, dtype=bool)
+    if not ok.any():
+        return mask
+    idx = np.flatnonzero(ok)
+    s = signal.ravel()[idx]
+    v = noise_var.ravel()[idx]
+    order = np.argsort(-s / np.sqrt(v))
+    snr = np.cumsum(s[order]) / np.sqrt(np.cumsum(v[order]))
+    mask.ravel()[idx[order[:int(np.argmax(snr)) + 1]]] = True
+    return mask
+
+
+def contamination(mask, image, template):
+    """Açıklıktaki arkaplan çıkarılmış akının hedef şablonu dışındaki payı (transit derinliği bu oranda seyrelir)."""
+    signal = np.clip(_signal(image), 0.0, None)
+    total = signal[mask].sum()
+    if total <= 0:
+        return 0.0
+    return float(max(0.0, 1.0 - template[mask].sum() / total))
+
+
+def _dilate(mask):
+    out = mask.copy()
+    out[1:] |= mask[:-1]
+    out[:-1] |= mask[1:]
+    out[:, 1:] |= mask[:, :-1]
+    out[:, :-1] |= mask[:, 1:]
+    return out
+
+
+def _candidates(flux, flux_err, pipeline_mask=None, threshold=3.0):
+    # -> ({ad: maske}, {ad: hedef dışı akı payı})
+    # ortalama görüntü için seyreltilmiş kadanslar yeterli
+    step = max(1, flux.shape[0] // 2000)
+    with np.errstate(invalid="ignore"):
+        image = np.nanmedian(flux[::step], axis=0)
+        var = np.nanmedian(flux_err[::step].astype(np.float64) ** 2, axis=0)
+    center = target_center(image, pipeline_mask)
+    cands = {}
+    if pipeline_mask is not None and pipeline_mask.any():
+        cands["pipeline"] = pipeline_mask
+        cands["pipeline+1"] = _dilate(pipeline_mask)
+    cands["threshold"] = threshold_mask(image, threshold, center)
+    # optimal: foton gürültüsü (akı) + piksel hatası
+    cands["optimal"] = optimal_snr_mask(image, var + np.clip(image, 0, None), center)
+    cands = {k: v for k, v in cands.items() if v.any()}
+    template = target_template(image, center)
+    return cands, {k: contamination(v, image, template) for k, v in cands.items()}
+
+
+def candidate_apertures(flux, flux_err, pipeline_mask=None, threshold=3.0):
+    """{ad: (H, W) bool} — boş maskeler atlanır."""
+    return _candidates(flux, flux_err, pipeline_mask, threshold)[0]
+
+
+def choose_aperture(names, scores, contam, prefer=None, max_contamination=MAX_CONTAMINATION):
+    """
+    Seçilen adayın indeksi. prefer varsa o; yoksa hedef dışı akı payı sınırın altındakilerden CDPP'si
+    en düşük; hiçbiri uymuyorsa (harmanlanmış komşu) en az kirlenmiş aday — CDPP tek başına ölçüt
+    değil: komşuyu alan açıklık gürültüyü düşürür ama derinliği seyreltir.
+    """
+    if prefer in names:
+        return names.index(prefer)
+    ok = [i for i, k in enumerate(names) if contam[k] <= max_contamination and np.isfinite(scores[i])]
+    if ok:
+        return min(ok, key=lambda i: scores[i])
+    return min(range(len(names)), key=lambda i: (contam[names[i]], names[i] != "pipeline"))
+
+
+def aperture_sums(flux, flux_err, masks):
+    """
+    flux, flux_err: (T, H, W); masks: (K, H, W) -> (T, K) akı ve hata.
+    Tek matris çarpımı; NaN pikseller 0 sayılır, hiç sonlu piksel yoksa NaN.
+    """
+    T = flux.shape[0]
+    M = np.asarray(masks, dtype=np.float32).reshape(len(masks), -1).T      # (P, K)
+    f = flux.reshape(T, -1)
+    finite = np.isfinite(f)
+    f0 = np.where(finite, f, 0).astype(np.float32, copy=False)
+    e2 = np.where(finite, flux_err.reshape(T, -1), 0).astype(np.float32, copy=False) ** 2
+    s = f0 @ M
+    err = np.sqrt(e2 @ M)
+    empty = (finite.astype(np.float32) @ M) == 0
+    s[empty] = np.nan
+    err[empty] = np.nan
+    return s.astype(np.float64), err.astype(np.float64)
+
+
+def _moving_median(x, window):
+    # (T, K) sütun başına kayan medyan (x sonlu olmalı); kenarlar yansıtılarak doldurulur
+    from numpy.lib.stride_tricks import sliding_window_view
+    h = window // 2
+    if x.shape[0] <= h:
+        return np.median(x, axis=0, keepdims=True).repeat(x.shape[0], axis=0)
+    pad = np.pad(x, ((h, h), (0, 0)), mode="reflect")
+    return np.median(sliding_window_view(pad, window, axis=0), axis=-1)[:x.shape[0]]
+
+
+def cdpp(flux, window=CDPP_WINDOW, duration=CDPP_DURATION, sigma=5.0):
+    """(T,) ya da (T, K) -> ppm cinsinden CDPP (sütun başına). estimate_cdpp'ye benzer, NumPy ile."""
+    f = np.asarray(flux, dtype=np.float64)
+    one = f.ndim == 1
+    if one:
+        f = f[:, None]
+    out = np.full(f.shape[1], np.nan)
+    good = np.isfinite(f).all(axis=1)
+    f = f[good]
+    if f.shape[0] < max(duration * 2, 10):
+        return out[0] if one else out
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = f / _moving_median(f, window) - 1.0
+        med = np.median(r, axis=0)
+        mad = 1.4826 * np.median(np.abs(r - med), axis=0)
+        r = np.where(np.abs(r - med) < sigma * mad, r, np.nan)
+        # duration kadanslık kayan ortalama, NaN'lar dışarıda
+        ok = np.isfinite(r)
+        c = np.cumsum(np.where(ok, r, 0), axis=0)
+        n = np.cumsum(ok, axis=0)
+        c = np.vstack([np.zeros((1, c.shape[1])), c])
+        n = np.vstack([np.zeros((1, n.shape[1])), n])
+        cnt = n[duration:] - n[:-duration]
+        mean = (c[duration:] - c[:-duration]) / cnt
+        mean[cnt < duration // 2 + 1] = np.nan
+        out = np.nanstd(mean, axis=0) * 1e6
+    return out[0] if one else out
+
+
+def best_aperture(arrays, threshold=3.0, prefer=None):
+    """
+    Tek çeyrek: adaylar tek geçişte toplanır, kirlenmemişlerden CDPP'si en düşük olan seçilir.
+    prefer: "pipeline"/"threshold"/... verilirse o açıklık zorlanır (varsa).
+    Döner: {"aperture", "mask", "time", "flux", "flux_err", "cdpp": {ad: ppm},
+            "contamination": {ad: pay}, "quarter"}
+    """
+    return batch_photometry([arrays], threshold, prefer)[0]
+
+
+def batch_photometry(arrays_list, threshold=3.0, prefer=None):
+    """
+    Çok çeyrek: aynı piksel düzenine (H, W ve pipeline maskesi) sahip çeyreklerin küpleri
+    zaman ekseninde birleştirilir, aday maskeler bir kez kurulup tek çarpımla toplanır;
+    CDPP ve seçim çeyrek başına yapılır. Sonuçlar girdi sırasıyla döner.
+    """
+    groups = {}
+    for i, a in enumerate(arrays_list):
+        pm = a.get("pipeline_mask")
+        key = (a["flux"].shape[1:], pm.tobytes() if pm is not None else None)
+        groups.setdefault(key, []).append(i)
+    out = [None] * len(arrays_list)
+    for idx in groups.values():
+        flux = np.concatenate([arrays_list[i]["flux"] for i in idx])
+        err = np.concatenate([arrays_list[i]["flux_err"] for i in idx])
+        cands, contam = _candidates(flux, err, arrays_list[idx[0]].get("pipeline_mask"), threshold)
+        names = list(cands)
+        s, e = aperture_sums(flux, err, np.stack([cands[k] for k in names]))
+        del flux, err
+        lo = 0
+        for i in idx:
+            n = arrays_list[i]["flux"].shape[0]
+            qs, qe = s[lo:lo + n], e[lo:lo + n]
+            lo += n
+            scores = cdpp(qs)
+            j = choose_aperture(names, scores, contam, prefer)
+            out[i] = {"aperture": names[j], "mask": cands[names[j]], "flux": qs[:, j].copy(),
+                      "flux_err": qe[:, j].copy(), "cdpp": {k: float(v) for k, v in zip(names, scores)},
+                      "contamination": dict(contam),
+                      "time": arrays_list[i]["time"], "quarter": arrays_list[i].get("quarter")}
+    return out
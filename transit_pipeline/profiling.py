@@ -0,0 +1,263 @@
+# Hedef başına aşama süreleri, bellek ve çalışma sonu raporu.
+#
+#   with TargetTimer(planet, "target", sink=log) as tt:
+#       with stage("download"):
+#           ...
+#       add_bytes(n)
+#       tt.status = "ok"
+#
+# - aşamalar iç içe olabilir; süreler dışlayıcıdır (alt aşama çalışırken üst aşamanın saati durur),
+#   yani aşama toplamları ≈ hedefin duvar süresi; aşama dışı süre "other" olarak yazılır
+# - etkin zamanlayıcı contextvar'da; alt fonksiyonlar zamanlayıcıyı parametre olarak almaz,
+#   zamanlayıcı yoksa stage() hiçbir şey yapmaz
+# - profile_dir verilirse hedef cProfile altında çalışır, <profile_dir>/<hedef>.<faz>.prof yazılır
+#   (pstats / snakeviz ile açılır; py-spy için kayıtlarda pid ve thread adı var)
+# - bellek alanları (process_*) süreç geneli: aynı süreçte eşzamanlı çalışan hedefler (thread/async)
+#   birbirinin ayırdığı belleği görür, hedefe özgü değildir; tepe RSS süreç ömrü boyuncadır
+# - summarize(): aşama yüzdelikleri, en yavaş hedefler, havuz doluluğu
+import os
+import re
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import numpy as np
+
+_CURRENT = contextvars.ContextVar("target_timer", default=None)
+# 3.12+ cProfile (sys.monitoring) aynı anda tek profiler'a izin verir
+_PROFILE_LOCK = threading.Lock()
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except Exception:
+        return None
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3   # Linux: KB
+    except Exception:
+        return None
+
+
+def should_profile(planet, every=0, names=()):
+    """names içindeyse ya da every>0 ve isim özetine göre her every hedeften biriyse."""
+    if planet in names:
+        return True
+    if not every:
+        return False
+    import zlib
+    return zlib.crc32(str(planet).encode()) % int(every) == 0
+
+
+class TargetTimer:
+    def __init__(self, planet, phase="target", sink=None, profile_dir=None):
+        self.planet = planet
+        self.phase = phase
+        self.sink = sink
+        self.profile_dir = profile_dir
+        self.status = None
+        self.stages = {}
+        self.calls = {}
+        self.bytes = 0
+        self._stack = []
+        self._mark = None
+        self._token = None
+        self._prof = None
+
+    # ---- aşama yığını ----
+    def _charge(self, now):
+        name = self._stack[-1] if self._stack else "other"
+        self.stages[name] = self.stages.get(name, 0.0) + (now - self._mark)
+        self._mark = now
+
+    def push(self, name):
+        self._charge(time.perf_counter())
+        self._stack.append(name)
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def pop(self):
+        self._charge(time.perf_counter())
+        self._stack.pop()
+
+    # ---- yaşam döngüsü ----
+    def __enter__(self):
+        self.t_start = time.time()
+        self._t0 = self._mark = time.perf_counter()
+        self._cpu0 = time.thread_time()
+        self._rss0 = rss_mb()
+        self._token = _CURRENT.set(self)
+        if self.profile_dir and _PROFILE_LOCK.acquire(blocking=False):
+            import cProfile
+            self._prof = cProfile.Profile()
+            try:
+                self._prof.enable()
+            except ValueError:   # başka bir profiler etkin
+                self._prof = None
+                _PROFILE_LOCK.release()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        now = time.perf_counter()
+        self._charge(now)
+        if self._prof is not None:
+            self._prof.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            safe = re.sub(r"[^\w\-\.]+", "_", str(self.planet))
+            self._prof.dump_stats(os.path.join(self.profile_dir, f"{safe}.{self.phase}.prof"))
+            self._prof = None
+            _PROFILE_LOCK.release()
+        _CURRENT.reset(self._token)
+        if exc_type is not None and self.status is None:
+            self.status = "exception"
+        rec = self.record(now)
+        if self.sink is not None:
+            try:
+                self.sink(rec)
+            except Exception:
+                pass
+        return False
+
+    def record(self, now=None):
+        now = time.perf_counter() if now is None else now
+        rss = rss_mb()
+        return {
+            "status": "timing",
+            "planet": self.planet,
+            "phase": self.phase,
+            "target_status": self.status,
+            "t_start": round(self.t_start, 3),
+            "wall_s": round(now - self._t0, 4),
+            "cpu_s": round(time.thread_time() - self._cpu0, 4),
+            "stages": {k: round(v, 4) for k, v in sorted(self.stages.items(), key=lambda kv: -kv[1])},
+            "calls": self.calls,
+            "bytes": self.bytes,
+            "process_rss_mb": None if rss is None else round(rss, 1),
+            "process_rss_delta_mb": None if rss is None or self._rss0 is None else round(rss - self._rss0, 1),
+            "process_peak_rss_mb": peak_rss_mb(),
+            "pid": os.getpid(),
+            "worker": threading.current_thread().name,
+            "profiled": bool(self.profile_dir) and os.path.exists(os.path.join(
+                self.profile_dir, re.sub(r"[^\w\-\.]+", "_", str(self.planet)) + f".{self.phase}.prof")),
+        }
+
+
+@contextmanager
+def stage(name):
+    tt = _CURRENT.get()
+    if tt is None:
+        yield
+        return
+    tt.push(name)
+    try:
+        yield
+    finally:
+        tt.pop()
+
+
+def add_bytes(n):
+    tt = _CURRENT.get()
+    if tt is not None and n:
+        tt.bytes += int(n)
+
+
+def current():
+    return _CURRENT.get()
+
+
+# ---- rapor ----
+def load_records(path, since=None):
+    out = []
+    if not os.path.exists(path):
+        return out
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if '"timing"' not in line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("status") == "timing" and (since is None or rec.get("t_start", 0) >= since):
+                out.append(rec)
+    return out
+
+
+def summarize(records, wall_s, workers=None, top=10):
+    """
+    records: timing kayıtları (aynı hedefin fetch/compute kayıtları birleştirilir)
+    workers: {faz: havuz boyutu} -> faz başına doluluk = Σ meşgul süre / (duvar × boyut)
+    """
+    per_target = {}
+    for r in records:
+        t = per_target.setdefault(r["planet"], {"wall_s": 0.0, "stages": {}, "bytes": 0, "status": None,
+                                                "process_peak_rss_mb": 0.0})
+        t["wall_s"] += r["wall_s"]
+        t["bytes"] += r.get("bytes") or 0
+        t["status"] = r.get("target_status") or t["status"]
+        t["process_peak_rss_mb"] = max(t["process_peak_rss_mb"], r.get("process_peak_rss_mb") or 0.0)
+        for k, v in r["stages"].items():
+            t["stages"][k] = t["stages"].get(k, 0.0) + v
+
+    def pct(values):
+        a = np.asarray(values, dtype=float)
+        if a.size == 0:
+            return None
+        p50, p90, p99 = np.percentile(a, [50, 90, 99])
+        return {"n": int(a.size), "sum": round(float(a.sum()), 3), "p50": round(float(p50), 3),
+                "p90": round(float(p90), 3), "p99": round(float(p99), 3), "max": round(float(a.max()), 3)}
+
+    stage_names = sorted({k for t in per_target.values() for k in t["stages"]})
+    stages = {k: pct([t["stages"][k] for t in per_target.values() if k in t["stages"]]) for k in stage_names}
+    stages = dict(sorted(stages.items(), key=lambda kv: -kv[1]["sum"]))
+    slowest = sorted(per_target.items(), key=lambda kv: -kv[1]["wall_s"])[:top]
+
+    util = {}
+    busy = {}
+    for r in records:
+        busy[r["phase"]] = busy.get(r["phase"], 0.0) + r["wall_s"]
+    for phase, b in busy.items():
+        n = (workers or {}).get(phase)
+        util[phase] = {"busy_s": round(b, 2), "workers": n,
+                       "utilisation": round(b / (wall_s * n), 3) if n and wall_s > 0 else None}
+
+    return {
+        "status": "run_report",
+        "wall_s": round(wall_s, 2),
+        "targets": len(per_target),
+        "target_wall": pct([t["wall_s"] for t in per_target.values()]),
+        "bytes": int(sum(t["bytes"] for t in per_target.values())),
+        "stages": stages,
+        "slowest": [{"planet": p, "wall_s": round(t["wall_s"], 2), "status": t["status"],
+                     "top_stage": max(t["stages"].items(), key=lambda kv: kv[1])[0] if t["stages"] else None}
+                    for p, t in slowest],
+        "utilisation": util,
+        # süreçlerin tepe RSS'lerinin en büyüğü (toplam değil)
+        "process_peak_rss_mb": max((r.get("process_peak_rss_mb") or 0.0 for r in records), default=None),
+    }
+
+
+def format_report(s):
+    lines = [f" Süre: {s['wall_s']:.1f} s | hedef: {s['targets']} | indirilen: {s['bytes'] / 1e6:.1f} MB"
+             + (f" | süreç tepe RSS: {s['process_peak_rss_mb']:.0f} MB" if s.get("process_peak_rss_mb") else "")]
+    tw = s.get("target_wall")
+    if tw:
+        lines.append(f" Hedef süresi: p50 {tw['p50']:.2f} s | p90 {tw['p90']:.2f} s | p99 {tw['p99']:.2f} s"
+                     f" | max {tw['max']:.2f} s")
+    if s["stages"]:
+        lines.append(f" {'aşama':<14}{'toplam':>10}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+        for k, v in s["stages"].items():
+            lines.append(f" {k:<14}{v['sum']:>10.2f}{v['p50']:>9.3f}{v['p90']:>9.3f}{v['p99']:>9.3f}{v['max']:>9.3f}")
+    if s["slowest"]:
+        lines.append(" En yavaş: " + " | ".join(f"{t['planet']} {t['wall_s']:.1f}s ({t['top_stage']})"
+                                               for t in s["slowest"]))
+    for phase, u in s["utilisation"].items():
+        if u["utilisation"] is not None:
+            lines.append(f" Doluluk [{phase}]: %{100 * u['utilisation']:.0f} ({u['workers']} işçi)")
+    return "\n".join(lines)
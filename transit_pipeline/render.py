@@ -0,0 +1,229 @@
+# Bilimsel hesaptan ayrık grafik üretimi.
+#
+# - pyplot yok: matplotlib.figure.Figure + Agg canvas (global durum yok, her iş parçacığı
+#   kendi figürünü kullanır)
+# - şablon yeniden kullanımı: fold figürü iş parçacığı başına bir kez kurulur, sonraki hedeflerde
+#   yalnızca çizgi verisi, eksen sınırları ve başlık güncellenir
+# - ertelenmiş çizim: pipeline manifest'e çizim bilgisini (half_win, bin_size, title) yazar;
+#   PNG'ler kaydedilmiş CSV'lerden ayrı bir süreç havuzunda ya da sonradan üretilir
+#
+# Eksik (ya da verisinden eski) PNG'leri sonradan üretmek için:
+#   python -m transit_pipeline.render --manifest manifest.jsonl --csv-dir csv --png-dir png
+#   python -m transit_pipeline.render --manifest outputs.sqlite --png-dir png     (ikili çıktı)
+import os
+import json
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+FOLD_FIGSIZE = (9, 4)
+FOLD_DPI = 150
+
+_LOCAL = threading.local()
+
+
+def new_figure(figsize=(9, 4), nrows=1, ncols=1, **subplot_kw):
+    """(fig, ax ya da ax dizisi) — pyplot.subplots'un durumsuz karşılığı."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(nrows, ncols, squeeze=True, **subplot_kw)
+    return fig, axes
+
+
+class FoldTemplate:
+    """Katlanmış eğri figürü; render() her hedefte yalnızca artist verilerini değiştirir."""
+
+    def __init__(self, figsize=FOLD_FIGSIZE):
+        self.fig, self.ax = new_figure(figsize)
+        ax = self.ax
+        (self.folded,) = ax.plot([], [], marker=".", linestyle="none", alpha=0.3, label="Folded")
+        (self.binned,) = ax.plot([], [], marker=".", linestyle="none", label="Binned")
+        ax.set_xlabel("Faz (gün)")
+        ax.set_ylabel("Normalize Akı")
+        ax.legend(loc="upper right")
+        ax.set_title(" ")       # tight_layout başlık için yer ayırsın
+        self.fig.tight_layout()
+
+    def render(self, path, phase, flux, bin_phase, bin_flux, half_win, title, dpi=FOLD_DPI):
+        self.folded.set_data(phase, flux)
+        self.binned.set_data(bin_phase, bin_flux)
+        ax = self.ax
+        ax.set_xlim(-half_win, half_win)
+        # y sınırları görünen pencereye göre (autoscale tüm fazı kapsardı)
+        vis = np.abs(phase) <= half_win
+        y = flux[vis] if vis.any() else flux
+        y = y[np.isfinite(y)]
+        if y.size:
+            lo, hi = float(y.min()), float(y.max())
+            pad = 0.05 * (hi - lo) if hi > lo else 1e-3
+            ax.set_ylim(lo - pad, hi + pad)
+        ax.set_title(title)
+        tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}.png"
+        self.fig.savefig(tmp, dpi=dpi)
+        os.replace(tmp, path)
+        return path
+
+
+def fold_template():
+    """Çağıran iş parçacığının şablonu (yoksa kurulur)."""
+    tpl = getattr(_LOCAL, "fold", None)
+    if tpl is None:
+        tpl = _LOCAL.fold = FoldTemplate()
+    return tpl
+
+
+def load_fold_arrays(path, bin_size):
+    """Kaydedilmiş katlanmış eğri (.csv/.npy) -> (phase, flux, bin_phase, bin_flux); dosya faza göre sıralı."""
+    from transit_pipeline.foldkernel import bin_sorted
+    from transit_pipeline.outputstore import read_folded
+    ph, fl, _ = read_folded(path, mmap=True)
+    ph = np.asarray(ph, dtype=np.float64)
+    fl = np.asarray(fl, dtype=np.float64)
+    bph, bfl, _, _ = bin_sorted(ph, fl, None, bin_size)
+    return ph, fl, bph, bfl
+
+
+def render_fold(spec):
+    """
+    spec: {"planet", "data", "png" (tam yollar), "half_win", "bin_size", "title", "dpi"?}
+    Döner: (planet, png yolu, hata ya da None)
+    """
+    try:
+        ph, fl, bph, bfl = load_fold_arrays(spec["data"], spec["bin_size"])
+        fold_template().render(spec["png"], ph, fl, bph, bfl, spec["half_win"], spec["title"],
+                               dpi=spec.get("dpi", FOLD_DPI))
+        return spec["planet"], spec["png"], None
+    except Exception as e:
+        return spec.get("planet"), spec.get("png"), repr(e)
+
+
+def spec_from_manifest(rec, csv_dir, png_dir, dpi=FOLD_DPI, arrays_dir=None):
+    """Manifest kaydı -> render_fold spec'i; çizim bilgisi olmayan (eski) kayıtlarda None."""
+    from transit_pipeline.outputstore import data_path
+    data = data_path(rec, csv_dir, arrays_dir)
+    if not rec.get("planet") or data is None or rec.get("half_win") is None:
+        return None
+    return {"planet": rec["planet"], "data": data,
+            "png": os.path.join(png_dir, rec["png"]), "half_win": rec["half_win"],
+            "bin_size": rec["bin_size"], "title": rec["title"], "dpi": dpi}
+
+
+def is_stale(spec):
+    try:
+        return os.path.getmtime(spec["png"]) < os.path.getmtime(spec["data"])
+    except OSError:
+        return os.path.exists(spec["data"])
+
+
+def pending(manifest, csv_dir, png_dir, dpi=FOLD_DPI, force=False, arrays_dir=None):
+    """
+    PNG'si eksik ya da verisinden eski hedeflerin spec'leri (hedef başına son kayıt).
+    manifest: manifest.jsonl / outputs.sqlite yolu ya da kayıt listesi.
+    """
+    from transit_pipeline.outputstore import manifest_records
+    records = manifest_records(manifest) if isinstance(manifest, str) else manifest
+    seen = {}
+    for rec in records:
+        spec = spec_from_manifest(rec, csv_dir, png_dir, dpi, arrays_dir)
+        if spec is not None:
+            seen[spec["planet"]] = spec
+    return [s for s in seen.values() if force or is_stale(s)]
+
+
+class ManifestTail:
+    """Manifest'e son okumadan beri eklenen tam satırlar (çalışma sırasında yeni hedefleri izlemek için)."""
+
+    def __init__(self, path, from_end=True):
+        self.path = path
+        self.pos = os.path.getsize(path) if from_end and os.path.exists(path) else 0
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.pos)
+            data = f.read()
+        end = data.rfind(b"\n") + 1     # yarım yazılmış son satır bir sonraki okumaya kalır
+        self.pos += end
+        out = []
+        for line in data[:end].splitlines():
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                pass
+        return out
+
+
+class RenderPool:
+    """
+    Ayrı süreç havuzunda fold PNG'leri. submit() beklemez; close() kalan işleri bekler ve
+    (üretilen, hata) sayılarını döndürür. on_done(planet, png, error) her iş bitince çağrılır.
+    """
+
+    def __init__(self, workers=2, on_done=None):
+        self.ex = ProcessPoolExecutor(max_workers=max(1, int(workers)))
+        # fork bağlamında işçiler ilk submit'te açılır; hesap thread'leri başlamadan açılsınlar
+        self.ex.submit(int).result()
+        self.on_done = on_done
+        self.done = 0
+        self.failed = 0
+
+    def submit(self, spec):
+        fut = self.ex.submit(render_fold, spec)
+        fut.add_done_callback(self._finished)
+
+    def _finished(self, fut):
+        try:
+            planet, png, err = fut.result()
+        except Exception as e:
+            planet, png, err = None, None, repr(e)
+        if err is None:
+            self.done += 1
+        else:
+            self.failed += 1
+        if self.on_done is not None:
+            self.on_done(planet, png, err)
+
+    def close(self):
+        self.ex.shutdown(wait=True)
+        return self.done, self.failed
+
+
+def render_all(specs, workers=None):
+    """specs'i süreç havuzunda çizer -> [(planet, png, hata), ...]."""
+    specs = list(specs)
+    workers = workers or min(len(specs), os.cpu_count() or 1)
+    if workers <= 1 or len(specs) <= 1:
+        return [render_fold(s) for s in specs]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(render_fold, specs, chunksize=max(1, len(specs) // (4 * workers))))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Kaydedilmiş katlanmış eğrilerden eksik PNG'leri üret")
+    ap.add_argument("--manifest", required=True)
+    ap.add_argument("--csv-dir", default=None)
+    ap.add_argument("--arrays-dir", default=None, help="varsayılan: outputs.sqlite yanındaki arrays/")
+    ap.add_argument("--png-dir", required=True)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--dpi", type=int, default=FOLD_DPI)
+    ap.add_argument("--force", action="store_true", help="güncel PNG'leri de yeniden çiz")
+    args = ap.parse_args(argv)
+    os.makedirs(args.png_dir, exist_ok=True)
+    arrays_dir = args.arrays_dir
+    if arrays_dir is None and args.manifest.endswith(".sqlite"):
+        arrays_dir = os.path.join(os.path.dirname(os.path.abspath(args.manifest)), "arrays")
+    results = render_all(pending(args.manifest, args.csv_dir, args.png_dir, args.dpi, args.force, arrays_dir),
+                         workers=args.workers)
+    failed = [(p, e) for p, _, e in results if e is not None]
+    print(f"{len(results) - len(failed)} PNG üretildi, {len(failed)} hata")
+    for p, e in failed[:20]:
+        print(f"  {p}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Girdi özetine (hash) dayalı sonuç deposu.
+#
+# Her hedefin sonucu, onu üreten girdilerin (katalog parametreleri, veri
+# ürünleri listesi, pipeline ayarları) kanonik JSON'unun SHA-256 özetiyle
+# kaydedilir. Yeniden çalıştırmada yalnızca özeti değişen (veya çıktısı
+# kaybolan) hedefler hesaplanır; neyin değiştiği raporlanır.
+#
+# Verisi olmayan (ürün listesi boş) hedefler de özetleriyle kaydedilir (outputs = NO_DATA):
+# liste değişmedikçe her koşuda "new" diye yeniden denenmez. Host başına ürün listeleri de
+# burada tutulur (products tablosu); yaşı max_age'i geçmedikçe arşive yeniden sorulmaz.
+import json
+import time
+import hashlib
+import sqlite3
+
+NO_DATA = {"status": "no_data"}
+
+
+def canonical(obj) -> str:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def input_hash(inputs: dict) -> str:
+    return hashlib.sha256(canonical(inputs).encode("utf-8")).hexdigest()
+
+
+def changed_keys(old: dict, new: dict):
+    # iç içe sözlüklerde "settings.FLATTEN_WINDOW" gibi noktalı anahtarlar
+    out = []
+    for k in sorted(set(old) | set(new)):
+        a, b = old.get(k), new.get(k)
+        if isinstance(a, dict) and isinstance(b, dict):
+            out.extend(f"{k}.{sub}" for sub in changed_keys(a, b))
+        elif canonical(a) != canonical(b):
+            out.append(k)
+    return out
+
+
+class ResultStore:
+    def __init__(self, path):
+        self.path = str(path)
+        with self._db() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS results (
+                planet TEXT PRIMARY KEY, input_hash TEXT NOT NULL, inputs TEXT NOT NULL,
+                outputs TEXT, updated REAL NOT NULL)""")
+            con.execute("CREATE INDEX IF NOT EXISTS results_hash ON results (input_hash)")
+            con.execute("""CREATE TABLE IF NOT EXISTS products (
+                host TEXT PRIMARY KEY, data TEXT NOT NULL, fetched REAL NOT NULL)""")
+
+    def _db(self):
+        # her işlemde yeni bağlantı: fork edilen worker'larla güvenli
+        con = sqlite3.connect(self.path, timeout=60)
+        # WAL paylaşımlı bellek ister, ortak dosya sisteminde (Lustre/NFS) güvenli değil (bkz. workqueue)
+        con.execute("PRAGMA journal_mode=DELETE")
+        return con
+
+    def get(self, planet):
+        with self._db() as con:
+            row = con.execute("SELECT input_hash, inputs, outputs, updated FROM results WHERE planet = ?",
+                              (planet,)).fetchone()
+        if row is None:
+            return None
+        return {"input_hash": row[0], "inputs": json.loads(row[1]),
+                "outputs": json.loads(row[2]) if row[2] else None, "updated": row[3]}
+
+    def inputs_many(self, planets):
+        """{gezegen: inputs} — kaydı olanlar (zamanlayıcı ürün listelerini buradan okur)."""
+        planets = list(dict.fromkeys(planets))
+        out = {}
+        with self._db() as con:
+            for i in range(0, len(planets), 500):
+                chunk = planets[i:i + 500]
+                sql = f"SELECT planet, inputs FROM results WHERE planet IN ({','.join('?' * len(chunk))})"
+                for planet, inputs in con.execute(sql, chunk):
+                    out[planet] = json.loads(inputs)
+        return out
+
+    def check(self, planet, inputs, outputs_exist=True):
+        """(yeniden_hesapla, sebep, değişen_anahtarlar) döndürür."""
+        prev = self.get(planet)
+        if prev is None:
+            return True, "new", []
+        if prev["input_hash"] != input_hash(inputs):
+            return True, "inputs_changed", changed_keys(prev["inputs"], json.loads(canonical(inputs)))
+        if prev["outputs"] == NO_DATA:
+            return False, "no_data", []
+        if not outputs_exist:
+            return True, "outputs_missing", []
+        return False, "up_to_date", []
+
+    def commit(self, planet, inputs, outputs=None):
+        with self._db() as con:
+            con.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                        (planet, input_hash(inputs), canonical(inputs),
+                         canonical(outputs) if outputs is not None else None, time.time()))
+
+    # ---- host ürün listeleri ----
+    def products(self, host, max_age=None):
+        """Kayıtlı ürün listesi; yoksa ya da max_age saniyeden eskiyse None."""
+        with self._db() as con:
+            row = con.execute("SELECT data, fetched FROM products WHERE host = ?", (host,)).fetchone()
+        if row is None or (max_age is not None and time.time() - row[1] > max_age):
+            return None
+        return json.loads(row[0])
+
+    def put_products(self, host, data):
+        with self._db() as con:
+            con.execute("INSERT OR REPLACE INTO products VALUES (?, ?, ?)", (host, canonical(data), time.time()))
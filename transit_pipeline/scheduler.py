@@ -0,0 +1,130 @@
+# Maliyet tahminli zamanlama: host grupları en pahalıdan ucuza (longest-job-first).
+#
+# Hedefler girdi sırasında verilince çok sektörlü bir TESS host'u ya da 17 çeyreklik bir Kepler hedefi
+# sona kalabilir; diğer worker'lar boşta beklerken koşu o tek işi bekler. Her host grubunun süresi
+# ağ olmadan tahmin edilir, birimler pahalıdan ucuza sıralanır (LPT): bitiş süresi Σ iş / worker
+# sayısına yaklaşır (en kötü durumda 4/3 katı).
+#
+# Tahmin kaynakları (öncelik sırasıyla):
+#   history   önceki koşuların timing kayıtları (run_log.jsonl): gezegen başına ölçülmüş süre
+#   products  sonuç deposundaki ürün listesi (inputs["data"]): sektör/çeyrek sayısı ve kadans
+#   cached    host LC'si lc_cache'te: indirme/stitch/detrend yok
+#   yoksa     ad önekinden görev tahmini (Kepler-/KOI-/KIC → Kepler, K2-/EPIC → K2, diğer → TESS)
+# Model sabitleri kaba; history'si olan gezegenlerle ölçeklenir (median ölçülen/model).
+#
+#   model = CostModel(history={"Kepler-10 b": 42.0}, products={"Kepler-10": {"mission": "Kepler", ...}})
+#   units = plan(rows, model)            # [(host, tahmini_s, [satır, ...]), ...] pahalıdan ucuza
+#   makespan([c for _, c, _ in units], workers=8)
+import heapq
+import statistics
+
+from .workqueue import group_by_host
+
+# ürün listesi bilinmiyorsa görev başına tipik ürün sayısı
+MISSION_PRODUCTS = {"TESS": 4, "Kepler": 17, "K2": 1}
+# ürün başına tipik nokta sayısı (dosya adındaki işarete göre; ilk eşleşen)
+CADENCE_POINTS = (
+    ("fast-lc", 110000),   # TESS 20 s
+    ("_slc", 44000),       # Kepler kısa kadans (aylık dosya)
+    ("hlsp_qlp", 3600),    # TESS FFI (QLP)
+    ("_llc", 4400),        # Kepler/K2 uzun kadans (çeyrek/kampanya)
+    ("_lc.fits", 18000),   # TESS 2 dk sektör
+)
+MISSION_POINTS = {"TESS": 18000, "Kepler": 4400, "K2": 3600}
+HOST_S = 3.0          # host başına arama + ürün listesi + indirme isteği gecikmesi
+POINT_S = 2e-5        # nokta başına indirme + okuma + stitch + detrend
+TARGET_S = 1.0        # gezegen başına fold/bin/metrik/çıktı
+TARGET_POINT_S = 2e-6
+CACHED_FRACTION = 0.1  # host LC önbellekteyse host maliyetinin kalan kısmı
+
+_MISSION_PREFIXES = (("Kepler", ("kepler-", "koi-", "kic")), ("K2", ("k2-", "epic")))
+
+
+def guess_mission(name):
+    n = str(name or "").strip().lower()
+    for mission, prefixes in _MISSION_PREFIXES:
+        if n.startswith(prefixes):
+            return mission
+    return "TESS"
+
+
+def product_points(name, mission=None):
+    n = str(name).lower()
+    for marker, points in CADENCE_POINTS:
+        if marker in n:
+            return points
+    return MISSION_POINTS.get(mission, MISSION_POINTS["TESS"])
+
+
+def host_points(host, data=None):
+    """Host'un toplam nokta sayısı tahmini; data: list_products çıktısı ({"mission", "products"}) ya da None."""
+    if data and data.get("products"):
+        return sum(product_points(p, data.get("mission")) for p in data["products"])
+    if data and data.get("mission") is None and "products" in data:
+        return 0    # arandı, veri yok: yalnızca arama maliyeti
+    mission = guess_mission(host)
+    return MISSION_PRODUCTS[mission] * MISSION_POINTS[mission]
+
+
+class CostModel:
+    """
+    history: {gezegen: ölçülmüş saniye}, products: {host: list_products çıktısı},
+    cached: lc_cache'te olan host adları.
+    """
+
+    def __init__(self, history=None, products=None, cached=()):
+        self.history = dict(history or {})
+        self.products = dict(products or {})
+        self.cached = set(cached)
+        self.scale = 1.0
+
+    def model_unit(self, host, n_planets):
+        points = host_points(host, self.products.get(host))
+        fetch = HOST_S + points * POINT_S
+        if host in self.cached:
+            fetch *= CACHED_FRACTION
+        return fetch + n_planets * (TARGET_S + points * TARGET_POINT_S)
+
+    def calibrate(self, groups):
+        """Ölçülmüş süresi olan host'larla model ölçeği (median ölçülen/model); grup yoksa 1."""
+        ratios = []
+        for host, rows in groups:
+            names = [str(r.get("pl_name", "")).strip() for r in rows]
+            if names and all(n in self.history for n in names):
+                model = self.model_unit(host, len(names))
+                if model > 0:
+                    ratios.append(sum(self.history[n] for n in names) / model)
+        self.scale = statistics.median(ratios) if ratios else 1.0
+        return self.scale
+
+    def unit_cost(self, host, rows):
+        names = [str(r.get("pl_name", "")).strip() for r in rows]
+        if names and all(n in self.history for n in names):
+            return sum(self.history[n] for n in names)
+        return self.scale * self.model_unit(host, len(names))
+
+
+def plan(rows, model=None):
+    """Host grupları, tahmini maliyetle pahalıdan ucuza: [(host, saniye, [satır, ...]), ...]."""
+    model = model or CostModel()
+    groups = group_by_host(rows)
+    model.calibrate(groups)
+    units = [(host, float(model.unit_cost(host, rs)), rs) for host, rs in groups]
+    units.sort(key=lambda u: (-u[1], u[0]))
+    return units
+
+
+def makespan(costs, workers):
+    """Maliyetler verilen sırayla boşalan worker'a atanırsa toplam süre."""
+    finish = [0.0] * max(1, int(workers))
+    for c in costs:
+        heapq.heapreplace(finish, finish[0] + c)
+    return max(finish)
+
+
+def lower_bound(costs, workers):
+    """Hiçbir sıralamanın geçemeyeceği süre: max(en uzun iş, Σ iş / worker)."""
+    costs = list(costs)
+    if not costs:
+        return 0.0
+    return max(max(costs), sum(costs) / max(1, int(workers)))
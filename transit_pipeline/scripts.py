@@ -0,0 +1,35 @@
+# Repo kökündeki betiklerin modül olarak yüklenmesi.
+#
+# Betik dosya adları (tire, klasör) import edilemez; ayarlar betiğin ### ayarlar bloğunda kaldığı için
+# kod pakete taşınmadı. load() betiği sabit bir modül adıyla sys.modules'e kaydeder: tekrar çağrı aynı
+# modülü döndürür, süreç havuzu worker'ları fonksiyonlarını ada göre bulur (pickle).
+# Betikler import anında iş yapmaz (klasör, argparse, ağ yok); main(argv) çağrılınca çalışır.
+#
+#   pipe = load("pipeline")          # Transit-Analysis-Pipeline.py
+#   pipe.OUTPUT_DIR = ...; pipe.process_one({"pl_name": "Kepler-10 b", ...})
+#   kepler = load("kepler"); kepler.main(["--planetname", "Kepler-10 b", "--no-plots"])
+import os
+import sys
+import importlib.util
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = {
+    # ad: (repo köküne göre yol, modül adı)
+    "pipeline": ("Transit-Analysis-Pipeline.py", "transit_analysis_pipeline"),
+    "kepler": (os.path.join("Kepler-10_b-Analysis", "kepler_exoplanet_analysis.py"), "kepler_exoplanet_analysis"),
+}
+
+
+def load(name, reload=False):
+    path, modname = SCRIPTS[name]
+    if not reload and modname in sys.modules:
+        return sys.modules[modname]
+    spec = importlib.util.spec_from_file_location(modname, os.path.join(REPO, path))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[modname] = mod
+    try:
+        spec.loader.exec_module(mod)
+    except BaseException:
+        sys.modules.pop(modname, None)
+        raise
+    return mod
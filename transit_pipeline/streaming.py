@@ -0,0 +1,93 @@
+# Sınırlı bellekli, çeyrek çeyrek ışık eğrisi birleştirme.
+#
+# Tüm TPF'leri ve ışık eğrilerini aynı anda tutmak yerine her çeyrek açılır
+# (memmap), fotometrisi çıkarılıp detrend edilir, sonuç önceden ayrılmış /
+# parça parça büyüyen dizilere eklenir ve TPF serbest bırakılır. Tepe bellek
+# ≈ bir çeyrek + çıktı dizileri.
+import gc
+
+import numpy as np
+
+
+class LightCurveStore:
+    """Ardışık segmentlerden (çeyrek/sektör) oluşan zaman serisi; segmentler görünüm (view) olarak okunur."""
+
+    def __init__(self, capacity=0, chunk=65536):
+        self.chunk = int(chunk)
+        self.n = 0
+        self.time = np.empty(capacity, dtype=np.float64)
+        self.flux = np.empty(capacity, dtype=np.float64)
+        self.flux_err = np.empty(capacity, dtype=np.float64)
+        self.segments = []  # (start, stop, label)
+
+    def _reserve(self, extra):
+        need = self.n + extra
+        cap = self.time.size
+        if need <= cap:
+            return
+        new_cap = max(need, cap + self.chunk, int(cap * 1.5))
+        for name in ("time", "flux", "flux_err"):
+            old = getattr(self, name)
+            arr = np.empty(new_cap, dtype=old.dtype)
+            arr[:self.n] = old[:self.n]
+            setattr(self, name, arr)
+
+    def append(self, time, flux, flux_err=None, label=None):
+        time = np.asarray(time, dtype=np.float64)
+        m = time.size
+        self._reserve(m)
+        lo, hi = self.n, self.n + m
+        self.time[lo:hi] = time
+        self.flux[lo:hi] = flux
+        self.flux_err[lo:hi] = np.nan if flux_err is None else flux_err
+        self.n = hi
+        self.segments.append((lo, hi, label))
+
+    def __len__(self):
+        return self.n
+
+    def arrays(self):
+        return self.time[:self.n], self.flux[:self.n], self.flux_err[:self.n]
+
+    def segment(self, i):
+        lo, hi, _ = self.segments[i]
+        return self.time[lo:hi], self.flux[lo:hi], self.flux_err[lo:hi]
+
+    def labels(self):
+        return [s[2] for s in self.segments]
+
+    def to_lightcurve(self, time_format="bkjd", time_scale="tdb", segment=None):
+        import lightkurve as lk
+        from astropy.time import Time
+        t, f, e = self.arrays() if segment is None else self.segment(segment)
+        return lk.LightCurve(time=Time(t, format=time_format, scale=time_scale), flux=f, flux_err=e)
+
+
+def stream_quarters(n, open_fn, process_fn, store=None, on_open=None):
+    """
+    n adet ürünü sırayla işler:
+      open_fn(i)        -> TPF/LC nesnesi (memmap ile açılmış)
+      on_open(i, obj)   -> isteğe bağlı (ör. TPF ızgara çizimi)
+      process_fn(obj)   -> (time, flux, flux_err, label) veya None
+    Her adımdan sonra nesne kapatılıp bırakılır.
+    """
+    store = store if store is not None else LightCurveStore()
+    for i in range(n):
+        obj = open_fn(i)
+        try:
+            if on_open is not None:
+                on_open(i, obj)
+            out = process_fn(obj)
+            if out is not None:
+                t, f, e, label = out
+                store.append(t, f, e, label)
+        finally:
+            hdu = getattr(obj, "hdu", None)
+            if hdu is not None:
+                try:
+                    hdu.close()
+                except Exception:
+                    pass
+            del obj
+            gc.collect()
+    return store
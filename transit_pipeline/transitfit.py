@@ -0,0 +1,197 @@
+# batman + iminuit transit modeli uydurma (batmanfits.ipynb'nin modül hali).
+#
+# - her zaman ızgarası için tek bir batman.TransitModel kurulur, parametre
+#   güncellemelerinde yeniden kullanılır (model kurulumu pahalı, light_curve ucuz)
+# - önce binlenmiş katlanmış eğriye, sonra bu çözümden başlayarak binlenmemiş
+#   veriye uydurulur; her ikisi de transit çevresindeki pencereyle sınırlıdır
+# - fit_many çok sayıda hedefi süreç havuzunda uydurur
+#
+# Kaydedilmiş katlanmış CSV'leri toplu uydurmak için:
+#   python -m transit_pipeline.transitfit --manifest manifest.jsonl --csv-dir csv --out transit_fits.csv
+#   python -m transit_pipeline.transitfit --manifest outputs.sqlite --out transit_fits.csv   (ikili çıktı)
+import os
+import math
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+FIT_COLUMNS = ["fit_rp_rs", "fit_rp_rs_err", "fit_a_rs", "fit_a_rs_err",
+               "fit_inc_deg", "fit_inc_err", "fit_chi2_red", "fit_ok"]
+
+
+class _Model:
+    """Bir zaman ızgarası için yeniden kullanılan batman modeli."""
+
+    def __init__(self, t, period, limb_dark, u, fac=None):
+        import batman
+        self.params = batman.TransitParams()
+        self.params.t0 = 0.
+        self.params.per = float(period)
+        self.params.rp = 0.1
+        self.params.a = 15.
+        self.params.inc = 89.
+        self.params.ecc = 0.
+        self.params.w = 90.
+        self.params.limb_dark = limb_dark
+        self.params.u = list(u)
+        self.m = batman.TransitModel(self.params, np.ascontiguousarray(t, dtype=np.float64), fac=fac)
+
+    def __call__(self, rp, a, inc):
+        p = self.params
+        p.rp, p.a, p.inc = rp, a, inc
+        return self.m.light_curve(p)
+
+
+# optimizasyonda beklenen hatalar (geçersiz parametre bölgesi, sayısal taşma); diğerleri yukarı çıkar
+FIT_ERRORS = (RuntimeError, ValueError, FloatingPointError, ZeroDivisionError)
+
+
+def _minimize(model, flux, flux_err, start, limits):
+    from iminuit import Minuit
+    ivar = 1.0 / flux_err ** 2
+
+    def chi2(rp, a, inc):
+        r = flux - model(rp, a, inc)
+        return float(np.sum(r * r * ivar))
+
+    m = Minuit(chi2, **start)
+    m.errordef = Minuit.LEAST_SQUARES
+    for k, lim in limits.items():
+        m.limits[k] = lim
+    m.migrad()
+    m.hesse()
+    return m
+
+
+def _try_minimize(x, y, e, period, limb_dark, u, start, limits):
+    try:
+        return _minimize(_Model(x, period, limb_dark, u), y, e, start, limits)
+    except FIT_ERRORS:
+        return None
+
+
+def _clean(x, y, e):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if e is None:
+        e = np.full_like(y, np.nan)
+    e = np.asarray(e, dtype=np.float64)
+    ok = np.isfinite(x) & np.isfinite(y)
+    x, y, e = x[ok], y[ok], e[ok]
+    bad = ~np.isfinite(e) | (e <= 0)
+    if bad.all():
+        # hata yoksa dağılımdan kestir
+        e[:] = np.nanstd(y) if y.size > 1 else 1.0
+    elif bad.any():
+        e[bad] = np.nanmedian(e[~bad])
+    return x, y, e
+
+
+def initial_guess(period, depth=None, dur_hr=None):
+    rp = math.sqrt(depth) if depth is not None and np.isfinite(depth) and depth > 0 else 0.1
+    rp = min(max(rp, 1e-3), 0.5)
+    if dur_hr is not None and np.isfinite(dur_hr) and dur_hr > 0:
+        # b=0 için T14 ≈ P / (π a/Rs)
+        a = period / (math.pi * dur_hr / 24.0)
+    else:
+        a = 15.0
+    return {"rp": rp, "a": min(max(a, 1.5), 500.0), "inc": 89.0}
+
+
+def fit_folded(phase, flux, flux_err, period, bin_phase=None, bin_flux=None, bin_err=None,
+               depth=None, dur_hr=None, window=None, limb_dark="quadratic", u=(0.3, 0.1),
+               refine=True):
+    """
+    phase gün cinsinden, transit merkezi 0'da. Sonuç FIT_COLUMNS anahtarlı sözlük.
+    window: |phase| < window (gün) verisi kullanılır; yoksa süreden (3×T14) ya da 0.15 gün.
+    """
+    if window is None:
+        window = min(0.5 * period, 1.5 * dur_hr / 24.0 * 2) if dur_hr else min(0.5 * period, 0.15)
+    start = initial_guess(period, depth, dur_hr)
+    limits = {"rp": (1e-4, 1.0), "a": (1.01, 1000.0), "inc": (50.0, 90.0)}
+
+    x, y, e = _clean(phase, flux, flux_err)
+    sel = np.abs(x) < window
+    x, y, e = x[sel], y[sel], e[sel]
+
+    # m: son başarılı uydurma, ndata: onun veri sayısı (χ²_red için)
+    m, ndata = None, 0
+    if bin_phase is not None and bin_flux is not None:
+        bx, by, be = _clean(bin_phase, bin_flux, bin_err)
+        bsel = np.abs(bx) < window
+        if bsel.sum() > 5:
+            mb = _try_minimize(bx[bsel], by[bsel], be[bsel], period, limb_dark, u, start, limits)
+            if mb is not None:
+                m, ndata = mb, int(bsel.sum())
+                start = {k: float(m.values[k]) for k in ("rp", "a", "inc")}
+    if (refine or m is None) and x.size > 5:
+        mx = _try_minimize(x, y, e, period, limb_dark, u, start, limits)
+        if mx is not None:
+            m, ndata = mx, int(x.size)
+    if m is None:
+        return dict.fromkeys(FIT_COLUMNS, None) | {"fit_ok": False}
+
+    dof = max(1, ndata - 3)
+    return {
+        "fit_rp_rs": float(m.values["rp"]), "fit_rp_rs_err": float(m.errors["rp"]),
+        "fit_a_rs": float(m.values["a"]), "fit_a_rs_err": float(m.errors["a"]),
+        "fit_inc_deg": float(m.values["inc"]), "fit_inc_err": float(m.errors["inc"]),
+        "fit_chi2_red": float(m.fval) / dof,
+        "fit_ok": bool(m.valid),
+    }
+
+
+def _fit_job(job):
+    name, kw = job
+    return name, fit_folded(**kw)
+
+
+def fit_many(jobs, workers=None):
+    """jobs: [(isim, fit_folded kwargs), ...] -> [(isim, sonuç), ...] (aynı sırada)."""
+    jobs = list(jobs)
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1 or len(jobs) <= 1:
+        return [_fit_job(j) for j in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(_fit_job, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+
+
+def _jobs_from_manifest(manifest, csv_dir, bin_size=0.001, arrays_dir=None):
+    from transit_pipeline.foldkernel import bin_sorted
+    from transit_pipeline.outputstore import manifest_records, data_path, read_folded
+    seen = {}
+    for rec in manifest_records(manifest):
+        if rec.get("planet") and data_path(rec, csv_dir, arrays_dir):
+            seen[rec["planet"]] = rec
+    for planet, rec in seen.items():
+        path = data_path(rec, csv_dir, arrays_dir)
+        if not os.path.exists(path):
+            continue
+        ph, fl, fe = (np.asarray(a, dtype=np.float64) for a in read_folded(path, mmap=False))
+        bph, bfl, bfe, _ = bin_sorted(ph, fl, fe, bin_size)
+        yield planet, {"phase": ph, "flux": fl, "flux_err": fe, "period": rec["period_day"],
+                       "bin_phase": bph, "bin_flux": bfl, "bin_err": bfe,
+                       "depth": 1.0 - np.nanmin(fl)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Katlanmış ışık eğrilerine batman transit modeli uydur")
+    ap.add_argument("--manifest", required=True)
+    ap.add_argument("--csv-dir", default=None)
+    ap.add_argument("--arrays-dir", default=None, help="varsayılan: outputs.sqlite yanındaki arrays/")
+    ap.add_argument("--out", default="transit_fits.csv")
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args(argv)
+    import pandas as pd
+    arrays_dir = args.arrays_dir
+    if arrays_dir is None and args.manifest.endswith(".sqlite"):
+        arrays_dir = os.path.join(os.path.dirname(os.path.abspath(args.manifest)), "arrays")
+    results = fit_many(_jobs_from_manifest(args.manifest, args.csv_dir, arrays_dir=arrays_dir),
+                       workers=args.workers)
+    pd.DataFrame([{"planet": n, **r} for n, r in results]).to_csv(args.out, index=False)
+    print(f"{len(results)} hedef uyduruldu -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# Transit başına zamanlama (TTV): tüm transitler tek seferde, Python döngüsü olmadan.
+#
+# - transit pencereleri searchsorted ile indeks aralıkları olarak bulunur, (transit × nokta)
+#   dolgulu matrise tek indeksleme ile kesilir
+# - ortak şablon: katlanmış pencerelere yamuk (süre, giriş/çıkış) ızgara uydurması
+# - her transit için taban + derinlik doğrusal, merkez kayması ızgarada: χ²(transit, kayma)
+#   matrisi parça parça hesaplanır; minimumda parabol ile alt ızgara kayması ve Δχ²=1 hatası
+# - doğrusal efemeris ağırlıklı en küçük kareler; O−C buna göre. İlk geçişin efemerisiyle
+#   pencereler yeniden kesilir (katalog efemerisi binlerce transit boyunca kaymışsa)
+#
+#   res = measure_ttv(t, flux, flux_err, period=1.743, t0=..., duration=0.095)
+#   oc_table(res, time_offset=2454833.0).to_csv("oc.csv", index=False)
+import numpy as np
+
+WINDOW = 3.0              # pencere genişliği / transit süresi
+N_SHIFTS = 41             # merkez kayması ızgarası: ±süre/2 aralığında
+MIN_COVERAGE = 0.5        # pencerenin iki yarısındaki nokta sayısı beklenenin bu oranından azsa transit atılır
+ITERATIONS = 2
+BATCH_CELLS = 4_000_000   # bir seferde (transit × kayma × nokta) hücresi
+TEMPLATE_BINS = 600       # şablon uydurmasında katlanmış pencere bin sayısı
+MAX_SUPERSAMPLE = 9       # poz süresi ortalamasında en fazla alt örnek
+OC_COLUMNS = ["epoch", "tc", "tc_err", "oc_min", "oc_err_min", "depth", "depth_err", "n_points", "chi2_red", "ok"]
+# summary anahtarları (metrics.csv sütunları)
+SUMMARY_COLUMNS = ["ttv_n_transits", "ttv_period_day", "ttv_period_err", "ttv_t0_bjd", "ttv_t0_err",
+                   "ttv_oc_rms_min", "ttv_oc_chi2_red"]
+
+
+def trapezoid(dt, duration, ingress, exposure=0.0):
+    """
+    Derinliğe normalize yamuk transit şekli (transit içi 1, dışı 0); dt merkeze göre.
+    exposure > 0: poz süresi boyunca ortalama (uzun kadansta giriş/çıkış yumuşar, Kipping 2010).
+    """
+    ingress = max(float(ingress), 1e-9)
+    n_sub = int(np.clip(np.ceil(3.0 * exposure / ingress), 1, MAX_SUPERSAMPLE)) if exposure > 0 else 1
+    if n_sub == 1:
+        return np.clip((0.5 * duration - np.abs(dt)) / ingress, 0.0, 1.0)
+    out = 0.0
+    for off in ((np.arange(n_sub) + 0.5) / n_sub - 0.5) * exposure:
+        out = out + np.clip((0.5 * duration - np.abs(dt + off)) / ingress, 0.0, 1.0)
+    return out / n_sub
+
+
+def transit_windows(time, period, t0, half_window):
+    """Artan sıralı time için (epoch, tc, start, mid, stop): her transit penceresinin indeks aralığı."""
+    n0 = int(np.ceil((time[0] - half_window - t0) / period))
+    n1 = int(np.floor((time[-1] + half_window - t0) / period))
+    epochs = np.arange(n0, n1 + 1)
+    tc = t0 + epochs * period
+    start = np.searchsorted(time, tc - half_window, "left")
+    mid = np.searchsorted(time, tc, "left")
+    stop = np.searchsorted(time, tc + half_window, "left")
+    return epochs, tc, start, mid, stop
+
+
+def cut_windows(start, stop, *arrays):
+    """Pencereleri (transit × en uzun pencere) dolgulu matrislere keser -> (valid, matris, ...)."""
+    length = int((stop - start).max()) if start.size else 0
+    idx = start[:, None] + np.arange(length)[None, :]
+    valid = idx < stop[:, None]
+    idx = np.minimum(idx, arrays[0].size - 1)
+    return (valid,) + tuple(a[idx] for a in arrays)
+
+
+def _covered(start, mid, stop, half_window, cadence):
+    expect = half_window / cadence
+    return np.minimum(mid - start, stop - mid) >= MIN_COVERAGE * expect
+
+
+def fit_template(dt, flux, w, duration, exposure=0.0, n_bins=TEMPLATE_BINS):
+    """Katlanmış pencerelere yamuk şablon: ızgarada (süre, giriş) -> (süre, giriş, derinlik)."""
+    # önce ağırlıklı binleme: ızgara maliyeti nokta sayısından bağımsız
+    edges = np.linspace(dt.min(), dt.max() + 1e-12, n_bins + 1)
+    b = np.clip(np.searchsorted(edges, dt, "right") - 1, 0, n_bins - 1)
+    wb = np.bincount(b, weights=w, minlength=n_bins)
+    fb = np.bincount(b, weights=w * flux, minlength=n_bins)
+    use = wb > 0
+    dt, w = 0.5 * (edges[:-1] + edges[1:])[use], wb[use]
+    flux = fb[use] / w
+    best = (np.inf, duration, 0.15 * duration, 0.0)
+    Sw, Sf = w.sum(), (w * flux).sum()
+    for T in duration * np.linspace(0.6, 1.5, 19):
+        for frac in np.linspace(0.05, 0.5, 10):
+            s = trapezoid(dt, T, frac * T, exposure)
+            Ss, Sss, Sfs = (w * s).sum(), (w * s * s).sum(), (w * flux * s).sum()
+            det = Sw * Sss - Ss * Ss
+            if det <= 0:
+                continue
+            a = (Sss * Sf - Ss * Sfs) / det
+            b = (Sw * Sfs - Ss * Sf) / det
+            chi2 = -(a * Sf + b * Sfs)            # sabit Σwf² hariç
+            if chi2 < best[0] and b < 0:
+                best = (chi2, T, frac * T, -b)
+    return best[1], best[2], best[3]
+
+
+def _fit_times(dt, flux, w, duration, ingress, shifts, exposure=0.0):
+    """Her transit için (kayma, kayma_hatası, derinlik, derinlik_hatası, χ²_min, kenar_mı)."""
+    n, L = dt.shape
+    Sw = w.sum(axis=1)
+    Sf = (w * flux).sum(axis=1)
+    Sff = (w * flux * flux).sum(axis=1)
+    chi2 = np.empty((n, shifts.size))
+    depth = np.empty((n, shifts.size))
+    dvar = np.empty((n, shifts.size))
+    rows = max(1, BATCH_CELLS // max(1, shifts.size * L))
+    for a in range(0, n, rows):
+        b = min(n, a + rows)
+        s = trapezoid(dt[a:b, None, :] - shifts[None, :, None], duration, ingress, exposure)    # (r, k, L)
+        ww = w[a:b, None, :]
+        Ss = (ww * s).sum(axis=2)
+        Sss = (ww * s * s).sum(axis=2)
+        Sfs = (ww * flux[a:b, None, :] * s).sum(axis=2)
+        sw, sf, sff = Sw[a:b, None], Sf[a:b, None], Sff[a:b, None]
+        det = sw * Sss - Ss * Ss
+        with np.errstate(invalid="ignore", divide="ignore"):
+            base = (Sss * sf - Ss * Sfs) / det
+            coef = (sw * Sfs - Ss * sf) / det
+            chi2[a:b] = sff - base * sf - coef * Sfs
+            depth[a:b] = -coef
+            dvar[a:b] = sw / det
+    chi2 = np.where(np.isfinite(chi2), chi2, np.inf)
+    k = np.argmin(chi2, axis=1)
+    r = np.arange(n)
+    edge = (k == 0) | (k == shifts.size - 1)
+    kk = np.clip(k, 1, shifts.size - 2)
+    c0, c1, c2 = chi2[r, kk - 1], chi2[r, kk], chi2[r, kk + 1]
+    h = shifts[1] - shifts[0]
+    curv = (c0 - 2 * c1 + c2) / (h * h)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        off = np.where(curv > 0, 0.5 * (c0 - c2) / (c0 - 2 * c1 + c2), 0.0)
+        off = np.clip(off, -1.0, 1.0)
+        shift = shifts[kk] + off * h
+        chi2_min = c1 - 0.25 * (c0 - c2) * off
+        # hata: Δχ² = 1 kesişimleri (ızgarada doğrusal ara değer); seyrek kadansta χ² eğrisi
+        # kırıklı olduğundan yalnız parabol eğriliği hatayı küçük gösterir
+        level = chi2_min[:, None] + 1.0
+        inside = chi2 <= level
+        m = shifts.size
+        lo = np.argmax(inside, axis=1)
+        hi = m - 1 - np.argmax(inside[:, ::-1], axis=1)
+        lo_o, hi_o = np.maximum(lo - 1, 0), np.minimum(hi + 1, m - 1)
+        x_lo = shifts[lo] - h * np.clip((level[:, 0] - chi2[r, lo]) / (chi2[r, lo_o] - chi2[r, lo]), 0, 1)
+        x_hi = shifts[hi] + h * np.clip((level[:, 0] - chi2[r, hi]) / (chi2[r, hi_o] - chi2[r, hi]), 0, 1)
+        err = np.maximum(0.5 * (x_hi - x_lo), np.where(curv > 0, np.sqrt(2.0 / curv), np.nan))
+    return shift, err, depth[r, kk], np.sqrt(np.abs(dvar[r, kk])), chi2_min, edge
+
+
+def linear_ephemeris(epochs, tc, tc_err):
+    """Ağırlıklı doğrusal fit tc = t0 + n·P -> (t0, P, t0_err, P_err); referans epok 0."""
+    w = 1.0 / tc_err ** 2
+    A = np.vstack([np.ones_like(epochs, dtype=np.float64), epochs.astype(np.float64)]).T
+    cov = np.linalg.inv(A.T @ (A * w[:, None]))
+    t0, P = cov @ (A.T @ (w * tc))
+    return float(t0), float(P), float(np.sqrt(cov[0, 0])), float(np.sqrt(cov[1, 1]))
+
+
+def measure_ttv(time, flux, flux_err=None, period=None, t0=None, duration=None, window=WINDOW,
+                iterations=ITERATIONS, n_shifts=N_SHIFTS, exposure=None):
+    """
+    Detrend edilmiş (taban ~1) seride her transitin orta zamanı. time, t0 aynı zaman sisteminde,
+    period/duration gün; exposure (gün) None ise kadans. Döner: dizi alanları (epoch, tc, tc_err, depth, depth_err, n_points,
+    chi2_red, ok) ve efemeris/şablon alanları içeren dict; uygun transit yoksa None.
+    """
+    t = np.asarray(time, dtype=np.float64)
+    f = np.asarray(flux, dtype=np.float64)
+    e = np.asarray(flux_err, dtype=np.float64) if flux_err is not None else None
+    good = np.isfinite(t) & np.isfinite(f) & (np.isfinite(e) & (e > 0) if e is not None else True)
+    order = np.argsort(t[good], kind="stable")
+    t, f = t[good][order], f[good][order]
+    if e is not None:
+        e = e[good][order]
+    else:
+        e = np.full(t.size, 1.4826 * np.median(np.abs(f - np.median(f))) or 1.0)
+    if t.size < 10 or not period or duration is None or not duration > 0:
+        return None
+    dt_all = np.diff(t)
+    cadence = float(np.median(dt_all[dt_all > 0])) if (dt_all > 0).any() else duration / 10
+    exposure = cadence if exposure is None else float(exposure)
+    half = 0.5 * window * duration
+    shifts = np.linspace(-0.5 * duration, 0.5 * duration, n_shifts)
+
+    P, T0 = float(period), float(t0)
+    out = None
+    for _ in range(max(1, iterations)):
+        epochs, tc_pred, start, mid, stop = transit_windows(t, P, T0, half)
+        keep = _covered(start, mid, stop, half, cadence)
+        if not keep.any():
+            return None
+        epochs, tc_pred, start, stop = epochs[keep], tc_pred[keep], start[keep], stop[keep]
+        valid, tw, fw, ew = cut_windows(start, stop, t, f, e)
+        w = np.where(valid, 1.0 / ew ** 2, 0.0)
+        dt = tw - tc_pred[:, None]
+        T, tau, _ = fit_template(dt[valid], fw[valid], w[valid], duration, exposure)
+        shift, err, depth, depth_err, chi2, edge = _fit_times(dt, fw, w, T, tau, shifts, exposure)
+        n_pts = valid.sum(axis=1)
+        chi2_red = chi2 / np.maximum(n_pts - 3, 1)
+        # dağılım bildirilen hatalardan büyükse hata ölçeklenir
+        err = err * np.sqrt(np.maximum(chi2_red, 1.0))
+        ok = ~edge & np.isfinite(err) & (err > 0) & (depth > 0) & (depth > 2 * depth_err)
+        tc = tc_pred + shift
+        if ok.sum() < 2:
+            T0_fit, P_fit, T0_err, P_err = T0, P, np.nan, np.nan
+        else:
+            T0_fit, P_fit, T0_err, P_err = linear_ephemeris(epochs[ok], tc[ok], err[ok])
+        out = {"epoch": epochs, "tc": tc, "tc_err": err, "depth": depth, "depth_err": depth_err,
+               "n_points": n_pts, "chi2_red": chi2_red, "ok": ok,
+               "period": P_fit, "period_err": P_err, "t0": T0_fit, "t0_err": T0_err,
+               "template_duration": T, "template_ingress": tau}
+        if ok.sum() < 2:
+            break
+        P, T0 = P_fit, T0_fit
+    return out
+
+
+def oc_table(res, time_offset=0.0):
+    """measure_ttv sonucu -> O−C DataFrame'i (OC_COLUMNS; tc mutlak zaman, O−C dakika)."""
+    import pandas as pd
+    oc = res["tc"] - (res["t0"] + res["epoch"] * res["period"])
+    return pd.DataFrame({
+        "epoch": res["epoch"], "tc": res["tc"] + time_offset, "tc_err": res["tc_err"],
+        "oc_min": oc * 1440.0, "oc_err_min": res["tc_err"] * 1440.0,
+        "depth": res["depth"], "depth_err": res["depth_err"], "n_points": res["n_points"],
+        "chi2_red": res["chi2_red"], "ok": res["ok"],
+    }, columns=OC_COLUMNS)
+
+
+def summary(res, time_offset=0.0):
+    """Hedef başına özet (metriklere eklenir); anahtarlar SUMMARY_COLUMNS."""
+    ok = res["ok"]
+    oc = (res["tc"] - (res["t0"] + res["epoch"] * res["period"]))[ok]
+    err = res["tc_err"][ok]
+    n = int(ok.sum())
+    return {"ttv_n_transits": n, "ttv_period_day": res["period"], "ttv_period_err": res["period_err"],
+            "ttv_t0_bjd": res["t0"] + time_offset, "ttv_t0_err": res["t0_err"],
+            "ttv_oc_rms_min": float(np.sqrt(np.mean(oc ** 2)) * 1440.0) if n else None,
+            "ttv_oc_chi2_red": float(np.sum((oc / err) ** 2) / max(n - 2, 1)) if n else None}
@@ -0,0 +1,311 @@
+# Çok düğümlü (TRUBA/SLURM) parçalı çalıştırma: ortak dosya sisteminde SQLite iş kuyruğu.
+#
+# - hedefler host'a göre gruplanır (aynı host'un gezegenleri aynı iş biriminde → indirme/flatten
+#   bir kez); birimler parçalara (shard) tahmini maliyete (yoksa boyuta) göre dengeli, deterministik
+#   dağıtılır; düğüm kendi parçasını pahalıdan ucuza alır (scheduler.plan)
+# - her düğüm kuyruğu aynı girdiyle doldurur (INSERT OR IGNORE: ilk gelen yazar, tekrar zararsız)
+# - düğüm önce kendi parçasından, bitince en çok işi kalan parçadan birim "çalar"
+# - sahiplik süreli (lease): heartbeat gelmeyen birimler (ölen düğüm) başka düğüme geçer
+# - parça başına manifest/log/metrik dosyaları <çıktı>/shards/<id>/ altında; son biten düğüm
+#   (ya da --merge) bunları ana dosyalara birleştirir
+#
+# Not: WAL paylaşımlı bellek ister, ağ dosya sistemlerinde (Lustre/NFS) güvenli değil; kuyruk
+# klasik rollback journal + BEGIN IMMEDIATE ile çalışır.
+import os
+import json
+import time
+import socket
+import shutil
+import sqlite3
+import threading
+
+SLURM_ENV = (
+    # (parça sayısı, parça no, en küçük no)
+    ("SLURM_ARRAY_TASK_COUNT", "SLURM_ARRAY_TASK_ID", "SLURM_ARRAY_TASK_MIN"),
+    ("SLURM_NTASKS", "SLURM_PROCID", None),
+)
+
+
+def shard_from_env(env=None):
+    """SLURM dizi işi (ya da srun görevleri) -> (parça sayısı, parça no); yoksa None."""
+    env = os.environ if env is None else env
+    for n_key, id_key, min_key in SLURM_ENV:
+        if env.get(n_key) and env.get(id_key):
+            n = int(env[n_key])
+            k = int(env[id_key]) - int(env.get(min_key) or 0) if min_key else int(env[id_key])
+            if n > 1:
+                return n, k
+    return None
+
+
+def group_by_host(rows):
+    """[(host, [satır, ...]), ...] — girdideki ilk görülme sırasıyla."""
+    groups = {}
+    for r in rows:
+        host = r.get("hostname") or r.get("pl_name")
+        groups.setdefault(str(host).strip(), []).append(r)
+    return list(groups.items())
+
+
+def assign_shards(groups, n_shards, costs=None):
+    """
+    Pahalı gruptan ucuza, en az yüklü parçaya (deterministik: her düğüm aynı sonucu bulur).
+    costs: {host: tahmini_s}; verilmezse grubun hedef sayısı.
+    """
+    weight = (lambda host, rows: costs.get(host, len(rows))) if costs else (lambda host, rows: len(rows))
+    load = [0.0] * n_shards
+    out = []
+    for host, rows in sorted(groups, key=lambda g: (-weight(*g), g[0])):
+        k = min(range(n_shards), key=lambda i: (load[i], i))
+        load[k] += weight(host, rows)
+        out.append((host, k, rows))
+    return out
+
+
+class WorkQueue:
+    def __init__(self, path, lease_s=3600.0):
+        self.path = str(path)
+        self.lease_s = float(lease_s)
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with self._db() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS work (
+                unit TEXT PRIMARY KEY, shard INTEGER NOT NULL, rows TEXT NOT NULL, n INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending', owner TEXT, claimed REAL, heartbeat REAL,
+                finished REAL, attempts INTEGER NOT NULL DEFAULT 0, result TEXT,
+                cost REAL NOT NULL DEFAULT 0)""")
+            # cost sütunundan önce oluşturulmuş kuyruk dosyaları
+            if "cost" not in {r[1] for r in con.execute("PRAGMA table_info(work)")}:
+                con.execute("ALTER TABLE work ADD COLUMN cost REAL NOT NULL DEFAULT 0")
+            con.execute("CREATE INDEX IF NOT EXISTS work_status ON work (status, shard)")
+            con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _db(self):
+        con = sqlite3.connect(self.path, timeout=300, isolation_level=None)
+        con.execute("PRAGMA journal_mode=DELETE")
+        return con
+
+    def populate(self, assigned, costs=None):
+        """
+        assigned: assign_shards çıktısı, costs: {host: tahmini_s} (yoksa hedef sayısı).
+        Var olan birimlere dokunmaz; eklenen sayısını döndürür.
+        """
+        costs = costs or {}
+        con = self._db()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            before = con.execute("SELECT COUNT(*) FROM work").fetchone()[0]
+            con.executemany("INSERT OR IGNORE INTO work (unit, shard, rows, n, cost) VALUES (?, ?, ?, ?, ?)",
+                            [(host, k, json.dumps(rows, default=str), len(rows), float(costs.get(host, len(rows))))
+                             for host, k, rows in assigned])
+            after = con.execute("SELECT COUNT(*) FROM work").fetchone()[0]
+            con.execute("COMMIT")
+            return after - before
+        finally:
+            con.close()
+
+    def claim(self, shard, owner, max_rows=1):
+        """
+        Toplam en az max_rows hedef olacak kadar birim alır (en az bir birim):
+        önce kendi parçasının bekleyenleri (pahalıdan ucuza), sonra süresi dolmuş sahiplikler, sonra
+        en çok işi kalan başka parçanın bekleyenleri. Döner: [(unit, [satır, ...]), ...] (boşsa iş kalmamış).
+        """
+        now = time.time()
+        con = self._db()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            expired = now - self.lease_s
+            picked, total = [], 0
+            queries = (
+                ("""SELECT unit, rows, n FROM work WHERE status = 'pending' AND shard = ?
+                    ORDER BY cost DESC, n DESC, unit""", (shard,)),
+                ("""SELECT unit, rows, n FROM work WHERE status = 'claimed' AND heartbeat < ?
+                    ORDER BY cost DESC, n DESC, unit""", (expired,)),
+                ("""SELECT w.unit, w.rows, w.n FROM work w
+                    JOIN (SELECT shard, SUM(CASE WHEN cost > 0 THEN cost ELSE n END) AS left FROM work
+                          WHERE status = 'pending' GROUP BY shard) s
+                    ON s.shard = w.shard WHERE w.status = 'pending'
+                    ORDER BY s.left DESC, w.shard, w.cost ASC, w.n ASC, w.unit""", ()),
+            )
+            for sql, args in queries:
+                for unit, rows, n in con.execute(sql, args).fetchall():
+                    if total >= max_rows and picked:
+                        break
+                    if any(u == unit for u, _ in picked):
+                        continue    # kendi parçasından zaten alındı (UPDATE henüz yapılmadı)
+                    picked.append((unit, json.loads(rows)))
+                    total += n
+                if total >= max_rows and picked:
+                    break
+            con.executemany("""UPDATE work SET status = 'claimed', owner = ?, claimed = ?, heartbeat = ?,
+                               attempts = attempts + 1 WHERE unit = ?""",
+                            [(owner, now, now, u) for u, _ in picked])
+            con.execute("COMMIT")
+            return picked
+        finally:
+            con.close()
+
+    def heartbeat(self, owner):
+        con = self._db()
+        try:
+            con.execute("UPDATE work SET heartbeat = ? WHERE owner = ? AND status = 'claimed'", (time.time(), owner))
+        finally:
+            con.close()
+
+    def finish(self, units, owner, result=None):
+        """Birimleri bitti işaretler (sahipliği başka düğüme geçmişse de: iş yapılmış durumda)."""
+        con = self._db()
+        try:
+            con.executemany("UPDATE work SET status = 'done', finished = ?, owner = ?, result = ? WHERE unit = ?",
+                            [(time.time(), owner, json.dumps(result) if result is not None else None, u)
+                             for u in units])
+        finally:
+            con.close()
+
+    def release(self, units):
+        con = self._db()
+        try:
+            con.executemany("UPDATE work SET status = 'pending', owner = NULL WHERE unit = ? AND status = 'claimed'",
+                            [(u,) for u in units])
+        finally:
+            con.close()
+
+    def release_claimed(self):
+        """Tüm sahiplenilmiş birimleri bekleyene döndürür (tek düğümlü checkpoint'te yarıda kalanlar)."""
+        con = self._db()
+        try:
+            return con.execute("UPDATE work SET status = 'pending', owner = NULL WHERE status = 'claimed'").rowcount
+        finally:
+            con.close()
+
+    def progress(self):
+        """{durum: (birim, hedef)}"""
+        con = self._db()
+        try:
+            return {s: (u, n or 0) for s, u, n in
+                    con.execute("SELECT status, COUNT(*), SUM(n) FROM work GROUP BY status")}
+        finally:
+            con.close()
+
+    def remaining(self):
+        p = self.progress()
+        return sum(p.get(s, (0, 0))[0] for s in ("pending", "claimed"))
+
+    def get_meta(self, key, default=None):
+        con = self._db()
+        try:
+            row = con.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else default
+        finally:
+            con.close()
+
+    def set_meta(self, key, value):
+        con = self._db()
+        try:
+            con.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+        finally:
+            con.close()
+
+    def try_take(self, key, owner):
+        """meta'da key'i ilk alan True döner (ör. birleştirmeyi tek düğüm yapsın)."""
+        con = self._db()
+        try:
+            cur = con.execute("INSERT OR IGNORE INTO meta VALUES (?, ?)", (key, owner))
+            return cur.rowcount == 1
+        finally:
+            con.close()
+
+
+class Heartbeat:
+    """Arka planda owner'ın birimlerinin lease'ini yeniler."""
+
+    def __init__(self, queue, owner, every_s=None):
+        self.queue = queue
+        self.owner = owner
+        self.every_s = every_s or max(5.0, queue.lease_s / 4)
+        self._stop = threading.Event()
+        self._t = threading.Thread(target=self._run, name="queue-heartbeat", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.every_s):
+            try:
+                self.queue.heartbeat(self.owner)
+            except sqlite3.Error:
+                pass
+
+    def __enter__(self):
+        self._t.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._t.join(timeout=5)
+        return False
+
+
+def default_owner(shard):
+    return f"{socket.gethostname()}:{os.getpid()}:shard{shard}"
+
+
+# ---- parça çıktılarının birleştirilmesi ----
+def shard_dir(output_dir, shard):
+    return os.path.join(output_dir, "shards", f"{int(shard):04d}")
+
+
+def _append_file(src, dst):
+    if not os.path.exists(src):
+        return 0
+    with open(src, "rb") as f, open(dst, "ab") as out:
+        shutil.copyfileobj(f, out, length=1 << 20)
+        return f.tell()
+
+
+def merge_shards(output_dir, manifest="manifest.jsonl", logfile="run_log.jsonl", metrics="metrics.csv"):
+    """
+    shards/*/ altındaki manifest ve log satırlarını ana dosyalara ekler, metrics.csv'leri sütun
+    birleşimiyle (hedef başına son satır) ana metrics.csv'ye katar, ikili çıktı (outputs.sqlite +
+    arrays/) varsa ana depoya taşır. Birleştirilen parça klasörleri shards/merged/<zaman>/ altına
+    alınır, yani tekrar çağırmak aynı satırları iki kez eklemez. Döner: birleştirilen parça sayısı.
+    """
+    root = os.path.join(output_dir, "shards")
+    if not os.path.isdir(root):
+        return 0
+    dirs = sorted(d for d in os.listdir(root) if d.isdigit() and os.path.isdir(os.path.join(root, d)))
+    if not dirs:
+        return 0
+    frames = []
+    store = None
+    for d in dirs:
+        src = os.path.join(root, d)
+        _append_file(os.path.join(src, manifest), os.path.join(output_dir, manifest))
+        _append_file(os.path.join(src, logfile), os.path.join(output_dir, logfile))
+        mpath = os.path.join(src, metrics)
+        if os.path.exists(mpath) and os.path.getsize(mpath) > 0:
+            import pandas as pd
+            frames.append(pd.read_csv(mpath))
+        if os.path.exists(os.path.join(src, "outputs.sqlite")):
+            from transit_pipeline.outputstore import OutputStore
+            store = store or OutputStore(output_dir)
+            part = OutputStore(src)
+            for rec in part.records():
+                src_arr = part.array_path(rec["arrays"]) if rec.get("arrays") else None
+                if src_arr and os.path.exists(src_arr):
+                    os.replace(src_arr, store.array_path(rec["arrays"]))
+                store.put(rec["planet"], {k: v for k, v in rec.items() if k not in ("seq", "updated")})
+    if frames:
+        import pandas as pd
+        main = os.path.join(output_dir, metrics)
+        if os.path.exists(main) and os.path.getsize(main) > 0:
+            frames.insert(0, pd.read_csv(main))
+        df = pd.concat(frames, ignore_index=True, sort=False)
+        if "planet" in df.columns:
+            df = df.drop_duplicates("planet", keep="last")
+        tmp = f"{main}.tmp.{os.getpid()}"
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, main)
+    done = os.path.join(root, "merged", time.strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(done, exist_ok=True)
+    for d in dirs:
+        os.replace(os.path.join(root, d), os.path.join(done, d))
+    return len(dirs)